@@ -1,17 +1,40 @@
 """
 BERTopic API + User database for EduConnect.
 Run: python app.py
+
+Async (ASGI) app on Quart, Flask's async twin. Route handlers never block the event loop:
+SQLite calls go through the bounded DB executor in async_database.py and embedding /
+topic-model work runs on its own NLP executor, so one process serves many concurrent
+profile and auth requests.
 """
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+from quart import Quart, request, jsonify
+from quart_cors import cors
 from bertopic import BERTopic
 from sentence_transformers import SentenceTransformer
 
-from database import init_db, get_user_by_email, get_all_users, create_user, update_user, get_user_by_id, merge_user_profile
+import async_database as db
+import passwords
+from database import init_db, user_cache_stats
+from next_topic import ModelUnavailable, NextTopicModel
+from study_stats_buffer import StudyStatsBuffer
+
+app = Quart(__name__)
+app = cors(app, allow_origin=["http://localhost:5173", "http://127.0.0.1:5173"])
+
+# CPU-bound NLP (sentence embeddings, BERTopic) stays off the DB executor and the event loop.
+# Threads rather than processes: the models release the GIL and are loaded once per process.
+NLP_MAX_WORKERS = int(os.environ.get('NLP_MAX_WORKERS', '2'))
+_nlp_executor = ThreadPoolExecutor(max_workers=NLP_MAX_WORKERS, thread_name_prefix='nlp')
 
-app = Flask(__name__)
-CORS(app, origins=["http://localhost:5173", "http://127.0.0.1:5173"])
+
+async def run_nlp(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_nlp_executor, functools.partial(fn, *args))
 
 # Emails that have admin role
 ADMIN_EMAILS = ['admin@educonnect.com']
@@ -45,47 +68,51 @@ def get_topic_model():
     return _topic_model
 
 
+def extract_topics(documents):
+    """Run BERTopic over documents (blocking; call via run_nlp)."""
+    topic_model = get_topic_model()
+    topics, probs = topic_model.fit_transform(documents)
+
+    topic_info = topic_model.get_topic_info()
+    result_topics = []
+    for _, row in topic_info.iterrows():
+        if row["Topic"] != -1:
+            topic_words = topic_model.get_topic(int(row["Topic"]))
+            words = [w[0] for w in (topic_words or [])]
+            result_topics.append({
+                "topic_id": int(row["Topic"]),
+                "count": int(row["Count"]),
+                "name": row.get("Name", ""),
+                "keywords": words[:10],
+            })
+
+    doc_topics = [
+        {"document": doc[:100], "topic_id": int(t) if t is not None else -1}
+        for doc, t in zip(documents, topics)
+    ]
+    return {
+        "topics": result_topics,
+        "document_topics": doc_topics,
+    }
+
+
 @app.route("/api/topics", methods=["POST"])
-def get_topics():
+async def get_topics():
     """Extract topics from documents using BERTopic."""
-    data = request.get_json()
+    data = await request.get_json()
     documents = data.get("documents", [])
 
     if not documents or len(documents) < 2:
         return jsonify({"topics": [], "topic_info": [], "error": "Need at least 2 documents"}), 400
 
     try:
-        topic_model = get_topic_model()
-        topics, probs = topic_model.fit_transform(documents)
-
-        topic_info = topic_model.get_topic_info()
-        result_topics = []
-        for _, row in topic_info.iterrows():
-            if row["Topic"] != -1:
-                topic_words = topic_model.get_topic(int(row["Topic"]))
-                words = [w[0] for w in (topic_words or [])]
-                result_topics.append({
-                    "topic_id": int(row["Topic"]),
-                    "count": int(row["Count"]),
-                    "name": row.get("Name", ""),
-                    "keywords": words[:10],
-                })
-
-        doc_topics = [
-            {"document": doc[:100], "topic_id": int(t) if t is not None else -1}
-            for doc, t in zip(documents, topics)
-        ]
-
-        return jsonify({
-            "topics": result_topics,
-            "document_topics": doc_topics,
-        })
+        return jsonify(await run_nlp(extract_topics, documents))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/health", methods=["GET"])
-def health():
+async def health():
     return jsonify({"status": "ok"})
 
 
@@ -194,30 +221,36 @@ def cosine_similarity(a, b):
     return float(np.clip(n, -1, 1))
 
 
+def match_intent(message):
+    """Embed message and return (best intent, cosine score) (blocking; call via run_nlp)."""
+    model = get_embedding_model()
+    intent_list = get_intent_embeddings()
+    query_emb = model.encode(message, convert_to_numpy=True)
+
+    best_intent = None
+    best_score = -1.0
+
+    for intent_id, phrase, phrase_emb in intent_list:
+        score = cosine_similarity(query_emb, phrase_emb)
+        if score > best_score:
+            best_score = score
+            best_intent = intent_id
+    return best_intent, best_score
+
+
 @app.route("/api/nlp/atlas-intent", methods=["POST"])
-def atlas_intent():
+async def atlas_intent():
     """
     NLP intent for AtlasBot: embed user message, match to intent phrases, return best intent + confidence.
     Body: { "message": "..." }. Returns { "intent": "...", "confidence": 0.0-1.0 }.
     """
-    data = request.get_json() or {}
+    data = await request.get_json() or {}
     message = (data.get("message") or "").strip()
     if not message:
         return jsonify({"intent": "help", "confidence": 0.0})
 
     try:
-        model = get_embedding_model()
-        intent_list = get_intent_embeddings()
-        query_emb = model.encode(message, convert_to_numpy=True)
-
-        best_intent = None
-        best_score = -1.0
-
-        for intent_id, phrase, phrase_emb in intent_list:
-            score = cosine_similarity(query_emb, phrase_emb)
-            if score > best_score:
-                best_score = score
-                best_intent = intent_id
+        best_intent, best_score = await run_nlp(match_intent, message)
 
         # Require minimum confidence so random text doesn't match "hello"
         confidence = float(best_score)
@@ -235,11 +268,24 @@ def atlas_intent():
 # --- Auth & Users ---
 init_db()
 
+# studyStats-only PATCHes are coalesced in memory and flushed in batches (see study_stats_buffer.py)
+study_stats_buffer = StudyStatsBuffer()
+study_stats_buffer.start()
+
+
+@app.after_serving
+async def shutdown_executors():
+    """Flush buffered study stats, then let in-flight DB and NLP work finish."""
+    await db.run_db(study_stats_buffer.stop)
+    db.shutdown()
+    passwords.shutdown()
+    _nlp_executor.shutdown(wait=True)
+
 
 @app.route("/api/auth/signup", methods=["POST"])
-def api_signup():
+async def api_signup():
     """Register a new user. Body: { firstName, lastName, email, password, ...profile }"""
-    data = request.get_json() or {}
+    data = await request.get_json() or {}
     email = (data.get("email") or "").strip()
     password = data.get("password")
     first_name = data.get("firstName", "").strip()
@@ -250,7 +296,7 @@ def api_signup():
     if not first_name or not last_name:
         return jsonify({"error": "First name and last name are required"}), 400
 
-    existing = get_user_by_email(email)
+    existing = await db.get_user_by_email(email)
     if existing:
         return jsonify({"error": "An account with this email already exists. Please sign in instead."}), 409
 
@@ -273,7 +319,7 @@ def api_signup():
     user_data = {
         "id": user_id,
         "email": email,
-        "password": password,
+        "password": await passwords.hash_password_async(password),
         "firstName": first_name,
         "lastName": last_name,
         "role": role,
@@ -284,53 +330,76 @@ def api_signup():
     if "confirmPassword" in user_data:
         del user_data["confirmPassword"]
 
-    create_user(user_data)
+    await db.create_user(user_data)
 
-    # Return user without password for client (client stores password for now for login check - optional to remove)
-    out = {**user_data}
+    # Return user without password (the stored value is a hash)
+    out = {k: v for k, v in user_data.items() if k != "password"}
     return jsonify({"user": out}), 201
 
 
 @app.route("/api/auth/login", methods=["POST"])
-def api_login():
-    """Login. Body: { email, password }"""
-    data = request.get_json() or {}
+async def api_login():
+    """Login. Body: { email, password, includeProfile? }. includeProfile: false returns account fields only."""
+    data = await request.get_json() or {}
     email = (data.get("email") or "").strip()
     password = data.get("password", "")
+    include_profile = data.get("includeProfile", True) is not False
 
     if not email or not password:
         return jsonify({"error": "Email and password are required"}), 400
 
-    user = get_user_by_email(email)
-    if not user:
+    credentials = await db.get_login_credentials(email)
+    if not credentials:
         return jsonify({"error": "No account found with this email. Please sign up first."}), 404
-    if user.get("password") != password:
+    user_id, stored_password = credentials
+    # Hash verification runs on the password pool, not the event loop or DB executor
+    if not await passwords.verify_password_async(stored_password, password):
         return jsonify({"error": "Incorrect password. Please try again."}), 401
+    # Plaintext rows (and hashes with old cost parameters) are upgraded on successful login
+    new_password = await passwords.hash_password_async(password) if passwords.needs_rehash(stored_password) else None
 
     from datetime import datetime
-    update_user(user["id"], last_login_time=datetime.utcnow().isoformat() + "Z")
-    user["lastLoginTime"] = datetime.utcnow().isoformat() + "Z"
+    user = await db.record_login(user_id, stored_password, datetime.utcnow().isoformat() + "Z", include_profile, new_password)
+    if not user:
+        # Password changed between the check and the update
+        return jsonify({"error": "Incorrect password. Please try again."}), 401
+    if include_profile:
+        user = study_stats_buffer.overlay(user)
 
-    return jsonify({"user": user})
+    out = {k: v for k, v in user.items() if k != "password"}
+    return jsonify({"user": out})
 
 
 @app.route("/api/admin/users", methods=["GET"])
-def api_admin_users():
+async def api_admin_users():
     """List all registered users. Requires X-User-Email header with admin email."""
     ok, err = require_admin()
     if not ok:
         return err
 
-    users = get_all_users()
+    users = [study_stats_buffer.overlay(u) for u in await db.get_all_users()]
     # Remove passwords from response
     out = [{k: v for k, v in u.items() if k != "password"} for u in users]
     return jsonify({"users": out})
 
 
+@app.route("/api/admin/cache-stats", methods=["GET"])
+async def api_admin_cache_stats():
+    """User cache hit ratio and write-behind buffer counters. Requires admin X-User-Email."""
+    ok, err = require_admin()
+    if not ok:
+        return err
+    return jsonify({
+        "userCache": user_cache_stats(),
+        "studyStatsBuffer": study_stats_buffer.stats(),
+        "nextTopic": next_topic_model.stats(),
+    })
+
+
 @app.route("/api/users/<user_id>", methods=["GET"])
-def api_get_user(user_id):
+async def api_get_user(user_id):
     """Get a single user by id (for profile/sync)."""
-    user = get_user_by_id(user_id)
+    user = study_stats_buffer.overlay(await db.get_user_by_id(user_id))
     if not user:
         return jsonify({"error": "User not found"}), 404
     out = {k: v for k, v in user.items() if k != "password"}
@@ -338,14 +407,24 @@ def api_get_user(user_id):
 
 
 @app.route("/api/users/<user_id>", methods=["PATCH"])
-def api_patch_user(user_id):
+async def api_patch_user(user_id):
     """Update user profile (studyStats, etc). Body: { studyStats: {...} }"""
-    data = request.get_json() or {}
+    data = await request.get_json() or {}
     if not data:
         return jsonify({"error": "No updates provided"}), 400
     try:
-        merge_user_profile(user_id, data)
-        user = get_user_by_id(user_id)
+        if set(data) == {"studyStats"} and isinstance(data["studyStats"], dict):
+            # Hot path (study timer / quizzes): buffer the update, no DB write per request
+            user = await db.get_user_by_id(user_id)
+            if not user:
+                return jsonify({"error": "User not found"}), 404
+            study_stats_buffer.add(user_id, data["studyStats"])
+            user = study_stats_buffer.overlay(user)
+        else:
+            # Keep write order: anything still buffered for this user lands first
+            await db.run_db(study_stats_buffer.flush, user_id)
+            await db.merge_user_profile(user_id, data)
+            user = await db.get_user_by_id(user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
         out = {k: v for k, v in user.items() if k != "password"}
@@ -353,6 +432,52 @@ def api_patch_user(user_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+next_topic_model = NextTopicModel()
+
+
+def _top_k(value):
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+@app.route("/api/users/<user_id>/next-topic", methods=["GET"])
+async def api_user_next_topic(user_id):
+    """ML next-topic recommendation for one user. Query: ?topK=3 for the top fields."""
+    user = study_stats_buffer.overlay(await db.get_user_by_id(user_id))
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    try:
+        # Scoring is CPU work: keep it on the NLP/model executor, off the event loop
+        [rec] = await run_nlp(next_topic_model.recommend, [user], _top_k(request.args.get("topK")))
+    except ModelUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify({"recommendation": rec})
+
+
+@app.route("/api/admin/next-topic", methods=["POST"])
+async def api_admin_next_topic():
+    """Batch recommendations for a cohort. Body: { "userIds"?: [...], "topK"? } (all users if no ids). Admin only."""
+    ok, err = require_admin()
+    if not ok:
+        return err
+    data = await request.get_json() or {}
+    user_ids = data.get("userIds")
+    if user_ids is None:
+        users = [u for u in await db.get_all_users() if u.get("role") != "admin"]
+    else:
+        if not isinstance(user_ids, list):
+            return jsonify({"error": "userIds must be a list"}), 400
+        users = await db.get_users_by_ids([i for i in user_ids if isinstance(i, str)])
+    users = [study_stats_buffer.overlay(u) for u in users]
+    try:
+        recs = await run_nlp(next_topic_model.recommend, users, _top_k(data.get("topK")))
+    except ModelUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify({"recommendations": recs})
+
 #
 
 if __name__ == "__main__":
@@ -0,0 +1,70 @@
+"""
+Async facade over database.py for the async route handlers in app.py.
+
+sqlite3 is blocking, so every call runs on one bounded thread pool (DB_MAX_WORKERS
+threads). The event loop never blocks on SQLite, and the pool size caps how many
+connections hit the DB file at once. User-cache hits are answered inline without
+a thread hop.
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+
+DB_MAX_WORKERS = int(os.environ.get('DB_MAX_WORKERS', '8'))
+
+_executor = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix='db')
+
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking DB callable on the DB executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+def shutdown():
+    _executor.shutdown(wait=True)
+
+
+async def get_user_by_id(user_id):
+    user = database.cached_user_by_id(user_id)
+    if user is not None:
+        return user
+    return await run_db(database.get_user_by_id, user_id)
+
+
+async def get_users_by_ids(user_ids):
+    return await run_db(database.get_users_by_ids, user_ids)
+
+
+async def get_user_by_email(email):
+    user = database.cached_user_by_email(email)
+    if user is not None:
+        return user
+    return await run_db(database.get_user_by_email, email)
+
+
+async def get_all_users():
+    return await run_db(database.get_all_users)
+
+
+async def create_user(user_data):
+    return await run_db(database.create_user, user_data)
+
+
+async def update_user(user_id, **fields):
+    return await run_db(database.update_user, user_id, **fields)
+
+
+async def merge_user_profile(user_id, updates):
+    return await run_db(database.merge_user_profile, user_id, updates)
+
+
+async def get_login_credentials(email):
+    return await run_db(database.get_login_credentials, email)
+
+
+async def record_login(user_id, expected_password, login_time, include_profile=True, new_password=None):
+    return await run_db(database.record_login, user_id, expected_password, login_time, include_profile, new_password)
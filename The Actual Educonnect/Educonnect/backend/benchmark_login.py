@@ -0,0 +1,97 @@
+"""
+Compare the login DB path before and after the dedicated login queries.
+
+legacy:        get_user_by_email() + update_user()  (SELECT *, full profile decode, then UPDATE)
+login:         get_login_credentials() (id + password only) + record_login() (UPDATE ... RETURNING)
+login (lean):  same, without the profile (includeProfile: false)
+
+Password hashing is left out (rows hold plaintext, compared in constant time) so only
+the DB round-trips are measured; see benchmark_password_hashing.py for the hash cost.
+The user cache is cleared before every login so each run measures the cold DB path.
+
+    python benchmark_login.py --users 5000 --logins 2000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import database
+import passwords
+from benchmark_profile_storage import synthetic_profile
+
+_counts = {'connections': 0, 'statements': 0}
+
+
+def counting_connection(original):
+    def get_connection():
+        conn = original()
+        _counts['connections'] += 1
+        conn.set_trace_callback(lambda _sql: _counts.__setitem__('statements', _counts['statements'] + 1))
+        return conn
+    return get_connection
+
+
+def legacy_login(email, password, login_time):
+    user = database.get_user_by_email(email)
+    if not user or user.get('password') != password:
+        return None
+    database.update_user(user['id'], last_login_time=login_time)
+    user['lastLoginTime'] = login_time
+    return user
+
+
+def login(email, password, login_time, include_profile=True):
+    credentials = database.get_login_credentials(email)
+    if not credentials or not passwords.verify_password(credentials[1], password):
+        return None
+    return database.record_login(credentials[0], credentials[1], login_time, include_profile)
+
+
+def run(label, fn, emails, password):
+    _counts.update(connections=0, statements=0)
+    t0 = time.perf_counter()
+    for email in emails:
+        database.clear_user_cache()
+        assert fn(email, password) is not None
+    elapsed = time.perf_counter() - t0
+    n = len(emails)
+    return label, elapsed / n * 1e6, _counts['connections'] / n, _counts['statements'] / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the login DB path")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--logins", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as workdir:
+        database.DB_PATH = os.path.join(workdir, 'login_bench.db')
+        database.init_db()
+        for i in range(args.users):
+            database.create_user({
+                'id': str(i), 'email': f'student{i}@example.com', 'password': 'pw',
+                'firstName': 'Test', 'lastName': f'User{i}', 'createdAt': '2026-01-01T00:00:00Z',
+                **synthetic_profile(rng),
+            })
+        database.get_connection = counting_connection(database.get_connection)
+        emails = [f'student{rng.randrange(args.users)}@example.com' for _ in range(args.logins)]
+        now = '2026-03-01T08:00:00Z'
+
+        results = [
+            run('legacy', lambda e, p: legacy_login(e, p, now), emails, 'pw'),
+            run('login', lambda e, p: login(e, p, now), emails, 'pw'),
+            run('login (lean)', lambda e, p: login(e, p, now, include_profile=False), emails, 'pw'),
+        ]
+
+    print(f"\n{args.logins} logins over {args.users} users (SQLite {sqlite3.sqlite_version})")
+    print(f"{'path':<20}{'us/login':>10}{'connections':>13}{'statements':>12}")
+    for label, us, conns, stmts in results:
+        print(f"{label:<20}{us:>10.1f}{conns:>13.1f}{stmts:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
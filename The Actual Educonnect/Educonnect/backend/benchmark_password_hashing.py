@@ -0,0 +1,56 @@
+"""
+Load test for password verification on the bounded hashing pool.
+
+Runs --logins concurrent verify_password_async() calls (what N simultaneous logins
+cost once passwords are hashed) at the configured scrypt cost, for several pool
+sizes, and reports latency, logins/s and logins/s per core.
+
+    python benchmark_password_hashing.py --logins 200
+    PASSWORD_SCRYPT_N=32768 python benchmark_password_hashing.py
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import passwords
+
+
+async def verify_many(executor, stored, n):
+    loop = asyncio.get_running_loop()
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*[
+        loop.run_in_executor(executor, passwords.verify_password, stored, 'correct horse battery staple')
+        for _ in range(n)
+    ])
+    assert all(results)
+    return time.perf_counter() - t0
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark password verification throughput")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="*", default=sorted({1, max(1, cores // 2), cores}))
+    args = parser.parse_args()
+
+    stored = passwords.hash_password('correct horse battery staple')
+    t0 = time.perf_counter()
+    for _ in range(10):
+        passwords.verify_password(stored, 'correct horse battery staple')
+    single_ms = (time.perf_counter() - t0) / 10 * 1000
+
+    print(f"scrypt n={passwords.SCRYPT_N} r={passwords.SCRYPT_R} p={passwords.SCRYPT_P} "
+          f"(~{128 * passwords.SCRYPT_N * passwords.SCRYPT_R // 1024 // 1024} MiB per hash), {cores} cores")
+    print(f"single verify: {single_ms:.1f} ms\n")
+    print(f"{'workers':>8}{'total s':>10}{'logins/s':>11}{'per core':>10}")
+    for workers in args.workers:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            elapsed = asyncio.run(verify_many(executor, stored, args.logins))
+        rate = args.logins / elapsed
+        print(f"{workers:>8}{elapsed:>10.2f}{rate:>11.1f}{rate / min(workers, cores):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
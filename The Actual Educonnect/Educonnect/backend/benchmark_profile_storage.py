@@ -0,0 +1,115 @@
+"""
+Compare profile_json storage formats: row size, DB file size and decode time.
+
+Builds one throwaway SQLite DB per format with the same synthetic profiles, then
+times a full-table decode (what get_all_users() does for the admin listing).
+Formats whose optional dependency is missing are skipped.
+
+    python benchmark_profile_storage.py --users 20000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import profile_codec
+
+FIELD_IDS = ["ai", "ml", "ds", "nlp", "cv", "cyber", "web", "law", "business"]
+SKILLS = ["Python", "Java", "JavaScript", "C++", "R", "SQL", "Git", "Docker", "Machine Learning", "TensorFlow"]
+INTERESTS = ["AI", "Machine Learning", "Data Science", "NLP", "Computer Vision", "Cybersecurity"]
+
+
+def synthetic_profile(rng):
+    field_progress = {}
+    for fid in rng.sample(FIELD_IDS, rng.randint(0, 5)):
+        score = rng.randint(20, 100)
+        field_progress[fid] = {
+            "quizScores": {f"{fid}-quiz-{i}": rng.randint(0, 100) for i in range(rng.randint(1, 4))},
+            "finalScore": score,
+            "proficiency": "Expert" if score >= 90 else "Advanced" if score >= 70 else "Intermediate",
+        }
+    return {
+        "university": "Makerere University",
+        "degreeProgram": "Bachelor Of Information Technology",
+        "technicalSkills": ", ".join(rng.sample(SKILLS, 4)),
+        "csInterests": ", ".join(rng.sample(INTERESTS, 3)),
+        "preferredLearningStyle": rng.choice(["Visual", "Auditory", "Reading/Writing", "Kinesthetic"]),
+        "preferredStudyHours": rng.choice(["Morning", "Afternoon", "Evening", "Late night"]),
+        "studyStats": {
+            "totalHours": round(rng.uniform(0, 200), 2),
+            "weeklyHours": [round(rng.uniform(0, 6), 2) for _ in range(7)],
+            "sessionsCompleted": rng.randint(0, 150),
+            "studyProgress": rng.randint(0, 100),
+            "quizCompletions": {
+                f"resource-{i}": {"score": rng.randint(0, 100), "passed": rng.random() > 0.4,
+                                  "completedAt": "2026-03-01T10:00:00.000Z"}
+                for i in range(rng.randint(0, 6))
+            },
+            "quizzesPassed": rng.randint(0, 6),
+            "fieldProgress": field_progress,
+        },
+    }
+
+
+def available_formats():
+    out = []
+    for fmt in profile_codec.FORMATS:
+        try:
+            out.append(profile_codec.check_format(fmt))
+        except RuntimeError as e:
+            print(f"Skipping {fmt}: {e}")
+    return out
+
+
+def run_format(fmt, profiles, workdir, use_dictionary):
+    label = fmt + ("+dict" if fmt == profile_codec.FORMAT_MSGPACK_ZSTD and use_dictionary else "")
+    path = os.path.join(workdir, f"profiles_{label}.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id TEXT PRIMARY KEY, profile_json TEXT)")
+    if fmt == profile_codec.FORMAT_MSGPACK_ZSTD and use_dictionary:
+        profile_codec.register_dictionary(1, profile_codec.train_dictionary(profiles[:1000]), active=True)
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?)",
+        ((str(i), profile_codec.encode_profile(p, fmt)) for i, p in enumerate(profiles)),
+    )
+    conn.commit()
+    conn.execute("VACUUM")
+    avg_row = conn.execute("SELECT AVG(LENGTH(CAST(profile_json AS BLOB))) FROM users").fetchone()[0]
+
+    rows = conn.execute("SELECT profile_json FROM users").fetchall()
+    t0 = time.perf_counter()
+    for (value,) in rows:
+        profile_codec.decode_profile(value)
+    decode_s = time.perf_counter() - t0
+    conn.close()
+    return label, avg_row, os.path.getsize(path), decode_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark profile_json storage formats")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    profiles = [synthetic_profile(rng) for _ in range(args.users)]
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for fmt in available_formats():
+            results.append(run_format(fmt, profiles, workdir, use_dictionary=False))
+            if fmt == profile_codec.FORMAT_MSGPACK_ZSTD:
+                results.append(run_format(fmt, profiles, workdir, use_dictionary=True))
+
+    base_row, _, base_decode = results[0][1:]
+    print(f"\n{args.users} profiles")
+    print(f"{'format':<18}{'avg row B':>11}{'DB file KiB':>13}{'decode us/row':>15}{'row vs json':>13}{'decode vs json':>16}")
+    for label, avg_row, file_size, decode_s in results:
+        print(f"{label:<18}{avg_row:>11.0f}{file_size / 1024:>13.0f}{decode_s / args.users * 1e6:>15.2f}"
+              f"{avg_row / base_row:>12.2f}x{decode_s / base_decode:>15.2f}x")
+
+
+if __name__ == "__main__":
+    main()
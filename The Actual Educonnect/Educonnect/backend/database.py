@@ -3,12 +3,18 @@ SQLite database for EduConnect users.
 Run backend from project root: python -m backend.app  OR  cd backend && python app.py
 """
 import sqlite3
-import json
 import os
 from contextlib import contextmanager
 
+import profile_codec
+from profile_codec import encode_profile
+from user_cache import UserCache
+
 DB_PATH = os.path.join(os.path.dirname(__file__), 'educonnect.db')
 
+# Decoded users for get_user_by_id / get_user_by_email; every write below invalidates.
+_user_cache = UserCache()
+
 
 def get_connection():
     conn = sqlite3.connect(DB_PATH)
@@ -33,13 +39,62 @@ def init_db():
                 profile_json TEXT
             )
         """)
+        # Matches the LOWER(TRIM(email)) lookups in get_user_by_email / login_user
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_users_email_normalized ON users(LOWER(TRIM(email)))")
+        # Shared zstd dictionaries for the msgpack-zstd profile format (see profile_codec.py)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS profile_dictionaries (
+                id INTEGER PRIMARY KEY,
+                data BLOB NOT NULL,
+                created_at TEXT NOT NULL DEFAULT (datetime('now'))
+            )
+        """)
         conn.commit()
+        load_profile_dictionaries(conn)
+
+
+def load_profile_dictionaries(conn=None):
+    """Register stored zstd dictionaries with the codec; the newest one is used for encoding."""
+    if conn is None:
+        with get_connection() as conn:
+            return load_profile_dictionaries(conn)
+    rows = conn.execute("SELECT id, data FROM profile_dictionaries ORDER BY id").fetchall()
+    for i, (dict_id, data) in enumerate(rows):
+        profile_codec.register_dictionary(dict_id, data, active=(i == len(rows) - 1))
+
+
+def decode_profile(value):
+    """Decode profile_json in any storage format; reloads dictionaries once if another process added one."""
+    try:
+        return profile_codec.decode_profile(value)
+    except profile_codec.UnknownDictionary:
+        load_profile_dictionaries()
+        return profile_codec.decode_profile(value)
+
+
+IDENTITY_COLUMNS = ('id', 'email', 'password', 'first_name', 'last_name', 'role',
+                    'created_at', 'last_login_time', 'last_week_reset')
+
+
+def identity_to_dict(d):
+    """Account fields of a user (no profile), in frontend format."""
+    return {
+        'id': d['id'],
+        'email': d['email'],
+        'password': d['password'],
+        'firstName': d['first_name'],
+        'lastName': d['last_name'],
+        'role': d['role'],
+        'createdAt': d['created_at'],
+        'lastLoginTime': d['last_login_time'],
+        'lastWeekReset': d['last_week_reset'],
+    }
 
 
 def user_to_dict(row):
     """Convert DB row to user dict matching frontend format."""
     d = dict(row)
-    profile = json.loads(d['profile_json'] or '{}')
+    profile = decode_profile(d['profile_json'])
     study_stats = profile.get('studyStats', {
         'totalHours': 0,
         'weeklyHours': [0, 0, 0, 0, 0, 0, 0],
@@ -50,15 +105,7 @@ def user_to_dict(row):
         'fieldProgress': {}
     })
     return {
-        'id': d['id'],
-        'email': d['email'],
-        'password': d['password'],
-        'firstName': d['first_name'],
-        'lastName': d['last_name'],
-        'role': d['role'],
-        'createdAt': d['created_at'],
-        'lastLoginTime': d['last_login_time'],
-        'lastWeekReset': d['last_week_reset'],
+        **identity_to_dict(d),
         'studyStats': study_stats,
         **{k: v for k, v in profile.items() if k != 'studyStats'}
     }
@@ -68,21 +115,116 @@ def get_user_by_email(email):
     """Get user by email (case-insensitive)."""
     if not email:
         return None
+    cached = _user_cache.get_by_email(email)
+    if cached is not None:
+        return cached
+    generation = _user_cache.generation()
     with get_connection() as conn:
         cur = conn.execute(
             "SELECT * FROM users WHERE LOWER(TRIM(email)) = LOWER(TRIM(?))",
             (email.strip(),)
         )
         row = cur.fetchone()
-        return user_to_dict(row) if row else None
+    if not row:
+        return None
+    user = user_to_dict(row)
+    _user_cache.put(user, generation)
+    return dict(user)
 
 
 def get_user_by_id(user_id):
     """Get user by id."""
+    cached = _user_cache.get_by_id(user_id)
+    if cached is not None:
+        return cached
+    generation = _user_cache.generation()
     with get_connection() as conn:
         cur = conn.execute("SELECT * FROM users WHERE id = ?", (user_id,))
         row = cur.fetchone()
-        return user_to_dict(row) if row else None
+    if not row:
+        return None
+    user = user_to_dict(row)
+    _user_cache.put(user, generation)
+    return dict(user)
+
+
+def get_users_by_ids(user_ids, chunk_size=500):
+    """Users for many ids, in input order (unknown ids skipped); cache misses share one query per chunk."""
+    found = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        cached = _user_cache.get_by_id(user_id)
+        if cached is not None:
+            found[user_id] = cached
+        else:
+            missing.append(user_id)
+    if missing:
+        generation = _user_cache.generation()
+        with get_connection() as conn:
+            # chunk_size stays well below SQLite's bound-variable limit
+            for start in range(0, len(missing), chunk_size):
+                chunk = missing[start:start + chunk_size]
+                placeholders = ', '.join('?' * len(chunk))
+                for row in conn.execute(f"SELECT * FROM users WHERE id IN ({placeholders})", chunk):
+                    user = user_to_dict(row)
+                    _user_cache.put(user, generation)
+                    found[user['id']] = user
+    return [dict(found[user_id]) for user_id in user_ids if user_id in found]
+
+
+def get_login_credentials(email):
+    """(id, stored password) for an email, reading only those two columns; None if no account."""
+    if not email:
+        return None
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT id, password FROM users WHERE LOWER(TRIM(email)) = LOWER(TRIM(?))",
+            (email.strip(),)
+        ).fetchone()
+    return (row['id'], row['password']) if row else None
+
+
+def record_login(user_id, expected_password, login_time, include_profile=True, new_password=None):
+    """
+    Stamp last_login_time (and optionally store an upgraded password hash) in one
+    UPDATE ... RETURNING, guarded on the credential the caller verified.
+    The profile is decoded only if include_profile. Returns the user, or None if the
+    stored credential changed since it was read.
+    """
+    returning = '*' if include_profile else ', '.join(IDENTITY_COLUMNS)
+    sets, params = ["last_login_time = ?"], [login_time]
+    if new_password is not None:
+        sets.append("password = ?")
+        params.append(new_password)
+    # Taken before the UPDATE: if any profile write lands between our commit and the put,
+    # the put is refused and the (possibly stale) RETURNING row is not cached
+    generation = _user_cache.generation()
+    with get_connection() as conn:
+        row = conn.execute(
+            f"UPDATE users SET {', '.join(sets)} WHERE id = ? AND password = ? RETURNING {returning}",
+            (*params, user_id, expected_password)
+        ).fetchone()
+        conn.commit()
+    if row and include_profile:
+        user = user_to_dict(row)
+        # put() replaces the old entry; if it is refused, drop that entry instead
+        if not _user_cache.put(user, generation):
+            _user_cache.invalidate(user_id=user_id)
+        return dict(user)
+    _user_cache.invalidate(user_id=user_id)
+    if not row:
+        return None
+    return identity_to_dict(row)
+
+
+def cached_user_by_id(user_id):
+    """Cache-only lookup (no SQLite); None on miss. Lets async callers skip the DB executor."""
+    return _user_cache.get_by_id(user_id, count_miss=False)
+
+
+def cached_user_by_email(email):
+    """Cache-only lookup by email (no SQLite); None on miss."""
+    return _user_cache.get_by_email(email, count_miss=False) if email else None
 
 
 def create_user(user_data):
@@ -110,10 +252,11 @@ def create_user(user_data):
                 user_data.get('lastName', ''),
                 user_data.get('role', 'user'),
                 user_data['createdAt'],
-                json.dumps(profile)
+                encode_profile(profile)
             )
         )
         conn.commit()
+    _user_cache.invalidate(user_id=user_data['id'], email=user_data.get('email', ''))
 
 
 def update_user(user_id, last_login_time=None, last_week_reset=None, profile_json=None):
@@ -129,7 +272,7 @@ def update_user(user_id, last_login_time=None, last_week_reset=None, profile_jso
             params.append(last_week_reset)
         if profile_json is not None:
             updates.append("profile_json = ?")
-            params.append(json.dumps(profile_json) if isinstance(profile_json, dict) else profile_json)
+            params.append(encode_profile(profile_json) if isinstance(profile_json, dict) else profile_json)
         if not updates:
             return
         params.append(user_id)
@@ -138,6 +281,25 @@ def update_user(user_id, last_login_time=None, last_week_reset=None, profile_jso
             params
         )
         conn.commit()
+    _user_cache.invalidate(user_id=user_id)
+
+
+def _merge_profile(profile, updates):
+    """Apply updates to a decoded profile in place (studyStats and fieldProgress are merged, not replaced)."""
+    for k, v in updates.items():
+        if k == 'studyStats' and isinstance(v, dict):
+            existing = profile.get('studyStats', {})
+            for sk, sv in v.items():
+                if sk == 'fieldProgress' and isinstance(sv, dict):
+                    fp = existing.get('fieldProgress', {})
+                    fp.update(sv)
+                    existing['fieldProgress'] = fp
+                else:
+                    existing[sk] = sv
+            profile['studyStats'] = existing
+        else:
+            profile[k] = v
+    return profile
 
 
 def merge_user_profile(user_id, updates):
@@ -146,25 +308,39 @@ def merge_user_profile(user_id, updates):
         row = conn.execute("SELECT profile_json FROM users WHERE id = ?", (user_id,)).fetchone()
         if not row:
             return
-        profile = json.loads(row[0] or '{}')
-        for k, v in updates.items():
-            if k == 'studyStats' and isinstance(v, dict):
-                existing = profile.get('studyStats', {})
-                for sk, sv in v.items():
-                    if sk == 'fieldProgress' and isinstance(sv, dict):
-                        fp = existing.get('fieldProgress', {})
-                        fp.update(sv)
-                        existing['fieldProgress'] = fp
-                    else:
-                        existing[sk] = sv
-                profile['studyStats'] = existing
-            else:
-                profile[k] = v
+        profile = _merge_profile(decode_profile(row[0]), updates)
         conn.execute(
             "UPDATE users SET profile_json = ? WHERE id = ?",
-            (json.dumps(profile), user_id)
+            (encode_profile(profile), user_id)
         )
         conn.commit()
+    _user_cache.invalidate(user_id=user_id)
+
+
+def merge_user_profiles(updates_by_user, chunk_size=500):
+    """Merge {user_id: updates} into many profiles in one transaction. Returns number of rows written."""
+    if not updates_by_user:
+        return 0
+    user_ids = list(updates_by_user)
+    written = 0
+    with get_connection() as conn:
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = conn.execute(
+                f"SELECT id, profile_json FROM users WHERE id IN ({placeholders})",
+                chunk
+            ).fetchall()
+            params = [
+                (encode_profile(_merge_profile(decode_profile(r['profile_json']), updates_by_user[r['id']])), r['id'])
+                for r in rows
+            ]
+            conn.executemany("UPDATE users SET profile_json = ? WHERE id = ?", params)
+            written += len(params)
+        conn.commit()
+    for user_id in user_ids:
+        _user_cache.invalidate(user_id=user_id)
+    return written
 
 
 def get_all_users():
@@ -174,3 +350,49 @@ def get_all_users():
             "SELECT * FROM users ORDER BY created_at DESC"
         )
         return [user_to_dict(r) for r in cur.fetchall()]
+
+
+def migrate_profiles(fmt, batch_size=1000, train_dictionary=False, sample_size=1000):
+    """Rewrite every stored profile in fmt ('json', 'msgpack', 'msgpack-zstd'). Returns rows rewritten.
+
+    With train_dictionary (msgpack-zstd only), a shared zstd dictionary is first trained
+    on up to sample_size profiles, stored in profile_dictionaries and used for the rewrite.
+    Rows stay readable throughout: decode_profile() handles old and new formats side by side.
+    """
+    profile_codec.check_format(fmt)
+    with get_connection() as conn:
+        if train_dictionary and fmt == profile_codec.FORMAT_MSGPACK_ZSTD:
+            samples = [decode_profile(r[0]) for r in conn.execute(
+                "SELECT profile_json FROM users WHERE profile_json IS NOT NULL LIMIT ?", (sample_size,))]
+            if samples:
+                conn.execute("INSERT INTO profile_dictionaries (data) VALUES (?)", (profile_codec.train_dictionary(samples),))
+                conn.commit()
+                load_profile_dictionaries(conn)
+        rewritten = 0
+        last_rowid = 0
+        while True:
+            rows = conn.execute(
+                "SELECT rowid, profile_json FROM users WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            conn.executemany(
+                "UPDATE users SET profile_json = ? WHERE rowid = ?",
+                [(encode_profile(decode_profile(r[1]), fmt), r[0]) for r in rows]
+            )
+            conn.commit()
+            rewritten += len(rows)
+            last_rowid = rows[-1][0]
+    _user_cache.clear()
+    return rewritten
+
+
+def clear_user_cache():
+    """Drop every cached user; for writes made outside this module (e.g. the weekly rollover)."""
+    _user_cache.clear()
+
+
+def user_cache_stats():
+    """Size and hit ratio of the in-process user cache."""
+    return _user_cache.stats()
@@ -0,0 +1,59 @@
+"""
+Maintenance commands for the EduConnect backend database.
+Run from the backend folder:
+
+    python maintenance.py migrate-profiles msgpack-zstd --train-dictionary
+    python maintenance.py migrate-profiles json
+    python maintenance.py weekly-reset
+"""
+import argparse
+
+import profile_codec
+from database import init_db, migrate_profiles
+from weekly_rollover import run_weekly_rollover
+
+
+def cmd_migrate_profiles(args):
+    init_db()
+    n = migrate_profiles(args.format, batch_size=args.batch_size, train_dictionary=args.train_dictionary)
+    print(f"Rewrote {n} profiles as {args.format}")
+    if args.format != profile_codec.PROFILE_STORAGE_FORMAT:
+        print(f"Note: the server writes {profile_codec.PROFILE_STORAGE_FORMAT!r}; "
+              f"set PROFILE_STORAGE_FORMAT={args.format} so updated rows keep the new format.")
+
+
+def cmd_weekly_reset(args):
+    init_db()
+    report = run_weekly_rollover(chunk_size=args.chunk_size, force=args.force)
+    if report['skipped']:
+        print(f"Weekly reset for {report['week']} already done (use --force to re-run)")
+        return
+    print(f"Weekly reset {report['week']}: reset {report['rows']} users, archived {report['archived']} weeks "
+          f"in {report['seconds']:.2f}s ({report['rows_per_second']:.0f} rows/s)")
+    if report['invalid']:
+        print(f"Skipped {report['invalid']} users whose profile_json is not valid JSON; "
+              f"they keep last week's hours until the profile is repaired")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EduConnect backend maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("migrate-profiles", help="Rewrite users.profile_json in another storage format")
+    p.add_argument("format", choices=profile_codec.FORMATS)
+    p.add_argument("--batch-size", type=int, default=1000)
+    p.add_argument("--train-dictionary", action="store_true",
+                   help="Train and store a shared zstd dictionary first (msgpack-zstd only)")
+    p.set_defaults(func=cmd_migrate_profiles)
+
+    p = sub.add_parser("weekly-reset", help="Archive last week's weeklyHours and zero them for the new ISO week")
+    p.add_argument("--chunk-size", type=int, default=5000, help="Users (by rowid) per transaction")
+    p.add_argument("--force", action="store_true", help="Run even if this ISO week is already recorded as done")
+    p.set_defaults(func=cmd_weekly_reset)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
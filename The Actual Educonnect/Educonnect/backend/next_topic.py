@@ -0,0 +1,211 @@
+"""
+Next-topic recommendations in Python, from the artifact scripts/train_next_topic_model.py writes:
+server/model_export.bin (binary, float32, checksummed; needs only NumPy) or the
+server/next_topic_model.joblib bundle (needs joblib + scikit-learn).
+
+The artifact is loaded once and reloaded only when the file changes. Users are featurized
+exactly like build_feature_vector() in the trainer (and buildFeatureVector in
+server/mlInference.js), then a whole batch is scored with one matrix product and softmax.
+Predictions are cached in a bounded LRU keyed by a hash of the user's feature vector, so
+only users whose relevant profile fields changed are re-scored.
+
+- NEXT_TOPIC_MODEL_PATH – .bin or .joblib artifact (default ../server/model_export.bin)
+- NEXT_TOPIC_CACHE_SIZE – cached predictions (default 10000, 0 disables)
+"""
+import hashlib
+import json
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+NEXT_TOPIC_MODEL_PATH = os.environ.get(
+    'NEXT_TOPIC_MODEL_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server', 'model_export.bin'),
+)
+NEXT_TOPIC_CACHE_SIZE = int(os.environ.get('NEXT_TOPIC_CACHE_SIZE', '10000'))
+
+FIELD_IDS = ["ai", "ml", "ds", "nlp", "cv", "cyber", "web", "law", "business"]
+COURSE_AREAS = ["Computing & IT", "Law", "Business & Management", "Other"]
+N_FEATURES = len(COURSE_AREAS) + 4 + len(FIELD_IDS)
+
+# model_export.bin layout; must match write_binary_export() in scripts/train_next_topic_model.py
+BINARY_MAGIC = b"ECNT"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sHHIIII")
+
+
+class ModelUnavailable(RuntimeError):
+    """No trained artifact (or joblib / scikit-learn missing)."""
+
+
+def _count_items(value):
+    if not value or not isinstance(value, str):
+        return 0
+    return sum(1 for x in value.split(',') if x.strip())
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_binary_export(path):
+    """(classes, mean, scale, coef, intercept) from model_export.bin; ValueError if corrupt."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, _, n_features, n_classes, meta_len, crc = BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError(f"{path}: not a version {BINARY_VERSION} next-topic model")
+    body = memoryview(data)[BINARY_HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise ValueError(f"{path}: checksum mismatch")
+    meta = json.loads(bytes(body[:meta_len]))
+    floats = np.frombuffer(body[meta_len:], dtype='<f4').astype(np.float64)
+    sizes = [n_features, n_features, n_classes * n_features, n_classes]
+    if floats.size != sum(sizes):
+        raise ValueError(f"{path}: truncated arrays")
+    mean, scale, coef, intercept = np.split(floats, np.cumsum(sizes)[:-1])
+    return meta['classes'], mean, scale, coef.reshape(n_classes, n_features), intercept
+
+
+def _read_joblib(path):
+    try:
+        import joblib
+        bundle = joblib.load(path)
+    except ImportError as e:
+        raise ModelUnavailable(f"Loading {path} needs joblib and scikit-learn ({e})")
+    model, scaler = bundle['model'], bundle['scaler']
+    W, b = np.asarray(model.coef_, dtype=np.float64), np.asarray(model.intercept_, dtype=np.float64)
+    if W.shape[0] == 1:
+        # Binary model: softmax over (-z/2, z/2) equals sigmoid(z)
+        W, b = np.vstack([-W / 2, W / 2]), np.concatenate([-b / 2, b / 2])
+    return [FIELD_IDS[c] for c in model.classes_], scaler.mean_, scaler.scale_, W, b
+
+
+def feature_matrix(users):
+    """(n, 17) feature matrix for frontend-format user dicts (same features as the trainer)."""
+    n = len(users)
+    areas = np.full(n, COURSE_AREAS.index('Other'), dtype=np.int64)
+    counts = np.zeros((n, 3))
+    hours = np.zeros(n)
+    scores = np.zeros((n, len(FIELD_IDS)))
+    area_index = {a: i for i, a in enumerate(COURSE_AREAS)}
+    for i, user in enumerate(users):
+        areas[i] = area_index.get(str(user.get('courseArea') or '').strip() or 'Other', areas[i])
+        counts[i] = (_count_items(user.get('orderedInterests')),
+                     _count_items(user.get('weakTopics')),
+                     _count_items(user.get('strongTopics')))
+        stats = user.get('studyStats') if isinstance(user.get('studyStats'), dict) else {}
+        hours[i] = _to_float(stats.get('totalHours') or 0) or 0.0
+        progress = stats.get('fieldProgress') if isinstance(stats.get('fieldProgress'), dict) else {}
+        for j, fid in enumerate(FIELD_IDS):
+            p = progress.get(fid)
+            score = _to_float(p.get('finalScore')) if isinstance(p, dict) else None
+            scores[i, j] = score if score is not None else 0.0
+
+    X = np.zeros((n, N_FEATURES))
+    X[np.arange(n), areas] = 1.0
+    offset = len(COURSE_AREAS)
+    X[:, offset:offset + 3] = np.minimum(counts, [20, 10, 10]) / np.array([20.0, 10.0, 10.0])
+    X[:, offset + 3] = np.minimum(hours, 200) / 100.0
+    X[:, offset + 4:] = np.clip(scores, 0, 100) / 100.0
+    return X
+
+
+class NextTopicModel:
+    def __init__(self, path=NEXT_TOPIC_MODEL_PATH, cache_size=NEXT_TOPIC_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._params = None
+        self._mtime = None
+        self._cache = OrderedDict()  # feature hash -> (probabilities, ...)
+        self._hits = 0
+        self._misses = 0
+
+    def _load(self):
+        """Linear parameters of the current artifact, (re)loaded when the file changes."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            raise ModelUnavailable(f"No model at {self.path}; run scripts/train_next_topic_model.py")
+        with self._lock:
+            if self._params is not None and mtime == self._mtime:
+                return self._params
+        if self.path.endswith('.bin'):
+            try:
+                classes, mean, scale, W, b = read_binary_export(self.path)
+            except (ValueError, struct.error) as e:
+                raise ModelUnavailable(str(e))
+        else:
+            classes, mean, scale, W, b = _read_joblib(self.path)
+        scale = np.where(scale > 1e-8, scale, 1.0)
+        # Fold the scaler into the weights: ((x - mean) / scale) @ W.T + b == x @ W_eff.T + b_eff
+        W_eff = W / scale
+        params = (W_eff, b - W_eff @ mean, classes)
+        with self._lock:
+            self._params, self._mtime = params, mtime
+            self._cache.clear()
+        return params
+
+    def predict_proba(self, X):
+        """(probabilities (n, k), class field ids) for a feature matrix, using the cache."""
+        W, b, classes = self._load()
+        keys = [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in X]
+        probs = np.empty((X.shape[0], len(classes)))
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                    continue
+                self._cache.move_to_end(key)
+                probs[i] = cached
+            self._hits += len(keys) - len(missing)
+            self._misses += len(missing)
+        if missing:
+            logits = X[missing] @ W.T + b
+            logits -= logits.max(axis=1, keepdims=True)
+            scored = np.exp(logits)
+            scored /= scored.sum(axis=1, keepdims=True)
+            probs[missing] = scored
+            if self.cache_size > 0:
+                with self._lock:
+                    for i, row in zip(missing, scored):
+                        self._cache[keys[i]] = row
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        return probs, classes
+
+    def recommend(self, users, top_k=1):
+        """One recommendation dict per user: fieldId, probability and, for top_k > 1, the top fields."""
+        if not users:
+            return []
+        probs, classes = self.predict_proba(feature_matrix(users))
+        top_k = max(1, min(top_k, len(classes)))
+        order = np.argsort(-probs, axis=1, kind='stable')[:, :top_k]
+        out = []
+        for user, idx, row in zip(users, order.tolist(), probs):
+            rec = {'userId': user.get('id'), 'fieldId': classes[idx[0]], 'probability': round(float(row[idx[0]]), 4)}
+            if top_k > 1:
+                rec['top'] = [{'fieldId': classes[j], 'probability': round(float(row[j]), 4)} for j in idx]
+            out.append(rec)
+        return out
+
+    def stats(self):
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'loaded': self._params is not None,
+                'cacheSize': len(self._cache),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hitRatio': round(self._hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,91 @@
+"""
+Password hashing for the auth routes.
+
+Hashes use scrypt (memory-hard, stdlib hashlib) and are stored as
+
+    scrypt$<n>$<r>$<p>$<salt b64>$<hash b64>
+
+Hashing is the CPU hot spot of signup/login, so the async helpers run it on a
+dedicated bounded thread pool (hashlib.scrypt releases the GIL), never on the event
+loop or the DB executor. Rows still holding a plaintext password, or a hash with
+older cost parameters, are reported by needs_rehash() and upgraded on login.
+
+Cost is tunable via env: PASSWORD_SCRYPT_N (power of two), PASSWORD_SCRYPT_R,
+PASSWORD_SCRYPT_P; PASSWORD_HASH_WORKERS sizes the pool (default: CPU count).
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+SCRYPT_N = int(os.environ.get('PASSWORD_SCRYPT_N', str(2 ** 14)))
+SCRYPT_R = int(os.environ.get('PASSWORD_SCRYPT_R', '8'))
+SCRYPT_P = int(os.environ.get('PASSWORD_SCRYPT_P', '1'))
+SALT_BYTES = 16
+HASH_BYTES = 32
+PREFIX = 'scrypt$'
+
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 2)))
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='pwhash')
+
+
+def _scrypt(password, salt, n, r, p):
+    # maxmem must cover 128 * n * r * p bytes plus headroom
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r * p, dklen=HASH_BYTES)
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode('ascii')
+
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(PREFIX)
+
+
+def hash_password(password, n=None, r=None, p=None):
+    n, r, p = n or SCRYPT_N, r or SCRYPT_R, p or SCRYPT_P
+    salt = os.urandom(SALT_BYTES)
+    return f"{PREFIX}{n}${r}${p}${_b64(salt)}${_b64(_scrypt(str(password), salt, n, r, p))}"
+
+
+def verify_password(stored, password):
+    """Constant-time check of password against a stored hash (or a legacy plaintext value)."""
+    if not stored or password is None:
+        return False
+    if not is_hashed(stored):
+        return hmac.compare_digest(str(stored).encode('utf-8'), str(password).encode('utf-8'))
+    try:
+        _, n, r, p, salt, expected = stored.split('$')
+        actual = _scrypt(str(password), base64.b64decode(salt), int(n), int(r), int(p))
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(actual, base64.b64decode(expected))
+
+
+def needs_rehash(stored):
+    """True for plaintext rows and hashes made with different cost parameters."""
+    if not is_hashed(stored):
+        return True
+    try:
+        _, n, r, p, _, _ = stored.split('$')
+    except ValueError:
+        return True
+    return (int(n), int(r), int(p)) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+async def hash_password_async(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, hash_password, password)
+
+
+async def verify_password_async(stored, password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, verify_password, stored, password)
+
+
+def shutdown():
+    _executor.shutdown(wait=True)
@@ -0,0 +1,126 @@
+"""
+Storage encoding for users.profile_json.
+
+Rows are either legacy JSON text or a BLOB whose first byte is a format version:
+
+    0x01  MessagePack
+    0x02  zstd-compressed MessagePack; bytes 1-4 hold the id (big-endian) of the
+          shared zstd dictionary used, 0 for none. Dictionaries live in the
+          profile_dictionaries table and are registered here by database.py.
+
+decode_profile() accepts every format, so switching PROFILE_STORAGE_FORMAT migrates
+rows transparently as they are rewritten (or all at once with migrate_profiles()).
+msgpack and zstandard are optional; without them only 'json' is available.
+"""
+import json
+import os
+import struct
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+FORMAT_JSON = 'json'
+FORMAT_MSGPACK = 'msgpack'
+FORMAT_MSGPACK_ZSTD = 'msgpack-zstd'
+FORMATS = (FORMAT_JSON, FORMAT_MSGPACK, FORMAT_MSGPACK_ZSTD)
+
+VERSION_MSGPACK = 0x01
+VERSION_MSGPACK_ZSTD = 0x02
+ZSTD_LEVEL = 9
+
+PROFILE_STORAGE_FORMAT = os.environ.get('PROFILE_STORAGE_FORMAT', FORMAT_JSON)
+
+_DICT_ID = struct.Struct('>I')
+_dictionaries = {}   # dict id -> zstandard.ZstdCompressionDict
+_compressors = {}    # dict id -> ZstdCompressor
+_decompressors = {}  # dict id -> ZstdDecompressor
+_active_dict_id = 0
+
+
+class UnknownDictionary(KeyError):
+    """A row references a zstd dictionary this process has not registered."""
+
+
+def check_format(fmt):
+    """Raise if fmt is unknown or its optional dependency is missing."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown profile format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    if fmt != FORMAT_JSON and msgpack is None:
+        raise RuntimeError(f"Profile format {fmt!r} needs msgpack: pip install msgpack")
+    if fmt == FORMAT_MSGPACK_ZSTD and zstandard is None:
+        raise RuntimeError(f"Profile format {fmt!r} needs zstandard: pip install zstandard")
+    return fmt
+
+
+def register_dictionary(dict_id, data, active=False):
+    """Make a stored zstd dictionary available for decoding (and for encoding if active)."""
+    global _active_dict_id
+    if zstandard is None:
+        return
+    d = zstandard.ZstdCompressionDict(bytes(data))
+    _dictionaries[dict_id] = d
+    _compressors.pop(dict_id, None)
+    _decompressors.pop(dict_id, None)
+    if active:
+        _active_dict_id = dict_id
+
+
+def train_dictionary(profiles, size=16 * 1024):
+    """Train a zstd dictionary from sample profiles (dicts). Returns raw dictionary bytes."""
+    check_format(FORMAT_MSGPACK_ZSTD)
+    samples = [msgpack.packb(p, use_bin_type=True) for p in profiles]
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+
+def _compressor(dict_id):
+    c = _compressors.get(dict_id)
+    if c is None:
+        kwargs = {'dict_data': _dictionaries[dict_id]} if dict_id else {}
+        c = _compressors[dict_id] = zstandard.ZstdCompressor(level=ZSTD_LEVEL, **kwargs)
+    return c
+
+
+def _decompressor(dict_id):
+    d = _decompressors.get(dict_id)
+    if d is None:
+        if dict_id and dict_id not in _dictionaries:
+            raise UnknownDictionary(dict_id)
+        kwargs = {'dict_data': _dictionaries[dict_id]} if dict_id else {}
+        d = _decompressors[dict_id] = zstandard.ZstdDecompressor(**kwargs)
+    return d
+
+
+def encode_profile(profile, fmt=None):
+    """Encode a profile dict for storage in the given (or configured) format."""
+    fmt = fmt or PROFILE_STORAGE_FORMAT
+    if fmt == FORMAT_JSON:
+        return json.dumps(profile)
+    check_format(fmt)
+    packed = msgpack.packb(profile, use_bin_type=True)
+    if fmt == FORMAT_MSGPACK:
+        return bytes([VERSION_MSGPACK]) + packed
+    return bytes([VERSION_MSGPACK_ZSTD]) + _DICT_ID.pack(_active_dict_id) + _compressor(_active_dict_id).compress(packed)
+
+
+def decode_profile(value):
+    """Decode a stored profile (any format) to a dict. None/empty -> {}."""
+    if not value:
+        return {}
+    if isinstance(value, str):
+        return json.loads(value)
+    value = bytes(value)
+    version = value[0]
+    if version == VERSION_MSGPACK:
+        return msgpack.unpackb(value[1:], raw=False)
+    if version == VERSION_MSGPACK_ZSTD:
+        (dict_id,) = _DICT_ID.unpack_from(value, 1)
+        return msgpack.unpackb(_decompressor(dict_id).decompress(value[5:]), raw=False)
+    # JSON text stored with BLOB affinity
+    return json.loads(value.decode('utf-8'))
@@ -0,0 +1,166 @@
+"""
+Write-behind buffer for high-frequency studyStats updates.
+
+The study timer and quiz flows PATCH /api/users/<id> with { studyStats: {...} } many
+times per session. Instead of a read-modify-write + commit per request, updates are
+coalesced per user in memory and flushed to SQLite in one batched transaction.
+
+- Flush happens every FLUSH_INTERVAL seconds, or early once MAX_PENDING users are dirty.
+- Durability bound: a hard crash loses at most FLUSH_INTERVAL seconds of study stats.
+- stop() (also registered with atexit) flushes whatever is still pending.
+- overlay() applies pending updates to a user dict so reads see the caller's own writes.
+- A weekly rollover (weekly_rollover.py, run from another process) is detected before
+  each flush via maintenance_runs: buffered weeklyHours from before the reset are
+  dropped and the user cache cleared, so the flush can't undo the reset.
+"""
+import atexit
+import logging
+import os
+import threading
+
+import database
+from database import merge_user_profiles
+from weekly_rollover import last_rollover
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.environ.get('STUDY_STATS_FLUSH_INTERVAL', '2.0'))
+MAX_PENDING = int(os.environ.get('STUDY_STATS_MAX_PENDING', '500'))
+
+
+def coalesce_study_stats(pending, incoming):
+    """Fold incoming studyStats into pending, with the same semantics as merge_user_profile."""
+    out = dict(pending)
+    for k, v in incoming.items():
+        if k == 'fieldProgress' and isinstance(v, dict):
+            fp = dict(out.get('fieldProgress') or {})
+            fp.update(v)
+            out['fieldProgress'] = fp
+        else:
+            out[k] = v
+    return out
+
+
+class StudyStatsBuffer:
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING, writer=merge_user_profiles,
+                 rollover_marker=last_rollover):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._writer = writer
+        self._rollover_marker = rollover_marker
+        self._rollover_seen = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}   # user_id -> coalesced studyStats not yet handed to the writer
+        self._inflight = {}  # user_id -> studyStats being written by the current flush
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._stats = {'updates': 0, 'flushes': 0, 'rows_written': 0, 'errors': 0, 'rollovers': 0}
+
+    def start(self):
+        """Start the background flusher (idempotent) and flush on interpreter exit."""
+        if self._thread is not None:
+            return
+        if self._rollover_marker is not None:
+            self._rollover_seen = self._rollover_marker()
+        self._thread = threading.Thread(target=self._run, name='study-stats-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the flusher and write out everything still pending."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def add(self, user_id, study_stats):
+        """Buffer a studyStats update for user_id."""
+        with self._lock:
+            self._pending[user_id] = coalesce_study_stats(self._pending.get(user_id, {}), study_stats)
+            self._stats['updates'] += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wakeup.set()
+
+    def overlay(self, user):
+        """Return user with any unflushed studyStats applied (read-your-writes). Does not mutate user."""
+        if not user:
+            return user
+        with self._lock:
+            parts = [p for p in (self._inflight.get(user['id']), self._pending.get(user['id'])) if p]
+        if not parts:
+            return user
+        stats = user.get('studyStats') or {}
+        for part in parts:
+            stats = coalesce_study_stats(stats, part)
+        return {**user, 'studyStats': stats}
+
+    def _check_rollover(self):
+        """Drop buffered weeklyHours if a weekly rollover completed since the last check."""
+        if self._rollover_marker is None:
+            return
+        marker = self._rollover_marker()
+        if marker == self._rollover_seen:
+            return
+        self._rollover_seen = marker
+        with self._lock:
+            for uid in list(self._pending):
+                stats = {k: v for k, v in self._pending[uid].items() if k != 'weeklyHours'}
+                if stats:
+                    self._pending[uid] = stats
+                else:
+                    del self._pending[uid]
+            self._stats['rollovers'] += 1
+        database.clear_user_cache()
+        logger.info("weekly rollover %s detected; dropped buffered weeklyHours", marker)
+
+    def flush(self, user_id=None):
+        """Write pending updates (all users, or only user_id) in one transaction. Returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                idle = not self._pending
+            if not idle:
+                self._check_rollover()
+            with self._lock:
+                if user_id is None:
+                    batch, self._pending = self._pending, {}
+                elif user_id in self._pending:
+                    batch = {user_id: self._pending.pop(user_id)}
+                else:
+                    batch = {}
+                self._inflight = batch
+            if not batch:
+                return 0
+            try:
+                written = self._writer({uid: {'studyStats': s} for uid, s in batch.items()})
+            except Exception:
+                # Put the batch back in front of anything buffered meanwhile so nothing is lost
+                with self._lock:
+                    for uid, stats in batch.items():
+                        self._pending[uid] = coalesce_study_stats(stats, self._pending.get(uid, {}))
+                    self._inflight = {}
+                    self._stats['errors'] += 1
+                raise
+            with self._lock:
+                self._inflight = {}
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += written
+            return written
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'pending': len(self._pending)}
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:  # noqa: BLE001
+                # Keep the flusher alive; the batch was re-queued and is retried next tick.
+                logger.exception("study stats flush failed (%d users pending)", self.stats()['pending'])
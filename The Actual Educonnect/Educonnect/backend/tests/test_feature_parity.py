@@ -0,0 +1,125 @@
+"""
+The trainer's vectorized featurization (load_features / featurize_frame) must give the
+same features and targets as the per-row build_feature_vector() / get_target_field_id().
+These tests build a small users table with the awkward rows the vectorized path has to
+reproduce and compare the two row by row.
+
+Run from backend/:  python -m pytest tests
+"""
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+ROOT_DIR = BACKEND_DIR.parent
+sys.path[:0] = [str(ROOT_DIR / "scripts")]
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+import train_next_topic_model as trainer  # noqa: E402
+
+
+def stats(total_hours=None, **scores):
+    out = {"fieldProgress": {fid: {"finalScore": s} for fid, s in scores.items()}}
+    if total_hours is not None:
+        out["totalHours"] = total_hours
+    return json.dumps(out)
+
+
+# (course_area, ordered_interests, weak_topics, strong_topics, study_stats)
+ROWS = [
+    ("Computing & IT", "ai,ml,ds", "cv", "web", stats(12, ai=80, ml=40, ds=95)),
+    # NULL, empty and malformed study_stats all count as {}
+    ("Law", None, None, None, None),
+    ("Business & Management", "", "", "", ""),
+    ("Other", "ai", "ml", "ds", "{not json"),
+    ("Computing & IT", "ai", "", "", '{"fieldProgress": '),
+    # every field taken: lowest score wins; ties go to the first field
+    ("Law", "", "", "", stats(5, **{fid: 50 for fid in trainer.FIELD_IDS})),
+    ("Law", "", "", "", stats(5, **{fid: 70 - i for i, fid in enumerate(trainer.FIELD_IDS)})),
+    # all taken with scores >= 101: no field beats the 101 threshold -> FIELD_IDS[0]
+    ("Law", "", "", "", stats(5, **{fid: 150 for fid in trainer.FIELD_IDS})),
+    # numeric strings, out-of-range scores and hours, explicit nulls
+    ("Computing & IT", "", "", "", stats("42.5", ai="88", ml=-5, ds=250, nlp=None)),
+    ("Computing & IT", "", "", "", stats(999, **{fid: "7" for fid in trainer.FIELD_IDS})),
+    ("Other", "", "", "", json.dumps({"totalHours": None, "fieldProgress": None})),
+    ("Other", "", "", "", json.dumps({"fieldProgress": {"ai": None, "ml": {}}})),
+    # unknown fields in fieldProgress are ignored
+    ("Other", "", "", "", stats(3, quantum=10, ai=60)),
+    # comma / whitespace lists: blanks, padding, tabs, non-breaking spaces, caps
+    ("Computing & IT", " ai , ,ml,,\tds\t, ", ",,,", " , web ", stats(1)),
+    ("Computing & IT", ",".join(f"t{i}" for i in range(30)), ",".join("x" * 15), " a ,b ", stats(1)),
+    # course areas: padded, unknown, blank
+    ("  Law  ", "", "", "", stats()),
+    ("Medicine", "", "", "", stats()),
+    ("   ", "", "", "", stats()),
+    (None, "", "", "", stats()),
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "educonnect.db"
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE users (
+            id TEXT PRIMARY KEY, role TEXT, course_area TEXT, ordered_interests TEXT,
+            weak_topics TEXT, strong_topics TEXT, study_stats TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO users VALUES (?, 'user', ?, ?, ?, ?, ?)",
+        [(f"u{i}", *row) for i, row in enumerate(ROWS)],
+    )
+    # Not role='user': skipped by both paths
+    conn.execute("INSERT INTO users VALUES ('admin', 'admin', 'Law', '', '', '', NULL)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def per_row(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    rows = [dict(r) for r in conn.execute("SELECT * FROM users WHERE role = 'user' ORDER BY rowid")]
+    conn.close()
+    X = np.array([trainer.build_feature_vector(row, None) for row in rows])
+    y = np.array([trainer.FIELD_IDS.index(trainer.get_target_field_id(row)) for row in rows])
+    return [row["id"] for row in rows], X, y
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, trainer.CHUNK_SIZE])
+def test_load_features_matches_per_row(db_path, chunk_size):
+    expected_ids, expected_X, expected_y = per_row(db_path)
+    ids, X, y = trainer.load_features(db_path, chunk_size)
+    assert ids == expected_ids
+    np.testing.assert_array_equal(X, expected_X)
+    np.testing.assert_array_equal(y, expected_y)
+
+
+def test_featurize_frame_matches_per_row(db_path):
+    _, expected_X, expected_y = per_row(db_path)
+    conn = sqlite3.connect(db_path)
+    df = pd.read_sql_query(trainer.FEATURE_SQL, conn, params=("user",))
+    conn.close()
+    X, y = trainer.featurize_frame(df)
+    np.testing.assert_array_equal(X, expected_X)
+    np.testing.assert_array_equal(y, expected_y)
+
+
+def test_load_features_subset(db_path):
+    expected_ids, expected_X, expected_y = per_row(db_path)
+    wanted = ["u3", "u13", "admin", "missing"]
+    ids, X, y = trainer.load_features(db_path, 2, user_ids=wanted)
+    rows = [expected_ids.index(i) for i in ids]
+    assert ids == ["u3", "u13"]
+    np.testing.assert_array_equal(X, expected_X[rows])
+    np.testing.assert_array_equal(y, expected_y[rows])
+
+
+def test_check_parity(db_path):
+    assert trainer.check_parity(db_path, 3)
@@ -0,0 +1,151 @@
+"""
+model_export.bin has three readers: read_binary_export() in the trainer, next_topic.py
+here and parseBinaryExport in server/mlInference.js. These tests write the artifact with
+the trainer's export_model() and check every reader against the scikit-learn model.
+
+Run from backend/:  python -m pytest tests
+"""
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+ROOT_DIR = BACKEND_DIR.parent
+sys.path[:0] = [str(BACKEND_DIR), str(ROOT_DIR / "scripts")]
+
+pytest.importorskip("sklearn")
+pytest.importorskip("pandas")
+joblib = pytest.importorskip("joblib")
+
+import next_topic  # noqa: E402
+import train_next_topic_model as trainer  # noqa: E402
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+
+
+def make_users(n, seed=0):
+    rng = np.random.default_rng(seed)
+    users = []
+    for i in range(n):
+        fields = rng.choice(next_topic.FIELD_IDS, size=4, replace=False).tolist()
+        users.append({
+            "id": f"u{i}",
+            "courseArea": rng.choice(next_topic.COURSE_AREAS + [""]),
+            "orderedInterests": ",".join(fields[:int(rng.integers(0, 4))]),
+            "weakTopics": ",".join(fields[:int(rng.integers(0, 3))]),
+            "strongTopics": ",".join(fields[2:]),
+            "studyStats": {
+                "totalHours": float(rng.integers(0, 250)),
+                "fieldProgress": {f: {"finalScore": float(rng.integers(0, 101))} for f in fields[:3]},
+            },
+        })
+    return users
+
+
+def export_trained(tmp_path, monkeypatch, n_classes):
+    """Fit a scaler + model on synthetic users and export it into tmp_path like a training run."""
+    monkeypatch.setattr(trainer, "SERVER_DIR", tmp_path)
+    monkeypatch.setattr(trainer, "MODEL_PATH", tmp_path / "next_topic_model.joblib")
+    users = make_users(300)
+    X = next_topic.feature_matrix(users)
+    y = np.random.default_rng(1).integers(0, n_classes, size=len(users))
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression(max_iter=500, random_state=42).fit(np.nan_to_num(scaler.transform(X)), y)
+    trainer.export_model(model, scaler, joblib)
+    return users, X, model.predict_proba(np.nan_to_num(scaler.transform(X)))
+
+
+@pytest.mark.parametrize("n_classes", [2, 5])
+def test_binary_export_scores_like_sklearn(tmp_path, monkeypatch, n_classes):
+    users, X, expected = export_trained(tmp_path, monkeypatch, n_classes)
+
+    for artifact in ("model_export.bin", "next_topic_model.joblib"):
+        probs, classes = next_topic.NextTopicModel(str(tmp_path / artifact), cache_size=0).predict_proba(X)
+        assert classes == next_topic.FIELD_IDS[:n_classes]
+        # The binary artifact stores float32 parameters
+        np.testing.assert_allclose(probs, expected, atol=1e-4)
+        np.testing.assert_array_equal(probs.argmax(axis=1), expected.argmax(axis=1))
+
+    recs = next_topic.NextTopicModel(str(tmp_path / "model_export.bin")).recommend(users, top_k=2)
+    assert [r["fieldId"] for r in recs] == [next_topic.FIELD_IDS[k] for k in expected.argmax(axis=1)]
+
+
+def test_trainer_and_backend_read_the_same_parameters(tmp_path, monkeypatch):
+    export_trained(tmp_path, monkeypatch, 4)
+    with open(tmp_path / "model_export.json", encoding="utf-8") as f:
+        from_json = json.load(f)
+    from_trainer = trainer.read_binary_export(tmp_path / "model_export.bin")
+    classes, mean, scale, coef, intercept = next_topic.read_binary_export(str(tmp_path / "model_export.bin"))
+
+    assert classes == from_trainer["classes"] == from_json["classes"]
+    for ours, theirs, original in [
+        (mean, from_trainer["scaler"]["mean"], from_json["scaler"]["mean"]),
+        (scale, from_trainer["scaler"]["scale"], from_json["scaler"]["scale"]),
+        (coef, from_trainer["coefficients"], from_json["coefficients"]),
+        (intercept, from_trainer["intercept"], from_json["intercept"]),
+    ]:
+        np.testing.assert_array_equal(ours, np.asarray(theirs, dtype=np.float64))
+        np.testing.assert_allclose(ours, original, rtol=1e-6, atol=1e-7)
+
+
+def test_corrupted_binary_export_is_rejected(tmp_path, monkeypatch):
+    export_trained(tmp_path, monkeypatch, 3)
+    path = tmp_path / "model_export.bin"
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match="checksum"):
+        trainer.read_binary_export(path)
+    with pytest.raises(next_topic.ModelUnavailable, match="checksum"):
+        next_topic.NextTopicModel(str(path)).predict_proba(np.zeros((1, next_topic.N_FEATURES)))
+
+    path.write_bytes(bytes(data[:-8]))
+    with pytest.raises(next_topic.ModelUnavailable):
+        next_topic.NextTopicModel(str(path)).predict_proba(np.zeros((1, next_topic.N_FEATURES)))
+
+
+NODE_READER = """
+import { readFileSync } from 'fs'
+import { parseBinaryExport } from './mlInference.js'
+const out = {}
+for (const name of process.argv.slice(1)) {
+  try {
+    const e = parseBinaryExport(readFileSync(name))
+    out[name] = { classes: e.classes, mean: Array.from(e.scaler.mean), scale: Array.from(e.scaler.scale),
+                  coefficients: e.coefficients.map((row) => Array.from(row)), intercept: e.intercept }
+  } catch (err) {
+    out[name] = { error: err.message }
+  }
+}
+console.log(JSON.stringify(out))
+"""
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node not installed")
+def test_node_reader_matches(tmp_path, monkeypatch):
+    export_trained(tmp_path, monkeypatch, 5)
+    good = tmp_path / "model_export.bin"
+    bad = tmp_path / "corrupt.bin"
+    data = bytearray(good.read_bytes())
+    data[-1] ^= 0xFF
+    bad.write_bytes(bytes(data))
+
+    result = subprocess.run(
+        ["node", "--input-type=module", "-e", NODE_READER, str(good), str(bad)],
+        cwd=ROOT_DIR / "server", capture_output=True, text=True, check=True,
+    )
+    parsed = json.loads(result.stdout)
+    classes, mean, scale, coef, intercept = next_topic.read_binary_export(str(good))
+    node = parsed[str(good)]
+    assert node["classes"] == classes
+    np.testing.assert_array_equal(node["mean"], mean)
+    np.testing.assert_array_equal(node["scale"], scale)
+    np.testing.assert_array_equal(node["coefficients"], coef)
+    np.testing.assert_array_equal(node["intercept"], intercept)
+    assert "checksum" in parsed[str(bad)]["error"]
@@ -0,0 +1,70 @@
+"""
+weekly_rollover.run_weekly_rollover() against a throwaway SQLite database, including a
+user whose profile_json text is not valid JSON.
+
+Run from backend/:  python -m pytest tests
+"""
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+import database  # noqa: E402
+import weekly_rollover  # noqa: E402
+
+NOW = datetime(2026, 10, 19, 6, 0, tzinfo=timezone.utc)  # Monday of 2026-W43
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "educonnect.db"))
+    database.init_db()
+    database.clear_user_cache()
+    yield
+    database.clear_user_cache()
+
+
+def add_user(user_id, hours):
+    database.create_user({
+        "id": user_id, "email": f"{user_id}@example.com", "password": "x",
+        "createdAt": "2026-10-01T00:00:00.000Z",
+        "studyStats": {"totalHours": sum(hours), "weeklyHours": hours},
+    })
+
+
+def weekly_hours(user_id):
+    return database.get_user_by_id(user_id)["studyStats"]["weeklyHours"]
+
+
+def test_corrupt_profile_is_skipped_not_fatal(db, caplog):
+    add_user("before", [1, 2, 0, 0, 0, 0, 0])
+    add_user("corrupt", [0, 0, 0, 0, 0, 0, 0])
+    add_user("after", [0, 0, 3, 0, 0, 0, 4])
+    with database.get_connection() as conn:
+        conn.execute("UPDATE users SET profile_json = ? WHERE id = 'corrupt'", ('{"studyStats": {',))
+        conn.commit()
+
+    # chunk_size=1 puts the corrupt row in a chunk of its own, between two good ones
+    report = weekly_rollover.run_weekly_rollover(now=NOW, chunk_size=1)
+
+    assert report["rows"] == 2
+    assert report["archived"] == 2
+    assert report["invalid"] == 1
+    assert "corrupt" in caplog.text
+    assert weekly_hours("before") == weekly_rollover.ZERO_WEEK
+    assert weekly_hours("after") == weekly_rollover.ZERO_WEEK
+    with database.get_connection() as conn:
+        row = conn.execute("SELECT profile_json, last_week_reset FROM users WHERE id = 'corrupt'").fetchone()
+        history = conn.execute("SELECT weekly_hours FROM weekly_hours_history WHERE user_id = 'after'").fetchone()
+        done = conn.execute("SELECT rows_affected FROM maintenance_runs WHERE period = ?", (report["week"],)).fetchone()
+    assert row["profile_json"] == '{"studyStats": {'
+    assert row["last_week_reset"] is None
+    assert json.loads(history["weekly_hours"]) == [0, 0, 3, 0, 0, 0, 4]
+    assert done["rows_affected"] == 2
+
+    assert weekly_rollover.run_weekly_rollover(now=NOW)["skipped"] is True
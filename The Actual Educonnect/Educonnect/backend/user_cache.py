@@ -0,0 +1,106 @@
+"""
+Bounded in-process LRU cache of decoded user dicts, keyed by id and normalized email.
+
+database.py reads through it in get_user_by_id / get_user_by_email and invalidates
+entries on every write. The TTL bounds staleness when several backend processes
+share one SQLite file (a write in another process is not seen by this cache).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '2048'))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '30'))
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+class UserCache:
+    def __init__(self, max_size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (expires_at, user)
+        self._email_to_id = {}
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    def generation(self):
+        """Token to pass to put(); a put is dropped if anything was invalidated since."""
+        with self._lock:
+            return self._generation
+
+    def get_by_id(self, user_id, count_miss=True):
+        with self._lock:
+            return self._lookup(user_id, count_miss)
+
+    def get_by_email(self, email, count_miss=True):
+        with self._lock:
+            return self._lookup(self._email_to_id.get(normalize_email(email)), count_miss)
+
+    def put(self, user, generation):
+        """Cache user unless anything was invalidated since generation; True if stored."""
+        if not user or self.max_size <= 0:
+            return False
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._drop(user['id'])
+            self._entries[user['id']] = (time.monotonic() + self.ttl, user)
+            self._email_to_id[normalize_email(user.get('email'))] = user['id']
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+        return True
+
+    def invalidate(self, user_id=None, email=None):
+        """Drop the entry for user_id and/or email."""
+        with self._lock:
+            self._generation += 1
+            if email is not None:
+                user_id_for_email = self._email_to_id.get(normalize_email(email))
+                if user_id_for_email is not None:
+                    self._drop(user_id_for_email)
+            if user_id is not None:
+                self._drop(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._email_to_id.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'maxSize': self.max_size,
+                'ttlSeconds': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hitRatio': round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _lookup(self, user_id, count_miss=True):
+        entry = self._entries.get(user_id) if user_id is not None else None
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(user_id)
+            if count_miss:
+                self._misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self._hits += 1
+        # Shallow copy so callers can set top-level keys without touching the cached entry
+        return dict(entry[1])
+
+    def _drop(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            key = normalize_email(entry[1].get('email'))
+            if self._email_to_id.get(key) == user_id:
+                del self._email_to_id[key]
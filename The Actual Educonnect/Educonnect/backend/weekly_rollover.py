@@ -0,0 +1,183 @@
+"""
+Weekly rollover of studyStats.weeklyHours, run as a scheduled maintenance job
+(python maintenance.py weekly-reset, e.g. from cron early on Monday).
+
+For every user whose last_week_reset is before the current ISO week (Monday, UTC):
+- the old weeklyHours array is archived to weekly_hours_history, keyed by the
+  Monday of the week it belongs to (the week of last_week_reset, or the previous
+  week if the user was never reset),
+- weeklyHours is zeroed and last_week_reset stamped.
+
+JSON-text profiles are handled entirely in SQL (json_extract / json_set), one
+set-based INSERT ... SELECT and UPDATE per chunk of rowids, each chunk in its own
+transaction. Rows whose profile_json text is not valid JSON are left alone (SQLite's
+JSON functions would abort the whole job on them); they are counted and logged, and
+the report lists how many were skipped. Binary profiles (see profile_codec.py) can't be edited by SQL and
+are rewritten in Python within the same chunk. A completed week is recorded in
+maintenance_runs, so re-running in the same ISO week is a no-op.
+
+The job runs in its own process, so it cannot reach a running server's memory. The
+server's study-stats buffer (study_stats_buffer.py) polls last_rollover() before each
+flush. Once a new rollover shows up, it drops the weeklyHours it is still holding and
+clears the user cache, so arrays buffered before the reset are not written back over
+it. A flush that lands while the job is still going through its chunks can still put
+last week's array back on a row that was already reset. For a strict guarantee, run the
+job while the server is stopped.
+"""
+import json
+import logging
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+import database
+from database import decode_profile, encode_profile, get_connection
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'weekly_reset'
+ZERO_WEEK = [0, 0, 0, 0, 0, 0, 0]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weekly_hours_history (
+    user_id TEXT NOT NULL,
+    week_start TEXT NOT NULL,
+    weekly_hours TEXT NOT NULL,
+    total_hours REAL NOT NULL,
+    archived_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, week_start)
+);
+CREATE TABLE IF NOT EXISTS maintenance_runs (
+    job TEXT NOT NULL,
+    period TEXT NOT NULL,
+    rows_affected INTEGER NOT NULL,
+    completed_at TEXT NOT NULL,
+    PRIMARY KEY (job, period)
+);
+"""
+
+# Rows still holding last week's numbers; ISO timestamps compare correctly as text
+STALE = "(last_week_reset IS NULL OR last_week_reset < :week_start)"
+# Monday of the week the current hours belong to
+ARCHIVE_WEEK = "COALESCE(date(last_week_reset, 'weekday 0', '-6 days'), :previous_week_start)"
+
+ARCHIVE_TEXT_SQL = f"""
+    INSERT OR IGNORE INTO weekly_hours_history (user_id, week_start, weekly_hours, total_hours, archived_at)
+    SELECT id, {ARCHIVE_WEEK},
+           json_extract(profile_json, '$.studyStats.weeklyHours'),
+           (SELECT COALESCE(SUM(value), 0) FROM json_each(profile_json, '$.studyStats.weeklyHours')),
+           :now
+    FROM users
+    WHERE rowid > :lo AND rowid <= :hi AND {STALE}
+      AND typeof(profile_json) = 'text' AND json_valid(profile_json)
+      AND json_type(profile_json, '$.studyStats.weeklyHours') = 'array'
+"""
+
+RESET_TEXT_SQL = f"""
+    UPDATE users
+    SET profile_json = json_set(profile_json, '$.studyStats.weeklyHours', json(:zero_week)),
+        last_week_reset = :now
+    WHERE rowid > :lo AND rowid <= :hi AND {STALE}
+      AND (profile_json IS NULL OR (typeof(profile_json) = 'text' AND json_valid(profile_json)))
+"""
+
+INVALID_TEXT_SQL = f"""
+    SELECT id FROM users
+    WHERE rowid > :lo AND rowid <= :hi AND {STALE}
+      AND typeof(profile_json) = 'text' AND NOT json_valid(profile_json)
+"""
+
+
+def last_rollover():
+    """completed_at of the most recent rollover, or None if none has run (polled by the server)."""
+    try:
+        with get_connection() as conn:
+            return conn.execute(
+                "SELECT MAX(completed_at) FROM maintenance_runs WHERE job = ?", (JOB_NAME,)
+            ).fetchone()[0]
+    except sqlite3.OperationalError:
+        # maintenance_runs is created by the first rollover
+        return None
+
+
+def iso_week_bounds(now):
+    """(ISO week label, Monday of this week, Monday of last week) for a UTC datetime."""
+    monday = (now - timedelta(days=now.weekday())).date()
+    year, week, _ = now.isocalendar()
+    return f"{year}-W{week:02d}", monday.isoformat(), (monday - timedelta(days=7)).isoformat()
+
+
+def _reset_binary_rows(conn, params):
+    """Python path for msgpack / msgpack-zstd profiles in the current chunk."""
+    rows = conn.execute(
+        f"SELECT id, profile_json, {ARCHIVE_WEEK} AS archive_week FROM users "
+        f"WHERE rowid > :lo AND rowid <= :hi AND {STALE} AND typeof(profile_json) = 'blob'",
+        params
+    ).fetchall()
+    history, updates = [], []
+    for row in rows:
+        profile = decode_profile(row['profile_json'])
+        stats = profile.get('studyStats')
+        if isinstance(stats, dict) and isinstance(stats.get('weeklyHours'), list):
+            hours = stats['weeklyHours']
+            history.append((row['id'], row['archive_week'], json.dumps(hours), float(sum(hours)), params['now']))
+            stats['weeklyHours'] = list(ZERO_WEEK)
+        updates.append((encode_profile(profile), params['now'], row['id']))
+    conn.executemany(
+        "INSERT OR IGNORE INTO weekly_hours_history (user_id, week_start, weekly_hours, total_hours, archived_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        history
+    )
+    conn.executemany("UPDATE users SET profile_json = ?, last_week_reset = ? WHERE id = ?", updates)
+    return len(updates), len(history)
+
+
+def run_weekly_rollover(now=None, chunk_size=5000, force=False):
+    """Archive and reset weeklyHours for the ISO week containing now. Returns a report dict."""
+    now = now or datetime.now(timezone.utc)
+    week_label, week_start, previous_week_start = iso_week_bounds(now)
+    stamp = now.strftime('%Y-%m-%dT%H:%M:%S.') + f"{now.microsecond // 1000:03d}Z"
+    started = time.perf_counter()
+
+    with get_connection() as conn:
+        conn.executescript(SCHEMA)
+        done = conn.execute(
+            "SELECT rows_affected FROM maintenance_runs WHERE job = ? AND period = ?", (JOB_NAME, week_label)
+        ).fetchone()
+        if done and not force:
+            return {'week': week_label, 'skipped': True, 'rows': 0, 'archived': 0, 'invalid': 0,
+                    'seconds': 0.0, 'rows_per_second': 0.0}
+
+        max_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM users").fetchone()[0]
+        params = {
+            'week_start': week_start, 'previous_week_start': previous_week_start,
+            'now': stamp, 'zero_week': json.dumps(ZERO_WEEK),
+        }
+        rows = archived = invalid = 0
+        for lo in range(0, max_rowid, chunk_size):
+            params.update(lo=lo, hi=lo + chunk_size)
+            conn.execute("BEGIN IMMEDIATE")
+            bad_ids = [r[0] for r in conn.execute(INVALID_TEXT_SQL, params)]
+            if bad_ids:
+                invalid += len(bad_ids)
+                logger.warning("weekly reset: skipping %d users with malformed profile_json: %s",
+                               len(bad_ids), ', '.join(bad_ids[:20]) + (' ...' if len(bad_ids) > 20 else ''))
+            archived += conn.execute(ARCHIVE_TEXT_SQL, params).rowcount
+            rows += conn.execute(RESET_TEXT_SQL, params).rowcount
+            binary_rows, binary_archived = _reset_binary_rows(conn, params)
+            conn.commit()
+            rows += binary_rows
+            archived += binary_archived
+
+        conn.execute(
+            "INSERT OR REPLACE INTO maintenance_runs (job, period, rows_affected, completed_at) VALUES (?, ?, ?, ?)",
+            (JOB_NAME, week_label, rows, stamp)
+        )
+        conn.commit()
+
+    database.clear_user_cache()
+    elapsed = time.perf_counter() - started
+    return {
+        'week': week_label, 'skipped': False, 'rows': rows, 'archived': archived, 'invalid': invalid,
+        'seconds': round(elapsed, 3), 'rows_per_second': round(rows / elapsed, 1) if elapsed else 0.0,
+    }
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Scalability benchmark for the Python ML pipelines:
+
+- train_next_topic_model.py  — stages: load (SQLite -> frames), featurize, fit, export
+- signup_ml_pipeline.py      — stages: trends (read + aggregate), export (signup_trends.json)
+
+For each size it synthesizes a SQLite DB shaped like server/educonnect.db (users with
+realistic study_stats, interests, topics and long-tail free-text fields, plus
+signup_suggestions), runs every stage and records wall time and peak memory. Peak RSS is
+measured per stage on Linux (VmHWM is reset before each stage); elsewhere only the
+process-wide peak is available. Results go to a JSON report; --compare prints the ratio
+against an earlier report so regressions stand out.
+
+Run from Educonnect root:
+  python scripts/benchmark_ml_pipelines.py                          # 1k, 100k, 1M users
+  python scripts/benchmark_ml_pipelines.py --sizes 1000 20000 --report bench.json
+  python scripts/benchmark_ml_pipelines.py --compare bench.json
+  python scripts/benchmark_ml_pipelines.py --pipelines signup_trends --signup-engine python
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import signup_ml_pipeline as signup
+import train_next_topic_model as tnt
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+GEN_CHUNK = 100_000
+POOL_SIZE = 20_000
+
+UNIVERSITIES = ["Makerere University", "Kyambogo University", "MUST", "Stanford University",
+                "University of Michigan", "Georgia Tech", "UCLA", "Uganda Christian University"]
+PROGRAMMES = ["Computer Science", "Software Engineering", "Information Technology", "Law",
+              "Business Administration", "Data Science", "Electrical Engineering", "Economics"]
+COUNTRIES = ["Uganda", "United States", "Kenya", "Nigeria", "India", "United Kingdom"]
+LEARNING_STYLES = ["Visual", "Auditory", "Reading/Writing", "Kinesthetic"]
+PARTNER_PREFS = ["Small groups", "One-on-one", "Large groups", "Solo"]
+STUDY_HOURS = ["Morning", "Afternoon", "Evening", "Late night"]
+TOPICS = ["Machine Learning", "Artificial Intelligence", "Data Science", "NLP", "Computer Vision",
+          "Cybersecurity", "Web Development", "Databases", "Algorithms", "Networking",
+          "Contract Law", "Marketing", "Finance", "Statistics", "Cloud Computing"]
+SKILLS = ["Python", "JavaScript", "SQL", "Java", "C++", "React", "Node.js", "Excel", "R", "Go"]
+SOFT_SKILLS = ["Communication", "Teamwork", "Leadership", "Time management", "Problem solving"]
+INTERESTS = ["Research", "Startups", "Teaching", "Open source", "Consulting", "Public policy"]
+HOBBIES = ["Football", "Music", "Reading", "Chess", "Photography", "Hiking", "Gaming", "Cooking"]
+
+USERS_SCHEMA = """
+CREATE TABLE users (
+    id TEXT PRIMARY KEY, email TEXT UNIQUE NOT NULL, password_hash TEXT NOT NULL,
+    first_name TEXT, last_name TEXT, nationality TEXT, country_of_residence TEXT,
+    university TEXT, degree_program TEXT, course_area TEXT, ordered_interests TEXT,
+    technical_skills TEXT, soft_skills TEXT, research_interests TEXT, professional_interests TEXT,
+    hobbies TEXT, cs_interests TEXT, strong_topics TEXT, weak_topics TEXT,
+    preferred_learning_style TEXT, study_partners_preferences TEXT, preferred_study_hours TEXT,
+    study_stats TEXT, created_at TEXT NOT NULL, role TEXT NOT NULL DEFAULT 'user'
+);
+CREATE INDEX idx_users_role ON users(role);
+CREATE TABLE signup_suggestions (
+    field_name TEXT NOT NULL, value TEXT NOT NULL, use_count INTEGER NOT NULL DEFAULT 1,
+    created_at TEXT NOT NULL, PRIMARY KEY (field_name, value)
+);
+"""
+
+
+# --- synthetic data ----------------------------------------------------------
+
+def zipf_weights(n, s=1.1):
+    w = 1.0 / np.arange(1, n + 1) ** s
+    return w / w.sum()
+
+
+def vocabulary(base, long_tail, prefix):
+    """Common values first, then a Zipf-distributed long tail of rarer ones."""
+    return np.array(base + [f"{prefix} {i}" for i in range(long_tail)], dtype=object)
+
+
+def list_pool(rng, vocab, mean_items, size=POOL_SIZE):
+    """Pool of comma-separated list strings drawn with Zipf weights (no repeats within a list)."""
+    lengths = rng.poisson(mean_items, size)
+    items = vocab[rng.choice(len(vocab), lengths.sum(), p=zipf_weights(len(vocab)))]
+    bounds = np.cumsum(lengths)[:-1]
+    return np.array([", ".join(dict.fromkeys(chunk)) for chunk in np.split(items, bounds)], dtype=object)
+
+
+def study_stats_pool(rng, size=POOL_SIZE):
+    pool = []
+    for _ in range(size):
+        taken = rng.random(len(tnt.FIELD_IDS)) < 0.45
+        progress = {
+            fid: {"finalScore": int(rng.integers(20, 101)), "quizzesTaken": int(rng.integers(1, 6))}
+            for fid, t in zip(tnt.FIELD_IDS, taken) if t
+        }
+        pool.append(json.dumps({
+            "totalHours": round(float(rng.gamma(2.0, 15.0)), 1),
+            "weeklyHours": [round(float(h), 1) for h in rng.gamma(1.0, 1.5, 7)],
+            "sessionsCompleted": int(rng.integers(0, 200)),
+            "studyProgress": int(rng.integers(0, 101)),
+            "fieldProgress": progress,
+        }))
+    return np.array(pool, dtype=object)
+
+
+def synthesize_db(path, n_users, seed=42):
+    """Create a server-shaped SQLite DB with n_users users and matching signup_suggestions."""
+    rng = np.random.default_rng(seed)
+    tail = max(50, n_users // 200)
+    pools = {
+        "ordered_interests": list_pool(rng, vocabulary(TOPICS, 0, ""), 4),
+        "technical_skills": list_pool(rng, vocabulary(SKILLS, tail, "Skill"), 4),
+        "soft_skills": list_pool(rng, vocabulary(SOFT_SKILLS, 0, ""), 2),
+        "research_interests": list_pool(rng, vocabulary(TOPICS, tail, "Research topic"), 2),
+        "professional_interests": list_pool(rng, vocabulary(INTERESTS, tail, "Interest"), 2),
+        "hobbies": list_pool(rng, vocabulary(HOBBIES, tail, "Hobby"), 3),
+        "cs_interests": list_pool(rng, vocabulary(TOPICS, 0, ""), 3),
+        "strong_topics": list_pool(rng, vocabulary(TOPICS, 0, ""), 2),
+        "weak_topics": list_pool(rng, vocabulary(TOPICS, 0, ""), 2),
+        "study_stats": study_stats_pool(rng),
+    }
+    singles = {
+        "nationality": COUNTRIES, "country_of_residence": COUNTRIES, "university": UNIVERSITIES,
+        "degree_program": PROGRAMMES, "course_area": tnt.COURSE_AREAS,
+        "preferred_learning_style": LEARNING_STYLES, "study_partners_preferences": PARTNER_PREFS,
+        "preferred_study_hours": STUDY_HOURS,
+    }
+    columns = ["id", "email", "password_hash", "first_name", "last_name", *singles, *pools, "created_at", "role"]
+    start = np.datetime64("2024-01-01T00:00:00")
+
+    conn = sqlite3.connect(path)
+    conn.executescript(USERS_SCHEMA)
+    insert = f"INSERT INTO users ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    for lo in range(0, n_users, GEN_CHUNK):
+        n = min(GEN_CHUNK, n_users - lo)
+        idx = np.arange(lo, lo + n)
+        data = {
+            "id": [f"bench_{i}" for i in idx],
+            "email": [f"student{i}@example.com" for i in idx],
+            "password_hash": ["x"] * n,
+            "first_name": ["Test"] * n,
+            "last_name": [f"User{i}" for i in idx],
+        }
+        for col, values in singles.items():
+            data[col] = rng.choice(np.array(values, dtype=object), n, p=zipf_weights(len(values), 0.8))
+        for col, pool in pools.items():
+            data[col] = pool[rng.integers(0, len(pool), n)]
+        seconds = rng.integers(0, 2 * 365 * 86400, n).astype("timedelta64[s]")
+        data["created_at"] = np.datetime_as_string(start + seconds).astype(object)
+        data["role"] = np.where(rng.random(n) < 0.01, "admin", "user").astype(object)
+        conn.executemany(insert, zip(*(data[c] for c in columns)))
+        conn.commit()
+
+    fields = ["technicalSkills", "researchInterests", "hobbies", "degreeProgram", "university"]
+    n_suggestions = max(100, n_users // 10)
+    values = vocabulary([], n_suggestions, "Suggestion")
+    conn.executemany(
+        "INSERT OR IGNORE INTO signup_suggestions (field_name, value, use_count, created_at) VALUES (?, ?, ?, ?)",
+        zip(rng.choice(fields, n_suggestions).tolist(), values.tolist(),
+            rng.zipf(1.6, n_suggestions).clip(1, 10_000).tolist(), ["2025-01-01T00:00:00"] * n_suggestions),
+    )
+    conn.commit()
+    conn.close()
+
+
+# --- measurement -------------------------------------------------------------
+
+def _status_mb(key):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(key + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    """Reset VmHWM so the next reading is this stage's peak (Linux >= 4.0). False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def measure(stage, fn, *args):
+    """Run fn(*args); return (result, record with seconds, peak RSS and RSS growth in MiB)."""
+    per_stage = _reset_peak_rss()
+    rss_before = _status_mb("VmRSS")
+    t0 = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - t0
+    if per_stage:
+        peak = _status_mb("VmHWM")
+    else:
+        # ru_maxrss is KiB on Linux, bytes on macOS; process-wide peak only
+        scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    record = {
+        "stage": stage,
+        "seconds": round(seconds, 3),
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+        "rss_growth_mb": round(peak - rss_before, 1) if peak is not None and rss_before is not None else None,
+    }
+    return result, record
+
+
+# --- pipelines ---------------------------------------------------------------
+
+def run_next_topic(db_path, out_dir, chunk_size):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import StandardScaler
+    import joblib
+
+    def load():
+        conn = sqlite3.connect(db_path)
+        try:
+            return list(pd.read_sql_query(tnt.FEATURE_SQL, conn, params=("user",), chunksize=chunk_size))
+        finally:
+            conn.close()
+
+    def featurize(frames):
+        parts = [tnt.featurize_frame(f.reset_index(drop=True)) for f in frames]
+        ids = [i for f in frames for i in f["id"].tolist()]
+        return ids, np.vstack([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def fit(X, y):
+        scaler = StandardScaler()
+        X_scaled = np.nan_to_num(scaler.fit_transform(X), nan=0.0, posinf=0.0, neginf=0.0)
+        model = LogisticRegression(max_iter=500, random_state=42, C=0.5).fit(X_scaled, y)
+        return model, scaler, X_scaled
+
+    def export(ids, model, scaler, X_scaled):
+        tnt.SERVER_DIR, tnt.MODEL_PATH = out_dir, out_dir / "next_topic_model.joblib"
+        tnt.export_model(model, scaler, joblib)
+        tnt.export_predictions(out_dir / "ml_predictions.jsonl", ids, model, X_scaled, chunk_size=chunk_size)
+
+    records = []
+    frames, rec = measure("load", load)
+    records.append(rec)
+    (ids, X, y), rec = measure("featurize", featurize, frames)
+    records.append(rec)
+    del frames
+    (model, scaler, X_scaled), rec = measure("fit", fit, X, y)
+    records.append(rec)
+    _, rec = measure("export", export, ids, model, scaler, X_scaled)
+    records.append(rec)
+    return records
+
+
+def run_signup_trends(db_path, out_dir, engine):
+    def export(trends):
+        with open(out_dir / "signup_trends.json", "w", encoding="utf-8") as f:
+            json.dump(trends, f, indent=2, ensure_ascii=False)
+
+    signup.DB_PATH = db_path
+    records = []
+    trends, rec = measure("trends", signup.build_trends, engine)
+    records.append(rec)
+    _, rec = measure("export", export, trends)
+    records.append(rec)
+    return records
+
+
+# --- report ------------------------------------------------------------------
+
+def environment():
+    import sklearn
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "sqlite": sqlite3.sqlite_version,
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+    }
+
+
+def print_table(results, baseline=None):
+    base = {(r["users"], r["pipeline"], r["stage"]): r for r in (baseline or [])}
+    header = f"{'users':>10}  {'pipeline':<15}{'stage':<11}{'seconds':>9}{'peak MiB':>10}{'growth MiB':>12}"
+    print(header + ("   vs baseline" if baseline else ""))
+    for r in results:
+        line = (f"{r['users']:>10}  {r['pipeline']:<15}{r['stage']:<11}{r['seconds']:>9.2f}"
+                f"{r['peak_rss_mb'] if r['peak_rss_mb'] is not None else '-':>10}"
+                f"{r['rss_growth_mb'] if r['rss_growth_mb'] is not None else '-':>12}")
+        old = base.get((r["users"], r["pipeline"], r["stage"]))
+        if old and old["seconds"] > 0:
+            line += f"   {r['seconds'] / old['seconds']:.2f}x time"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ML pipelines on synthetic databases")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="User counts to synthesize")
+    parser.add_argument("--pipelines", nargs="+", choices=["next_topic", "signup_trends"],
+                        default=["next_topic", "signup_trends"])
+    parser.add_argument("--chunk-size", type=int, default=tnt.CHUNK_SIZE)
+    parser.add_argument("--signup-engine", choices=sorted(signup.ENGINES), default="sql",
+                        help="Engine for signup_ml_pipeline.build_trends (default: sql)")
+    parser.add_argument("--workdir", type=Path, help="Keep generated DBs and outputs here (default: temp dir)")
+    parser.add_argument("--report", type=Path, default=Path("ml_pipeline_benchmark.json"))
+    parser.add_argument("--compare", type=Path, help="Earlier report to compare stage times against")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.compare.read_text())["results"] if args.compare else None
+    tmp = None if args.workdir else tempfile.TemporaryDirectory()
+    workdir = args.workdir or Path(tmp.name)
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    try:
+        for n in args.sizes:
+            db_path = workdir / f"bench_{n}.db"
+            out_dir = workdir / f"out_{n}"
+            out_dir.mkdir(exist_ok=True)
+            if not db_path.exists():
+                t0 = time.perf_counter()
+                synthesize_db(db_path, n)
+                print(f"Synthesized {n} users in {time.perf_counter() - t0:.1f}s "
+                      f"({db_path.stat().st_size / 1024 / 1024:.0f} MiB)")
+            if "next_topic" in args.pipelines:
+                for rec in run_next_topic(db_path, out_dir, args.chunk_size):
+                    results.append({"users": n, "pipeline": "next_topic", **rec})
+            if "signup_trends" in args.pipelines:
+                for rec in run_signup_trends(db_path, out_dir, args.signup_engine):
+                    results.append({"users": n, "pipeline": "signup_trends", **rec})
+    finally:
+        if tmp:
+            tmp.cleanup()
+
+    report = {"environment": environment(), "results": results}
+    args.report.write_text(json.dumps(report, indent=2))
+    print()
+    print_table(results, baseline)
+    print(f"\nReport written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for courses.mak.ac.ug, for trying scrape_university_curriculum.py without
+touching the real site.
+
+It serves a /programs page (colleges as <h2>, one table of programme links each) and one
+page per programme, in the same markup the scraper parses: "Duration of Program : N Years",
+"Year N" headings and Semester / Course Title / Code / Credits tables. Pages are generated
+from --seed, so every run serves the same site.
+
+--latency adds a delay to every response (to mimic a remote server) and --fail-every N
+answers every Nth request with a 503, to exercise the scraper's retries. The server keeps
+connections alive (HTTP/1.1) and counts requests and the peak number in flight, so the
+scraper's per-host bound can be checked.
+
+Pages carry an ETag and Last-Modified and are answered with 304 Not Modified when the
+request's If-None-Match / If-Modified-Since still match (--no-validators turns that off,
+so the scraper falls back to comparing body hashes). FixtureServer.update() changes a
+page in place, to check that a re-scrape only re-parses what changed.
+
+Run from Educonnect root:
+  python scripts/curriculum_fixture_server.py --programmes 300 --latency 0.3 --port 8765
+  python scripts/scrape_university_curriculum.py --mak-base http://127.0.0.1:8765 --skip-ucu --output /tmp/curriculum.json
+"""
+
+import argparse
+import hashlib
+import random
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+COLLEGES = [
+    "College of Computing and Information Sciences",
+    "College of Business and Management Sciences",
+    "College of Engineering, Design, Art and Technology",
+    "College of Health Sciences",
+    "College of Humanities and Social Sciences",
+    "School of Law",
+]
+SUBJECTS = [
+    "Information Technology", "Computer Science", "Software Engineering", "Business Administration",
+    "Commerce", "Civil Engineering", "Electrical Engineering", "Nursing", "Pharmacy", "Laws",
+    "Social Work", "Economics", "Statistics", "Architecture", "Journalism", "Education",
+]
+UNIT_WORDS = [
+    "Foundations", "Principles", "Introduction to", "Advanced", "Applied", "Research Methods in",
+    "Systems", "Ethics and", "Management of", "Design of",
+]
+
+
+def build_site(programmes: int = 100, seed: int = 0) -> Dict[str, str]:
+    """{path: html} for the /programs list and every /programmes/<slug> page."""
+    rng = random.Random(seed)
+    pages: Dict[str, str] = {}
+    by_college: Dict[str, list] = {c: [] for c in COLLEGES}
+    for i in range(programmes):
+        college = COLLEGES[i % len(COLLEGES)]
+        subject = SUBJECTS[rng.randrange(len(SUBJECTS))]
+        name = f"Bachelor Of {subject} {i + 1}"
+        slug = f"bachelor-{subject.lower().replace(' ', '-')}-{i + 1}"
+        years = rng.choice([3, 3, 4, 5])
+        by_college[college].append((name, slug, years))
+
+        code_prefix = "".join(w[0] for w in subject.split()).upper() + "B"
+        body = [f"<h1>{name}</h1>", f"<p>Duration of Program : {years} Years</p>"]
+        for year in range(1, years + 1):
+            body.append(f"<h3>Year {year}</h3>")
+            body.append("<table><thead><tr><th>Semester</th><th>Course Title</th><th>Code</th>"
+                        "<th>Credits</th></tr></thead><tbody>")
+            for semester in (1, 2):
+                for u in range(rng.randint(4, 7)):
+                    title = f"{rng.choice(UNIT_WORDS)} {subject} {year}{semester}{u}"
+                    code = f"{code_prefix} {year}{semester}{u:02d}"
+                    body.append(f"<tr><td>Semester {semester}</td><td>{title}</td><td>{code}</td>"
+                                f"<td>{rng.choice([3, 3, 4, 4, 5])}</td></tr>")
+            body.append("</tbody></table>")
+        pages[f"/programmes/{slug}"] = _html(name, body)
+
+    body = ["<h1>All Programs</h1>"]
+    for college, rows in by_college.items():
+        if not rows:
+            continue
+        body.append(f"<h2>{college}</h2><table><tbody>")
+        for name, slug, years in rows:
+            body.append(f'<tr><td><a href="/programmes/{slug}">{name}</a></td><td>{years} Years</td></tr>')
+        body.append("</tbody></table>")
+    pages["/programs"] = _html("All Programs", body)
+    return pages
+
+
+def _html(title: str, body: list) -> str:
+    return f"<!doctype html><html><head><title>{title}</title></head><body>{''.join(body)}</body></html>"
+
+
+class FixtureServer:
+    """Threaded HTTP server for a {path: html} site, on a background thread."""
+
+    def __init__(self, pages: Dict[str, str], host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, fail_every: int = 0, validators: bool = True):
+        self.pages: Dict[str, tuple] = {}  # path -> (body, etag, modified timestamp)
+        for path, html in pages.items():
+            self.update(path, html)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.validators = validators
+        self.requests = 0
+        self.not_modified = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    def update(self, path: str, html: str) -> None:
+        """Replace (or add) a page; it gets a new ETag and a later Last-Modified."""
+        body = html.encode("utf-8")
+        previous = self.pages.get(path)
+        # Last-Modified has one-second resolution, so always move it forward
+        modified = max(int(time.time()), previous[2] + 1 if previous else 0)
+        self.pages[path] = (body, '"%s"' % hashlib.sha256(body).hexdigest()[:16], modified)
+
+    def _not_modified(self, headers, etag: str, modified: int) -> bool:
+        if not self.validators:
+            return False
+        if headers.get("If-None-Match") is not None:
+            return etag in [tag.strip() for tag in headers["If-None-Match"].split(",")]
+        since = headers.get("If-Modified-Since")
+        if since:
+            try:
+                return modified <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    number = server.requests
+                    server.in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    page = server.pages.get(self.path.split("?", 1)[0].rstrip("/") or "/")
+                    if server.fail_every and number % server.fail_every == 0:
+                        self._send(503, b"busy", {"Retry-After": "0"})
+                    elif page is None:
+                        self._send(404, b"not found")
+                    else:
+                        body, etag, modified = page
+                        headers = {}
+                        if server.validators:
+                            headers = {"ETag": etag, "Last-Modified": formatdate(modified, usegmt=True)}
+                        if server._not_modified(self.headers, etag, modified):
+                            with server._lock:
+                                server.not_modified += 1
+                            self._send(304, b"", headers)
+                        else:
+                            self._send(200, body, headers)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _send(self, status, body, headers=None):
+                self.send_response(status)
+                if status != 304:
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread (until KeyboardInterrupt), then close the socket."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve fixture MAK programme pages for the curriculum scraper")
+    parser.add_argument("--programmes", type=int, default=100, help="Programme pages to serve (default: 100)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generated pages (default: 0)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--fail-every", type=int, default=0, help="Answer every Nth request with 503 (0 = never)")
+    parser.add_argument("--no-validators", action="store_true", help="No ETag / Last-Modified, never answer 304")
+    args = parser.parse_args()
+
+    server = FixtureServer(build_site(args.programmes, args.seed), args.host, args.port,
+                           args.latency, args.fail_every, validators=not args.no_validators)
+    print(f"Serving {args.programmes} programmes at {server.url}/programs (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"\n{server.requests} requests ({server.not_modified} not modified), at most {server.peak_in_flight} in flight")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,48 @@
 """
 Generate a CSV dataset of 1000+ Ugandan students for EduConnect.
 Compatible with existing dataset loader and recommendation engine.
+
+Rows are generated column by column with NumPy, in blocks of BLOCK_SIZE students, and
+each block is written before the next one is built, so memory stays the same for 1050
+or 50 million students. Every block draws from its own random stream derived from
+--seed and the block number, so a given (--n, --seed) always produces the same file.
+
+Registration numbers are unique by construction: row i gets a keyed pseudo-random
+permutation of i over the registration number space (cycle-walking Feistel network),
+so no set of used numbers is kept. Emails end in the row number, and names contain no
+digits, so they are unique too.
+
+Sharded mode (--shards K) splits the blocks into K contiguous ranges and writes each on
+a process pool worker to its own CSV (part-00000.csv, ...) next to a manifest.json
+listing every shard's first row, row count, size and CRC-32. Because blocks, not
+workers, own the random streams and row numbers, the shards are the single-process
+file cut into pieces: --concat joins them back into exactly that file.
+
+--format parquet writes the same rows as Parquet instead (see student_parquet.py):
+list columns for skills / interests / course codes, dictionary-encoded labels, typed
+numbers, zstd compression.
+
+Run from Educonnect root:
+  python scripts/generate_ugandan_students.py                       # 1050 students
+  python scripts/generate_ugandan_students.py --n 10000000 --seed 7 --output /tmp/ug_10m.csv
+  python scripts/generate_ugandan_students.py --n 10000000 --shards 8 --shard-dir /tmp/ug_10m --concat
+  python scripts/generate_ugandan_students.py --n 10000000 --format parquet
 """
+import argparse
 import csv
-import random
+import io
+import json
+import os
+import shutil
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
+
+import student_parquet
+
 # Ugandan first names (male and female)
 MALE_FIRST_NAMES = [
     "John", "Joseph", "Moses", "Robert", "Charles", "James", "David", "Richard",
@@ -152,119 +189,316 @@ WEAK_FIELDS_POOL = [
 ]
 
 
-def random_date_of_birth():
-    """Generate DOB between 1998 and 2006."""
-    y = random.randint(1998, 2006)
-    m = random.randint(1, 12)
-    d = random.randint(1, 28)
-    return f"{y}-{m:02d}-{d:02d}"
-
-
-def random_phone():
-    """Ugandan mobile: +256 7XX XXX XXX (9 digits after 7)."""
-    prefix = random.choice(["70", "71", "72", "74", "75", "76", "77", "78", "79"])
-    rest = "".join(str(random.randint(0, 9)) for _ in range(7))
-    return f"+256 {prefix} {rest[:3]} {rest[3:6]} {rest[6:]}"
-
-
-def random_email(first_name, last_name, i):
-    """Generate email."""
-    domains = ["gmail.com", "yahoo.com", "outlook.com", "co.ug", "mail.com"]
-    d = random.choice(domains)
-    sep = random.choice([".", "_", ""])
-    return f"{first_name.lower()}{sep}{last_name.lower()}{i}@{d}".replace(" ", "")
+COLUMNS = [
+    "Registration Number", "First Name", "Middle Name", "Last Name", "Gender",
+    "Date of Birth", "Nationality", "Country of Residence", "Phone Number",
+    "Email Address", "Home Address", "City", "State", "Zip Code", "University",
+    "Current GPA / CGPA", "Previous GPA (historic tracking)", "Credits Completed",
+    "Credits Remaining", "Courses Enrolled Per Semester", "Course Codes",
+    "Course Units", "Technical Skills", "Soft Skills", "Research Interests",
+    "Professional Interests", "Hobbies", "Preferred Learning Style",
+    "Study Partners Preferences", "Preferred Study Hours",
+    "CS and Data Science Interests", "Strong Computing Fields", "Weak Computing Fields"
+]
 
+DEFAULT_N = 1050
+DEFAULT_SEED = 42
+# Rows per random stream and per write; changing it changes the generated data
+BLOCK_SIZE = 10_000
 
-def pick_multiple(pool, min_n=1, max_n=4, sep=", "):
-    return sep.join(random.sample(pool, k=random.randint(min_n, min(max_n, len(pool)))))
+PHONE_PREFIXES = ["70", "71", "72", "74", "75", "76", "77", "78", "79"]
+EMAIL_DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "co.ug", "mail.com"]
+EMAIL_SEPARATORS = [".", "_", ""]
+ADDRESS_KINDS = ["Plot", "Road", "Street", "Avenue"]
+ADDRESS_AREAS = ["Central", "Upper", "Lower", ""]
 
+# Lookup tables, so per-row formatting is just indexing and concatenation
+DATES_OF_BIRTH = np.array(
+    [f"{y}-{m:02d}-{d:02d}" for y in range(1998, 2007) for m in range(1, 13) for d in range(1, 29)], dtype=object
+)
+DIGITS_3 = np.array([f"{i:03d}" for i in range(1000)], dtype=object)
+DIGITS_1 = np.array([str(i) for i in range(10)], dtype=object)
 
-def pick_one(pool):
-    return random.choice(pool)
 
+def _strings(values):
+    return np.array(values, dtype=object)
 
-def main():
-    out_dir = Path(__file__).resolve().parent.parent / "public"
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "ugandan_students_dataset_1050.csv"
 
+def _lower_names(values):
+    return _strings([v.lower().replace(" ", "") for v in values])
+
+
+# --- unique registration numbers ----------------------------------------------
+
+FEISTEL_ROUNDS = 4
+_MIX_1 = np.uint64(0x9E3779B97F4A7C15)
+_MIX_2 = np.uint64(0xBF58476D1CE4E5B9)
+
+
+def permutation_keys(seed):
+    """Round keys of the registration-number permutation (shared by all blocks)."""
+    return np.random.SeedSequence(seed).generate_state(FEISTEL_ROUNDS, dtype=np.uint64)
+
+
+def _feistel(x, half_bits, keys):
+    """Balanced Feistel network on 2 * half_bits-bit integers: a bijection for any round function."""
+    mask = np.uint64((1 << half_bits) - 1)
+    shift = np.uint64(half_bits)
+    left, right = x >> shift, x & mask
+    for key in keys:
+        f = (right ^ key) * _MIX_1
+        f ^= f >> np.uint64(29)
+        f *= _MIX_2
+        f ^= f >> np.uint64(32)
+        left, right = right, left ^ (f & mask)
+    return (left << shift) | right
+
+
+def permute(index, domain, keys):
+    """Map distinct indices in [0, domain) to distinct pseudo-random values in [0, domain)."""
+    half_bits = (max(2, (domain - 1).bit_length()) + 1) // 2
+    x = _feistel(np.asarray(index, dtype=np.uint64), half_bits, keys)
+    # Cycle-walk: the network permutes up to 4x the domain, so re-apply it to values
+    # outside [0, domain) until they land inside (one or two rounds on average)
+    outside = x >= np.uint64(domain)
+    while outside.any():
+        x[outside] = _feistel(x[outside], half_bits, keys)
+        outside = x >= np.uint64(domain)
+    return x
+
+
+def registration_digits(n):
+    """Digits after the "22" prefix: 6 as before, more once n exceeds the 900,000 6-digit numbers."""
+    digits = 6
+    while 9 * 10 ** (digits - 1) < n:
+        digits += 1
+    return digits
+
+
+# --- column sampling -----------------------------------------------------------
+
+def pick_one(rng, pool, n):
+    return _strings(pool)[rng.integers(0, len(pool), n)]
+
+
+def pick_multiple(rng, pool, counts, sep=", "):
+    """Per row, counts[i] distinct items of pool (random order) joined with sep, like random.sample."""
+    pool = _strings(pool)
+    width = int(counts.max()) if len(counts) else 0
+    order = np.argsort(rng.random((len(counts), len(pool))), axis=1)[:, :width]
+    picked = pool[order]
+    out = picked[:, 0].copy()
+    for j in range(1, width):
+        more = counts > j
+        out[more] = out[more] + sep + picked[more, j]
+    return out
+
+
+def pick_count(rng, pool, n, min_n, max_n):
+    return rng.integers(min_n, min(max_n, len(pool)) + 1, n)
+
+
+def generate_block(seed, block, n_total, keys):
+    """Columns (in COLUMNS order, as lists) for rows block * BLOCK_SIZE + 1 ... of n_total."""
+    start = block * BLOCK_SIZE
+    n = min(BLOCK_SIZE, n_total - start)
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block,)))
+    row_numbers = np.arange(start + 1, start + n + 1)
+
+    male = rng.random(n) < 0.5
+    gender = np.where(male, "Male", "Female").astype(object)
+    male_idx = rng.integers(0, len(MALE_FIRST_NAMES), n)
+    female_idx = rng.integers(0, len(FEMALE_FIRST_NAMES), n)
+    first_name = np.where(male, _strings(MALE_FIRST_NAMES)[male_idx], _strings(FEMALE_FIRST_NAMES)[female_idx])
+    first_lower = np.where(male, _lower_names(MALE_FIRST_NAMES)[male_idx], _lower_names(FEMALE_FIRST_NAMES)[female_idx])
+    last_idx = rng.integers(0, len(SURNAMES), n)
+    last_name = _strings(SURNAMES)[last_idx]
+    middle_name = np.where(rng.random(n) > 0.4, pick_one(rng, MALE_FIRST_NAMES + FEMALE_FIRST_NAMES, n), "").astype(object)
+
+    digits = registration_digits(n_total)
+    low = 10 ** (digits - 1)
+    reg_numbers = permute(row_numbers - 1, 9 * low, keys) + np.uint64(low)
+    reg = "22" + reg_numbers.astype(str).astype(object)
+
+    dob = DATES_OF_BIRTH[rng.integers(0, len(DATES_OF_BIRTH), n)]
+    phone_digits = rng.integers(0, 10_000_000, n)
+    phone = ("+256 " + pick_one(rng, PHONE_PREFIXES, n) + " " + DIGITS_3[phone_digits // 10_000] + " "
+             + DIGITS_3[phone_digits // 10 % 1000] + " " + DIGITS_1[phone_digits % 10])
+
+    city_idx = rng.integers(0, len(CITIES_STATES), n)
+    city = _strings([c for c, _ in CITIES_STATES])[city_idx]
+    state = _strings([s for _, s in CITIES_STATES])[city_idx]
+    university = pick_one(rng, UNIVERSITIES, n)
+    email = (first_lower + pick_one(rng, EMAIL_SEPARATORS, n) + _lower_names(SURNAMES)[last_idx]
+             + row_numbers.astype(str).astype(object) + "@" + pick_one(rng, EMAIL_DOMAINS, n))
+
+    credits_done = rng.integers(15, 131, n)
+    credits_remain = rng.integers(0, 111, n)
+    n_courses = rng.integers(3, 7, n)
+    course_codes = pick_multiple(rng, COURSE_CODES_POOL, n_courses)
+    course_units = rng.integers(9, 23, n)
+
+    gpa = np.round(rng.uniform(2.2, 4.0, n), 2)
+    prev_gpa = np.where(rng.random(n) > 0.3, np.round(rng.uniform(2.0, 4.0, n), 2).astype(object), "None")
+
+    tech_skills = pick_multiple(rng, TECH_SKILLS_POOL, pick_count(rng, TECH_SKILLS_POOL, n, 2, 8))
+    soft_skills = pick_multiple(rng, SOFT_SKILLS_POOL, pick_count(rng, SOFT_SKILLS_POOL, n, 2, 6))
+    research = pick_multiple(rng, RESEARCH_POOL, pick_count(rng, RESEARCH_POOL, n, 1, 4))
+    professional = pick_multiple(rng, PROFESSIONAL_POOL, pick_count(rng, PROFESSIONAL_POOL, n, 1, 4))
+    hobbies = pick_multiple(rng, HOBBIES_POOL, pick_count(rng, HOBBIES_POOL, n, 1, 6))
+    learning = pick_one(rng, LEARNING_STYLES, n)
+    partner_pref = pick_one(rng, PARTNER_PREFS, n)
+    study_hrs = pick_one(rng, STUDY_HOURS, n)
+    cs_interests = pick_multiple(rng, CS_INTERESTS_POOL, pick_count(rng, CS_INTERESTS_POOL, n, 1, 5))
+    strong_fields = pick_multiple(rng, STRONG_FIELDS_POOL, pick_count(rng, STRONG_FIELDS_POOL, n, 1, 4))
+    weak_fields = pick_multiple(rng, WEAK_FIELDS_POOL, pick_count(rng, WEAK_FIELDS_POOL, n, 1, 3))
+
+    # Address and zip (use district code as zip for Uganda)
+    zip_code = rng.integers(10000, 100000, n).astype(str).astype(object)
+    address = (rng.integers(1, 1000, n).astype(str).astype(object) + " " + pick_one(rng, ADDRESS_KINDS, n)
+               + " " + pick_one(rng, ADDRESS_AREAS, n) + " " + city)
+
+    uganda = np.full(n, "Uganda", dtype=object)
     columns = [
-        "Registration Number", "First Name", "Middle Name", "Last Name", "Gender",
-        "Date of Birth", "Nationality", "Country of Residence", "Phone Number",
-        "Email Address", "Home Address", "City", "State", "Zip Code", "University",
-        "Current GPA / CGPA", "Previous GPA (historic tracking)", "Credits Completed",
-        "Credits Remaining", "Courses Enrolled Per Semester", "Course Codes",
-        "Course Units", "Technical Skills", "Soft Skills", "Research Interests",
-        "Professional Interests", "Hobbies", "Preferred Learning Style",
-        "Study Partners Preferences", "Preferred Study Hours",
-        "CS and Data Science Interests", "Strong Computing Fields", "Weak Computing Fields"
+        reg, first_name, middle_name, last_name, gender, dob,
+        uganda, uganda, phone, email, address, city, state, zip_code,
+        university, gpa, prev_gpa, credits_done, credits_remain, n_courses,
+        course_codes, course_units, tech_skills, soft_skills, research,
+        professional, hobbies, learning, partner_pref, study_hrs, cs_interests,
+        strong_fields, weak_fields
     ]
+    return [c.tolist() for c in columns]
+
+
+def block_count(n):
+    return (n + BLOCK_SIZE - 1) // BLOCK_SIZE
+
+
+def generate_students(n, seed=DEFAULT_SEED, blocks=None):
+    """Yield the dataset (or only the given block numbers) block by block, each as a list of columns."""
+    keys = permutation_keys(seed)
+    for block in blocks if blocks is not None else range(block_count(n)):
+        yield generate_block(seed, block, n, keys)
+
+
+def write_csv(out_path, n, seed=DEFAULT_SEED, blocks=None):
+    """Write the header and the given blocks (default: all). Returns (rows, bytes, crc32) of the file."""
+    rows = size = crc = 0
+    with open(out_path, "wb") as f:
+        buffer = io.StringIO(newline="")
+        writer = csv.writer(buffer)
+        writer.writerow(COLUMNS)
+        for columns in generate_students(n, seed, blocks):
+            writer.writerows(zip(*columns))
+            rows += len(columns[0])
+            data = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            f.write(data)
+            size += len(data)
+            crc = zlib.crc32(data, crc)
+        if not size:  # n == 0: header only
+            data = buffer.getvalue().encode("utf-8")
+            f.write(data)
+            size, crc = len(data), zlib.crc32(data)
+    return rows, size, crc
+
+
+def file_crc32(path):
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def write_parquet(out_path, n, seed=DEFAULT_SEED, blocks=None):
+    """Parquet counterpart of write_csv; returns (rows, bytes, crc32) of the file."""
+    with student_parquet.ParquetStudentWriter(out_path, COLUMNS) as writer:
+        for columns in generate_students(n, seed, blocks):
+            writer.write_columns(columns)
+    return writer.rows, Path(out_path).stat().st_size, file_crc32(out_path)
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet}
+
+
+def shard_blocks(n, shards):
+    """Split the block numbers into at most `shards` contiguous, near-equal ranges."""
+    total = block_count(n)
+    shards = max(1, min(shards, total))
+    return [range(total * i // shards, total * (i + 1) // shards) for i in range(shards)]
+
+
+def write_shards(shard_dir, n, seed=DEFAULT_SEED, shards=os.cpu_count() or 1, workers=None, fmt="csv"):
+    """Write one file per shard on a process pool, then manifest.json; returns the manifest."""
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    ranges = shard_blocks(n, shards)
+    names = [f"part-{i:05d}.{fmt}" for i in range(len(ranges))]
+    with ProcessPoolExecutor(max_workers=workers or min(len(ranges), os.cpu_count() or 1)) as pool:
+        futures = [pool.submit(WRITERS[fmt], shard_dir / name, n, seed, blocks) for name, blocks in zip(names, ranges)]
+        entries = []
+        for name, blocks, future in zip(names, ranges, futures):
+            rows, size, crc = future.result()
+            entries.append({
+                "file": name, "first_row": blocks.start * BLOCK_SIZE + 1,
+                "rows": rows, "bytes": size, "crc32": crc,
+            })
+    manifest = {"n": n, "seed": seed, "format": fmt, "block_size": BLOCK_SIZE, "columns": COLUMNS, "shards": entries}
+    with open(shard_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def concat_shards(shard_dir, out_path):
+    """Join the shards listed in shard_dir/manifest.json into one file (a single CSV header)."""
+    with open(shard_dir / "manifest.json", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") == "parquet":
+        student_parquet.concat_parquet([shard_dir / shard["file"] for shard in manifest["shards"]], out_path)
+        return out_path
+    with open(out_path, "wb") as out:
+        for i, shard in enumerate(manifest["shards"]):
+            with open(shard_dir / shard["file"], "rb") as f:
+                if i:
+                    f.readline()  # header
+                shutil.copyfileobj(f, out, 1 << 20)
+    return out_path
+
 
-    n = 1050
-    used_emails = set()
-    used_reg = set()
-
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(columns)
-
-        for i in range(1, n + 1):
-            gender = pick_one(["Male", "Female"])
-            first_name = pick_one(MALE_FIRST_NAMES if gender == "Male" else FEMALE_FIRST_NAMES)
-            last_name = pick_one(SURNAMES)
-            middle_name = pick_one(MALE_FIRST_NAMES + FEMALE_FIRST_NAMES) if random.random() > 0.4 else ""
-
-            # Unique registration number (e.g. 22XXXXXX style)
-            while True:
-                reg = f"22{random.randint(100000, 999999)}"
-                if reg not in used_reg:
-                    used_reg.add(reg)
-                    break
-
-            dob = random_date_of_birth()
-            city, state = pick_one(CITIES_STATES)
-            university = pick_one(UNIVERSITIES)
-            email = random_email(first_name, last_name, i)
-            while email in used_emails:
-                email = random_email(first_name, last_name, i + n + random.randint(1, 999))
-            used_emails.add(email)
-
-            credits_done = random.randint(15, 130)
-            credits_remain = random.randint(0, 110)
-            n_courses = random.randint(3, 6)
-            course_codes = pick_multiple(COURSE_CODES_POOL, n_courses, n_courses)
-            course_units = random.randint(9, 22)
-
-            gpa = round(random.uniform(2.2, 4.0), 2)
-            prev_gpa = round(random.uniform(2.0, 4.0), 2) if random.random() > 0.3 else "None"
-
-            tech_skills = pick_multiple(TECH_SKILLS_POOL, 2, 8)
-            soft_skills = pick_multiple(SOFT_SKILLS_POOL, 2, 6)
-            research = pick_multiple(RESEARCH_POOL, 1, 4)
-            professional = pick_multiple(PROFESSIONAL_POOL, 1, 4)
-            hobbies = pick_multiple(HOBBIES_POOL, 1, 6)
-            learning = pick_one(LEARNING_STYLES)
-            partner_pref = pick_one(PARTNER_PREFS)
-            study_hrs = pick_one(STUDY_HOURS)
-            cs_interests = pick_multiple(CS_INTERESTS_POOL, 1, 5)
-            strong_fields = pick_multiple(STRONG_FIELDS_POOL, 1, 4)
-            weak_fields = pick_multiple(WEAK_FIELDS_POOL, 1, 3)
-
-            # Address and zip (use district code as zip for Uganda)
-            zip_code = str(random.randint(10000, 99999))
-            address = f"{random.randint(1, 999)} {pick_one(['Plot', 'Road', 'Street', 'Avenue'])} {pick_one(['Central', 'Upper', 'Lower', ''])} {city}"
-
-            row = [
-                reg, first_name, middle_name, last_name, gender, dob,
-                "Uganda", "Uganda", random_phone(), email, address, city, state, zip_code,
-                university, gpa, prev_gpa, credits_done, credits_remain, n_courses,
-                course_codes, course_units, tech_skills, soft_skills, research,
-                professional, hobbies, learning, partner_pref, study_hrs, cs_interests,
-                strong_fields, weak_fields
-            ]
-            writer.writerow(row)
-
-    print(f"Generated {n} Ugandan students -> {out_path}")
+def main():
+    public_dir = Path(__file__).resolve().parent.parent / "public"
+    parser = argparse.ArgumentParser(description="Generate a synthetic Ugandan students CSV")
+    parser.add_argument("--n", type=int, default=DEFAULT_N, help=f"Number of students (default: {DEFAULT_N})")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"Random seed (default: {DEFAULT_SEED})")
+    parser.add_argument("--output", type=Path,
+                        help="Output file (default: public/ugandan_students_dataset_<n>.<format>)")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="csv",
+                        help="csv (default) or parquet (typed, list and dictionary columns, zstd; needs pyarrow)")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Write this many shard CSVs in parallel, plus manifest.json (default: 1, a single CSV)")
+    parser.add_argument("--workers", type=int, help="Worker processes for --shards (default: one per core)")
+    parser.add_argument("--shard-dir", type=Path, help="Directory for --shards (default: <output>_shards)")
+    parser.add_argument("--concat", action="store_true", help="With --shards: also join the shards into --output")
+    args = parser.parse_args()
+
+    if args.format == "parquet":
+        student_parquet.require_pyarrow()
+    out_path = args.output or public_dir / f"ugandan_students_dataset_{args.n}.{args.format}"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    if args.shards > 1:
+        shard_dir = args.shard_dir or out_path.with_name(out_path.stem + "_shards")
+        manifest = write_shards(shard_dir, args.n, args.seed, args.shards, args.workers, args.format)
+        target = shard_dir / "manifest.json"
+        if args.concat:
+            target = concat_shards(shard_dir, out_path)
+        where = f"{len(manifest['shards'])} shards -> {target}"
+    else:
+        WRITERS[args.format](out_path, args.n, args.seed)
+        where = out_path
+    elapsed = time.perf_counter() - t0
+    print(f"Generated {args.n} Ugandan students -> {where} ({elapsed:.1f}s, {args.n / elapsed:,.0f} rows/s)")
     return out_path
 
 
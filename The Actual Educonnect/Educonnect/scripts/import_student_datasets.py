@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Bulk-load the generated student datasets into the EduConnect SQLite DB.
+
+Python counterpart of `npm run seed` (server/seed.js) for large files:
+
+- Streams each CSV (no full file in memory) and writes rows with executemany
+  inside large transactions.
+- Upserts into dataset_students using the same ids as seed.js
+  (dataset_<source>_<row index>), so re-imports are idempotent. Rows left over
+  from a previous, longer import of the same source are removed.
+- Normalizes the comma-separated columns (skills, interests, course codes, ...)
+  into lookup tables:
+
+    dataset_lookup_values(id, field, value)        one row per distinct value
+    dataset_student_values(student_id, value_id)   one row per student/value pair
+
+- Drops secondary indexes before the load and rebuilds them afterwards.
+- Keeps SQLite's rollback journal and synchronous=NORMAL, because the default --db is
+  the live server database. --unsafe-fast turns both off (synchronous=OFF, in-memory
+  journal) for throwaway or freshly created files only: a crash mid-commit can then
+  corrupt the whole file, not just dataset_students.
+- Also reads the Parquet output of the generator / expanders (--format parquet), loading
+  only the mapped columns; list columns are joined back into the stored text form.
+
+Run from the Educonnect root:
+
+    python scripts/import_student_datasets.py
+    python scripts/import_student_datasets.py --file public/us_students_dataset_1500_extended.csv:us_ext
+    python scripts/import_student_datasets.py --db /tmp/load_test.db --commit-every 200000 --unsafe-fast
+    python scripts/import_student_datasets.py --file public/ugandan_students_dataset_1050_extended.parquet:ug_ext
+"""
+
+import argparse
+import csv
+import json
+import random
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import student_parquet
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DB_PATH = BASE_DIR / "server" / "educonnect.db"
+PUBLIC_DIR = BASE_DIR / "public"
+
+DEFAULT_FILES = [
+    (PUBLIC_DIR / "us_students_dataset_1500_extended.csv", "us_ext"),
+    (PUBLIC_DIR / "ugandan_students_dataset_1050_extended.csv", "ug_ext"),
+]
+
+STUDY_STATS_POOL_SIZE = 4096  # power of two; see BulkImporter.import_file
+MULTI_VALUE_CACHE_SIZE = 200_000
+
+# CSV header -> dataset_students column (same mapping as server/seed.js)
+CSV_TO_COLUMN = {
+    "Registration Number": "registration_number",
+    "First Name": "first_name",
+    "Middle Name": "middle_name",
+    "Last Name": "last_name",
+    "Gender": "gender",
+    "Date of Birth": "date_of_birth",
+    "Nationality": "nationality",
+    "Country of Residence": "country_of_residence",
+    "Phone Number": "phone_number",
+    "Email Address": "email",
+    "Home Address": "home_address",
+    "City": "city",
+    "State": "state",
+    "Zip Code": "zip_code",
+    "University": "university",
+    "Degree Program": "degree_program",
+    "Current GPA / CGPA": "current_gpa",
+    "Credits Completed": "credits_completed",
+    "Credits Remaining": "credits_remaining",
+    "Courses Enrolled Per Semester": "courses_enrolled",
+    "Course Codes": "course_codes",
+    "Course Units": "course_units",
+    "Technical Skills": "technical_skills",
+    "Soft Skills": "soft_skills",
+    "Research Interests": "research_interests",
+    "Professional Interests": "professional_interests",
+    "Hobbies": "hobbies",
+    "Preferred Learning Style": "preferred_learning_style",
+    "Study Partners Preferences": "study_partners_preferences",
+    "Preferred Study Hours": "preferred_study_hours",
+    "CS and Data Science Interests": "cs_interests",
+    "Strong Computing Fields": "strong_computing_fields",
+    "Weak Computing Fields": "weak_computing_fields",
+}
+DATA_COLUMNS = list(CSV_TO_COLUMN.values())
+
+# Comma-separated columns normalized into dataset_lookup_values
+MULTI_VALUE_COLUMNS = [
+    "course_codes", "technical_skills", "soft_skills", "research_interests",
+    "professional_interests", "hobbies", "cs_interests",
+    "strong_computing_fields", "weak_computing_fields",
+]
+
+# Built after the load; dropped first so inserts don't maintain them row by row
+DEFERRED_INDEXES = {
+    "idx_dataset_students_source": "CREATE INDEX IF NOT EXISTS idx_dataset_students_source ON dataset_students(source)",
+    "idx_dataset_students_university": "CREATE INDEX IF NOT EXISTS idx_dataset_students_university ON dataset_students(university)",
+    "idx_dataset_student_values_value": "CREATE INDEX IF NOT EXISTS idx_dataset_student_values_value ON dataset_student_values(value_id, student_id)",
+}
+
+# Same shape as server/db.js so a fresh DB file is usable by the Node server
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dataset_students (
+  id TEXT PRIMARY KEY,
+  source TEXT,
+  registration_number TEXT,
+  first_name TEXT,
+  middle_name TEXT,
+  last_name TEXT,
+  gender TEXT,
+  date_of_birth TEXT,
+  nationality TEXT,
+  country_of_residence TEXT,
+  phone_number TEXT,
+  email TEXT,
+  home_address TEXT,
+  city TEXT,
+  state TEXT,
+  zip_code TEXT,
+  university TEXT,
+  degree_program TEXT,
+  current_gpa TEXT,
+  credits_completed TEXT,
+  credits_remaining TEXT,
+  courses_enrolled TEXT,
+  course_codes TEXT,
+  course_units TEXT,
+  technical_skills TEXT,
+  soft_skills TEXT,
+  research_interests TEXT,
+  professional_interests TEXT,
+  hobbies TEXT,
+  preferred_learning_style TEXT,
+  study_partners_preferences TEXT,
+  preferred_study_hours TEXT,
+  cs_interests TEXT,
+  strong_computing_fields TEXT,
+  weak_computing_fields TEXT,
+  study_stats TEXT
+);
+CREATE TABLE IF NOT EXISTS dataset_lookup_values (
+  id INTEGER PRIMARY KEY,
+  field TEXT NOT NULL,
+  value TEXT NOT NULL,
+  UNIQUE (field, value)
+);
+CREATE TABLE IF NOT EXISTS dataset_student_values (
+  student_id TEXT NOT NULL,
+  value_id INTEGER NOT NULL,
+  PRIMARY KEY (student_id, value_id)
+) WITHOUT ROWID;
+"""
+
+UPSERT_SQL = (
+    f"INSERT INTO dataset_students (id, source, {', '.join(DATA_COLUMNS)}, study_stats) "
+    f"VALUES ({', '.join('?' * (len(DATA_COLUMNS) + 3))}) "
+    # study_stats is only set on first insert so re-imports keep accumulated stats
+    f"ON CONFLICT(id) DO UPDATE SET source = excluded.source, "
+    + ", ".join(f"{c} = excluded.{c}" for c in DATA_COLUMNS)
+)
+
+
+def split_multi_value(s: str) -> List[str]:
+    if not s:
+        return []
+    return [p.strip() for p in s.split(",") if p.strip()]
+
+
+def random_study_stats(rng: random.Random) -> str:
+    """Same ranges as randomStudyStats() in server/seed.js."""
+    return json.dumps({
+        "totalHours": rng.randint(50, 249),
+        "weeklyHours": [rng.randint(2, 9) for _ in range(7)],
+        "sessionsCompleted": rng.randint(20, 119),
+        "studyProgress": rng.randint(10, 89),
+    })
+
+
+def iter_csv_rows(path: Path) -> Iterator[List[str]]:
+    """Yield rows as lists in DATA_COLUMNS order (missing CSV columns become '')."""
+    with path.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        positions = {h.strip(): i for i, h in enumerate(header)}
+        picks = [positions.get(h) for h in CSV_TO_COLUMN]
+        for record in reader:
+            if not record:
+                continue
+            n = len(record)
+            yield [record[i] if i is not None and i < n else "" for i in picks]
+
+
+def iter_parquet_rows(path: Path, batch_size: int = 10_000) -> Iterator[List[str]]:
+    """iter_csv_rows for a student Parquet file: same row shape, reading only the mapped columns."""
+    student_parquet.require_pyarrow()
+    parquet = student_parquet.pq.ParquetFile(str(path))
+    present = [h for h in CSV_TO_COLUMN if h in parquet.schema_arrow.names]
+    pa, pc = student_parquet.pa, student_parquet.pc
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=present):
+        by_name = {}
+        for name, column in zip(present, batch.columns):
+            if name in student_parquet.LIST_COLUMNS:
+                column = pc.binary_join(column, ", ")
+            elif pa.types.is_floating(column.type):
+                # Arrow prints 4.0 as "4"; keep Python's text, as in the CSV
+                by_name[name] = ["" if v is None else str(v) for v in column.to_pylist()]
+                continue
+            elif pa.types.is_dictionary(column.type):
+                column = column.dictionary_decode()
+            by_name[name] = pc.fill_null(column.cast(pa.string()), "").to_pylist()
+        blank = [""] * batch.num_rows
+        yield from zip(*(by_name.get(h, blank) for h in CSV_TO_COLUMN))
+
+
+def iter_rows(path: Path) -> Iterator[List[str]]:
+    return iter_parquet_rows(path) if path.suffix == ".parquet" else iter_csv_rows(path)
+
+
+def set_bulk_pragmas(conn: sqlite3.Connection, unsafe: bool = False) -> None:
+    # Session-only settings; the file stays in rollback-journal mode so sql.js can still open it.
+    if unsafe:
+        # No durability: only for files that can be thrown away (see --unsafe-fast)
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA journal_mode = MEMORY")
+    else:
+        conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -200000")
+
+
+def load_lookup_ids(conn: sqlite3.Connection) -> Tuple[Dict[Tuple[str, str], int], int]:
+    ids = {(f, v): i for i, f, v in conn.execute("SELECT id, field, value FROM dataset_lookup_values")}
+    return ids, max(ids.values(), default=0)
+
+
+class BulkImporter:
+    def __init__(self, conn: sqlite3.Connection, commit_every: int = 100_000, batch_size: int = 10_000, seed: int = 42):
+        self.conn = conn
+        self.commit_every = commit_every
+        self.batch_size = batch_size
+        rng = random.Random(seed)
+        # Drawing from a pre-encoded pool is much cheaper than randint + json.dumps per row
+        self.stats_pool = [random_study_stats(rng) for _ in range(STUDY_STATS_POOL_SIZE)]
+        self.lookup_ids, self.last_lookup_id = load_lookup_ids(conn)
+        self.multi_positions = [(c, DATA_COLUMNS.index(c)) for c in MULTI_VALUE_COLUMNS]
+        # (field, raw cell) -> value ids; generated datasets repeat the same cells constantly
+        self.value_ids_cache: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+
+    def value_ids(self, field: str, raw: str, new_values: List[Tuple[int, str, str]]) -> Tuple[int, ...]:
+        """Lookup ids for a comma-separated cell, registering unseen values in new_values."""
+        key = (field, raw)
+        ids = self.value_ids_cache.get(key)
+        if ids is not None:
+            return ids
+        out = []
+        for item in split_multi_value(raw):
+            value_id = self.lookup_ids.get((field, item))
+            if value_id is None:
+                self.last_lookup_id += 1
+                value_id = self.lookup_ids[(field, item)] = self.last_lookup_id
+                new_values.append((value_id, field, item))
+            out.append(value_id)
+        ids = tuple(dict.fromkeys(out))
+        if len(self.value_ids_cache) >= MULTI_VALUE_CACHE_SIZE:
+            self.value_ids_cache.clear()
+        self.value_ids_cache[key] = ids
+        return ids
+
+    def import_file(self, path: Path, source: str) -> int:
+        prefix = f"dataset_{source}_"
+        students: List[tuple] = []
+        links: List[Tuple[str, int]] = []
+        new_values: List[Tuple[int, str, str]] = []
+        total = 0
+        since_commit = 0
+        pool = self.stats_pool
+        pool_mask = len(pool) - 1
+
+        self.conn.execute("BEGIN")
+        # Only a re-import has old link rows to clear
+        replacing = self.conn.execute("SELECT 1 FROM dataset_students WHERE source = ? LIMIT 1", (source,)).fetchone() is not None
+        for index, values in enumerate(iter_rows(path)):
+            student_id = f"{prefix}{index}"
+            # Multiplicative hash of the row index: deterministic per id, spread across the pool
+            students.append((student_id, source, *values, pool[(index * 2654435761) & pool_mask]))
+            for field, pos in self.multi_positions:
+                for value_id in self.value_ids(field, values[pos], new_values):
+                    links.append((student_id, value_id))
+            total += 1
+            since_commit += 1
+            if len(students) >= self.batch_size:
+                self._write(students, links, new_values, replacing)
+                students, links, new_values = [], [], []
+            if since_commit >= self.commit_every:
+                self.conn.execute("COMMIT")
+                self.conn.execute("BEGIN")
+                since_commit = 0
+        self._write(students, links, new_values, replacing)
+        self._prune(source, prefix, total)
+        self.conn.execute("COMMIT")
+        return total
+
+    def _write(self, students, links, new_values, replacing) -> None:
+        if not students:
+            return
+        cur = self.conn.cursor()
+        cur.executemany("INSERT INTO dataset_lookup_values (id, field, value) VALUES (?, ?, ?)", new_values)
+        new_values.clear()
+        cur.executemany(UPSERT_SQL, students)
+        if replacing:
+            # Links are rebuilt per student so changed multi-value columns don't leave stale pairs
+            cur.executemany("DELETE FROM dataset_student_values WHERE student_id = ?", [(s[0],) for s in students])
+        cur.executemany("INSERT INTO dataset_student_values (student_id, value_id) VALUES (?, ?)", links)
+
+    def _prune(self, source: str, prefix: str, count: int) -> None:
+        """Remove rows of this source beyond the current file length (left from a longer import)."""
+        stale = "source = ? AND CAST(substr(id, ?) AS INTEGER) >= ?"
+        params = (source, len(prefix) + 1, count)
+        self.conn.execute(
+            f"DELETE FROM dataset_student_values WHERE student_id IN (SELECT id FROM dataset_students WHERE {stale})",
+            params,
+        )
+        self.conn.execute(f"DELETE FROM dataset_students WHERE {stale}", params)
+
+
+def parse_file_arg(value: str) -> Tuple[Path, str]:
+    """'path/to.csv:source' -> (Path, source); source defaults to the file stem."""
+    path, _, source = value.rpartition(":") if ":" in value else (value, "", "")
+    path = Path(path)
+    if not path.is_absolute():
+        path = BASE_DIR / path
+    return path, source or path.stem
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-import student CSVs into dataset_students.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite file (default: server/educonnect.db)")
+    parser.add_argument("--file", action="append", type=parse_file_arg, dest="files",
+                        help="CSV or Parquet file to import as path[:source]; repeatable (default: both *_extended.csv files)")
+    parser.add_argument("--commit-every", type=int, default=100_000, help="rows per transaction")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="rows per executemany call")
+    parser.add_argument("--unsafe-fast", action="store_true",
+                        help="synchronous=OFF and an in-memory journal; a crash can corrupt the whole DB, "
+                             "so only use it on a throwaway or new --db")
+    args = parser.parse_args()
+
+    files = args.files or DEFAULT_FILES
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    try:
+        set_bulk_pragmas(conn, unsafe=args.unsafe_fast)
+        conn.executescript(SCHEMA)
+        for name in DEFERRED_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+        importer = BulkImporter(conn, commit_every=args.commit_every, batch_size=args.batch_size)
+        started = time.perf_counter()
+        total = 0
+        for path, source in files:
+            if not path.exists():
+                print(f"Skipping {path}: not found")
+                continue
+            t0 = time.perf_counter()
+            n = importer.import_file(path, source)
+            elapsed = time.perf_counter() - t0
+            total += n
+            print(f"Imported {n} rows from {path.name} (source={source}) in {elapsed:.2f}s ({n / max(elapsed, 1e-9):,.0f} rows/s)")
+
+        t0 = time.perf_counter()
+        for sql in DEFERRED_INDEXES.values():
+            conn.execute(sql)
+        conn.execute("PRAGMA analysis_limit = 1000")
+        conn.execute("ANALYZE")
+        print(f"Built indexes in {time.perf_counter() - t0:.2f}s")
+        elapsed = time.perf_counter() - started
+        print(f"Total: {total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/s) -> {args.db}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
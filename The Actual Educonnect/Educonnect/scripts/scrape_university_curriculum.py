@@ -32,23 +32,61 @@ in public/university_curriculum*.json:
   ...
 ]
 
+Programme pages are fetched concurrently (--workers threads) through one shared
+requests.Session, so connections are kept alive and reused. Requests are bounded per host
+(--per-host in flight, started at least --interval seconds apart), and connection errors,
+timeouts, 429 and 5xx responses are retried with jittered exponential backoff (--retries).
+Output keeps the order of the programme list, whatever order the pages arrive in.
+
+The interval, not --per-host, is what usually caps throughput: at the default 0.1s a host
+gets at most 10 requests/s, so N pages take at least N / 10 seconds. --per-host only
+becomes the limit once the server's response time exceeds per-host x interval (0.4s at
+the defaults). Example against curriculum_fixture_server.py (120 pages, 0.2s latency,
+a 503 every 17th request): sequential 31.7s, defaults 13.0s (peak 3 in flight),
+--interval 0.05 8.2s (peak 4). Lower the interval only for hosts that can take it.
+
+Responses are cached on disk per URL (--cache, default .cache/curriculum_http.json) with
+their ETag / Last-Modified, a SHA-256 of the body and the entry parsed from them. Re-runs
+send conditional requests (If-None-Match / If-Modified-Since). A 304, or a 200 whose body
+hash is unchanged, reuses the cached entry, so only pages that changed are parsed again.
+--refresh ignores the cache for one run (and rewrites it), --no-cache turns it off.
+
+Run from Educonnect root:
+  python scripts/scrape_university_curriculum.py
+  python scripts/scrape_university_curriculum.py --refresh   # re-download and re-parse everything
+  python scripts/scrape_university_curriculum.py --workers 1 --per-host 1 --interval 1   # gentle
+  # Against local fixture pages (see curriculum_fixture_server.py):
+  python scripts/scrape_university_curriculum.py --mak-base http://127.0.0.1:8765 --skip-ucu --output /tmp/curriculum.json
+
 NOTE: This is a best-effort scraper. The university websites can change; if they
 do, you may need to adjust the selectors below.
 """
 
+import argparse
+import hashlib
 import json
+import os
+import random
 import re
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 OUTPUT_PATH = BASE_DIR / "public" / "university_curriculum.json"
+CACHE_PATH = BASE_DIR / ".cache" / "curriculum_http.json"
+# Bump when a parse_* function changes what it returns, so cached entries are re-parsed
+PARSER_VERSION = 1
 
 MAK_PROGRAMS_URL = "https://courses.mak.ac.ug/programs"
 MAK_BASE = "https://courses.mak.ac.ug"
@@ -63,6 +101,17 @@ UCU_SITES = {
     "School of Education": "https://educ.ucu.ac.ug/",
 }
 
+# Politeness / concurrency defaults (per host: at most PER_HOST requests in flight,
+# started at least MIN_INTERVAL seconds apart, i.e. at most 1 / MIN_INTERVAL requests/s)
+WORKERS = 8
+PER_HOST = 4
+MIN_INTERVAL = 0.1
+RETRIES = 3
+BACKOFF = 0.5
+TIMEOUT = 30
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+USER_AGENT = "EduConnect curriculum scraper (python-requests)"
+
 
 @dataclass
 class Unit:
@@ -96,15 +145,238 @@ class SemesterBlock:
         }
 
 
-def fetch(url: str) -> BeautifulSoup:
-    resp = requests.get(url, timeout=30)
-    resp.raise_for_status()
-    return BeautifulSoup(resp.text, "html.parser")
+class HostLimiter:
+    """At most `concurrency` requests in flight to one host, started `min_interval` apart."""
+
+    def __init__(self, concurrency: int, min_interval: float):
+        self.min_interval = min_interval
+        self._slots = threading.BoundedSemaphore(max(1, concurrency))
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def defer(self, seconds: float) -> None:
+        """Hold back every request to this host for `seconds` (e.g. a 429 Retry-After)."""
+        with self._lock:
+            self._next_start = max(self._next_start, time.monotonic() + seconds)
+
+    def __enter__(self) -> "HostLimiter":
+        self._slots.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._slots.release()
+
+
+class ResponseCache:
+    """
+    URL -> {"etag", "last_modified", "sha256", "context", "parsed"} in one JSON file.
+
+    "parsed" is whatever the page's parse function returned and "context" the extra input
+    it was parsed with (e.g. the programme dict); a record is only reused for the same
+    context. The whole cache is dropped when PARSER_VERSION changes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            try:
+                with self.path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == PARSER_VERSION:
+                    self._records = data.get("responses", {})
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"  ! Ignoring unreadable cache {self.path}: {e}", file=sys.stderr)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._records.get(url)
+
+    def put(self, url: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._records[url] = record
+
+    def save(self) -> None:
+        """Write atomically (temp file + rename), so an interrupted run keeps the old cache."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with self._lock:
+            data = {"version": PARSER_VERSION, "responses": self._records}
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    value = resp.headers.get("Retry-After", "")
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        # HTTP-date form is rare on these sites; fall back to exponential backoff
+        return None
+
+
+class Fetcher:
+    """
+    Shared requests.Session (keep-alive connection pool) with a HostLimiter per host and
+    retries: connection errors, timeouts and 429/5xx responses are retried up to `retries`
+    times with jittered exponential backoff (or the server's Retry-After).
+    With a ResponseCache, fetch_parsed() sends conditional requests and reuses the
+    cached parse of unchanged pages. Safe to use from several threads.
+    """
+
+    def __init__(
+        self,
+        per_host: int = PER_HOST,
+        min_interval: float = MIN_INTERVAL,
+        retries: int = RETRIES,
+        backoff: float = BACKOFF,
+        timeout: float = TIMEOUT,
+        cache: Optional[ResponseCache] = None,
+        revalidate: bool = True,
+    ):
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        # False: fetch unconditionally and re-parse (the cache is still rewritten)
+        self.revalidate = revalidate
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(1, per_host))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.requests = 0
+        self.retried = 0
+        self.not_modified = 0  # 304 answers
+        self.unchanged = 0  # 200 answers with the cached body hash
+        self.parsed = 0
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, url: str) -> HostLimiter:
+        host = urlsplit(url).netloc
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = HostLimiter(self.per_host, self.min_interval)
+            return limiter
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        limiter = self._limiter(url)
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            wait = None
+            try:
+                with limiter:
+                    with self._lock:
+                        self.requests += 1
+                    resp = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUSES or last:
+                    resp.raise_for_status()
+                    return resp
+                wait = _retry_after(resp)
+                resp.close()
+            if wait is not None:
+                limiter.defer(wait)
+            else:
+                wait = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+            with self._lock:
+                self.retried += 1
+            time.sleep(wait)
+        raise AssertionError("unreachable")
+
+    def soup(self, url: str) -> BeautifulSoup:
+        return BeautifulSoup(self.get(url).text, "html.parser")
+
+    def fetch_parsed(self, url: str, parse: Callable[[BeautifulSoup], Any], context: Any = None) -> Any:
+        """
+        parse(soup of url), reusing the cached result when the page has not changed since
+        it was parsed with the same context. Results must be JSON-serialisable.
+        """
+        record = self.cache.get(url) if self.cache is not None else None
+        if record is not None and (not self.revalidate or record.get("context") != context):
+            record = None
+        headers = {}
+        if record is not None:
+            if record.get("etag"):
+                headers["If-None-Match"] = record["etag"]
+            if record.get("last_modified"):
+                headers["If-Modified-Since"] = record["last_modified"]
+
+        resp = self.get(url, headers)
+        if record is not None and resp.status_code == 304:
+            with self._lock:
+                self.not_modified += 1
+            return record["parsed"]
+
+        digest = hashlib.sha256(resp.content).hexdigest()
+        if record is not None and record.get("sha256") == digest:
+            # Server ignored the validators (or has none) but the body is the same
+            parsed = record["parsed"]
+            with self._lock:
+                self.unchanged += 1
+        else:
+            parsed = parse(BeautifulSoup(resp.text, "html.parser"))
+            with self._lock:
+                self.parsed += 1
+        if self.cache is not None:
+            self.cache.put(url, {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "sha256": digest,
+                "context": context,
+                "parsed": parsed,
+            })
+        return parsed
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "Fetcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def fetch(url: str, fetcher: Optional[Fetcher] = None) -> BeautifulSoup:
+    if fetcher is None:
+        with Fetcher() as one_off:
+            return one_off.soup(url)
+    return fetcher.soup(url)
+
+
+def fetch_parsed(
+    url: str, parse: Callable[[BeautifulSoup], Any], fetcher: Optional[Fetcher] = None, context: Any = None
+) -> Any:
+    if fetcher is None:
+        with Fetcher() as one_off:
+            return one_off.fetch_parsed(url, parse, context)
+    return fetcher.fetch_parsed(url, parse, context)
 
 
 # -------- Makerere scraping --------
 
-def scrape_mak_program_list() -> List[Dict[str, str]]:
+def scrape_mak_program_list(
+    fetcher: Optional[Fetcher] = None, programs_url: str = MAK_PROGRAMS_URL
+) -> List[Dict[str, str]]:
     """
     Scrape the All Programs page and return a list of programme dicts:
     {"college": "College of Computing and Information Sciences",
@@ -112,7 +384,10 @@ def scrape_mak_program_list() -> List[Dict[str, str]]:
      "url": "https://courses.mak.ac.ug/programmes/bachelor-information-technology",
      "duration": "3 Years"}
     """
-    soup = fetch(MAK_PROGRAMS_URL)
+    return fetch_parsed(programs_url, lambda soup: parse_mak_program_list(soup, programs_url), fetcher)
+
+
+def parse_mak_program_list(soup: BeautifulSoup, programs_url: str = MAK_PROGRAMS_URL) -> List[Dict[str, str]]:
     programmes: List[Dict[str, str]] = []
 
     # The page is structured as headings with following tables, grouped by college.
@@ -134,9 +409,7 @@ def scrape_mak_program_list() -> List[Dict[str, str]]:
                 if not link or not link.get("href"):
                     continue
                 name = link.get_text(strip=True)
-                href = link["href"]
-                if href.startswith("/"):
-                    href = MAK_BASE + href
+                href = urljoin(programs_url, link["href"])
                 duration = cols[1].get_text(strip=True) if len(cols) > 1 else ""
                 programmes.append(
                     {
@@ -160,13 +433,15 @@ def parse_credit(value: str) -> Optional[float]:
         return None
 
 
-def scrape_mak_program_curriculum(program: Dict[str, str]) -> Dict[str, Any]:
+def scrape_mak_program_curriculum(program: Dict[str, str], fetcher: Optional[Fetcher] = None) -> Dict[str, Any]:
     """
     Given a programme dict from scrape_mak_program_list, fetch its page and
     parse the year/semester/course tables into curriculum blocks.
     """
-    url = program["url"]
-    soup = fetch(url)
+    return fetch_parsed(program["url"], lambda soup: parse_mak_program_curriculum(soup, program), fetcher, program)
+
+
+def parse_mak_program_curriculum(soup: BeautifulSoup, program: Dict[str, str]) -> Dict[str, Any]:
 
     # Duration sometimes appears as "Duration of Program : 3 Years"
     duration = program.get("duration") or ""
@@ -183,7 +458,7 @@ def scrape_mak_program_curriculum(program: Dict[str, str]) -> Dict[str, Any]:
     # Identify "Year X" headings before tables
     for element in soup.find_all(["h2", "h3", "h4", "table"]):
         if element.name in ("h2", "h3", "h4"):
-            m = re.search(r"Year\\s*(\\d+)", element.get_text(strip=True), re.I)
+            m = re.search(r"Year\s*(\d+)", element.get_text(strip=True), re.I)
             if m:
                 year = int(m.group(1))
         elif element.name == "table" and year is not None:
@@ -246,23 +521,45 @@ def scrape_mak_program_curriculum(program: Dict[str, str]) -> Dict[str, Any]:
     }
 
 
-def scrape_all_mak_programmes() -> List[Dict[str, Any]]:
-    programmes = scrape_mak_program_list()
-    result: List[Dict[str, Any]] = []
-    for idx, p in enumerate(programmes, start=1):
-        print(f"[MAK] ({idx}/{len(programmes)}) {p['college']} – {p['name']}")
-        try:
-            entry = scrape_mak_program_curriculum(p)
-            result.append(entry)
-        except Exception as e:  # noqa: BLE001
-            # Log and keep going; some programmes may have unusual pages.
-            print(f"  ! Failed to scrape {p['url']}: {e}", file=sys.stderr)
-    return result
+def scrape_all_mak_programmes(
+    fetcher: Optional[Fetcher] = None,
+    workers: int = WORKERS,
+    programs_url: str = MAK_PROGRAMS_URL,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch and parse every programme page on `workers` threads sharing one Fetcher
+    (which bounds the requests per host). Entries keep the order of the programme list.
+    """
+    own_fetcher = fetcher is None
+    fetcher = fetcher or Fetcher()
+    try:
+        programmes = scrape_mak_program_list(fetcher, programs_url)
+        entries: List[Optional[Dict[str, Any]]] = [None] * len(programmes)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {
+                pool.submit(scrape_mak_program_curriculum, p, fetcher): idx
+                for idx, p in enumerate(programmes)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                idx = futures[future]
+                p = programmes[idx]
+                try:
+                    entries[idx] = future.result()
+                    print(f"[MAK] ({done}/{len(programmes)}) {p['college']} – {p['name']}")
+                except Exception as e:  # noqa: BLE001
+                    # Log and keep going; some programmes may have unusual pages.
+                    print(f"  ! Failed to scrape {p['url']}: {e}", file=sys.stderr)
+        return [entry for entry in entries if entry is not None]
+    finally:
+        if own_fetcher:
+            fetcher.close()
 
 
 # -------- UCU scraping (catalog-level) --------
 
-def scrape_ucu_programmes() -> List[Dict[str, Any]]:
+def scrape_ucu_programmes(
+    fetcher: Optional[Fetcher] = None, sites: Optional[Dict[str, str]] = None
+) -> List[Dict[str, Any]]:
     """
     Scrape UCU programme NAMES for key schools/faculties.
 
@@ -271,58 +568,108 @@ def scrape_ucu_programmes() -> List[Dict[str, Any]]:
     (no curriculum) so you can later merge AI-scraped curricula into the
     same JSON shape.
     """
+    sites = UCU_SITES if sites is None else sites
     programmes: List[Dict[str, Any]] = []
-    for college_name, url in UCU_SITES.items():
+    # Each school is its own host, so the pages can all be fetched at once
+    with ThreadPoolExecutor(max_workers=max(1, len(sites))) as pool:
+        futures = {
+            college_name: pool.submit(
+                fetch_parsed, url, lambda soup, c=college_name: parse_ucu_programmes(soup, c), fetcher, college_name
+            )
+            for college_name, url in sites.items()
+        }
+    for college_name, url in sites.items():
         print(f"[UCU] Scraping programmes from {college_name} – {url}")
         try:
-            soup = fetch(url)
+            programmes.extend(futures[college_name].result())
         except Exception as e:  # noqa: BLE001
             print(f"  ! Failed to fetch {url}: {e}", file=sys.stderr)
-            continue
+    return programmes
 
-        # Very generic heuristic: look for headings followed by "View Program Details" links.
-        for section in soup.find_all(["h2", "h3", "h4"]):
-            title = section.get_text(strip=True)
-            if not title:
-                continue
 
-            # Ignore obvious non-program headings
-            if any(bad in title.lower() for bad in ("welcome", "dean", "message", "news", "research")):
-                continue
+def parse_ucu_programmes(soup: BeautifulSoup, college_name: str) -> List[Dict[str, Any]]:
+    programmes: List[Dict[str, Any]] = []
+    # Very generic heuristic: look for headings followed by "View Program Details" links.
+    for section in soup.find_all(["h2", "h3", "h4"]):
+        title = section.get_text(strip=True)
+        if not title:
+            continue
 
-            # Accept things that look like a programme name (start with Diploma/Bachelor/Master)
-            if not re.search(r"^(Diploma|Bachelor|Master|PhD)", title, re.I):
-                continue
+        # Ignore obvious non-program headings
+        if any(bad in title.lower() for bad in ("welcome", "dean", "message", "news", "research")):
+            continue
 
-            programmes.append(
-                {
-                    "university": "Uganda Christian University",
-                    "universityLocation": "Mukono, Uganda",
-                    "universityMotto": "In the Beginning was the Word",
-                    "college": college_name,
-                    "course": title,
-                    "duration": None,
-                    "curriculum": [],
-                }
-            )
+        # Accept things that look like a programme name (start with Diploma/Bachelor/Master)
+        if not re.search(r"^(Diploma|Bachelor|Master|PhD)", title, re.I):
+            continue
 
+        programmes.append(
+            {
+                "university": "Uganda Christian University",
+                "universityLocation": "Mukono, Uganda",
+                "universityMotto": "In the Beginning was the Word",
+                "college": college_name,
+                "course": title,
+                "duration": None,
+                "curriculum": [],
+            }
+        )
     return programmes
 
 
 def main() -> None:
-    print("Scraping Makerere programmes and curricula...")
-    mak_entries = scrape_all_mak_programmes()
-
-    print("Scraping UCU programme catalog (names only)...")
-    ucu_entries = scrape_ucu_programmes()
+    parser = argparse.ArgumentParser(description="Scrape MAK and UCU programmes into university_curriculum.json")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH,
+                        help="Output JSON (default: public/university_curriculum.json)")
+    parser.add_argument("--mak-base", default=MAK_BASE,
+                        help=f"Makerere course site; its /programs page is the programme list (default: {MAK_BASE})")
+    parser.add_argument("--skip-ucu", action="store_true", help="Only scrape Makerere")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help=f"Programme pages fetched concurrently (default: {WORKERS}; 1 = sequential)")
+    parser.add_argument("--per-host", type=int, default=PER_HOST,
+                        help=f"Max requests in flight per host (default: {PER_HOST})")
+    parser.add_argument("--interval", type=float, default=MIN_INTERVAL,
+                        help=f"Min seconds between request starts per host; caps each host at 1/interval "
+                             f"requests/s (default: {MIN_INTERVAL}, i.e. {1 / MIN_INTERVAL:g}/s)")
+    parser.add_argument("--retries", type=int, default=RETRIES,
+                        help=f"Retries on connection errors, timeouts, 429 and 5xx (default: {RETRIES})")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help=f"Per-request timeout in seconds (default: {TIMEOUT})")
+    parser.add_argument("--cache", type=Path, default=CACHE_PATH,
+                        help="Response cache for conditional re-scrapes (default: .cache/curriculum_http.json)")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the response cache")
+    parser.add_argument("--refresh", action="store_true", help="Re-download and re-parse every page, then rewrite the cache")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else ResponseCache(args.cache)
+    if cache is not None and len(cache) and not args.refresh:
+        print(f"Revalidating {len(cache)} cached responses from {args.cache}")
+
+    t0 = time.perf_counter()
+    with Fetcher(args.per_host, args.interval, args.retries, timeout=args.timeout,
+                 cache=cache, revalidate=not args.refresh) as fetcher:
+        try:
+            print("Scraping Makerere programmes and curricula...")
+            mak_entries = scrape_all_mak_programmes(fetcher, args.workers, args.mak_base.rstrip("/") + "/programs")
+
+            ucu_entries: List[Dict[str, Any]] = []
+            if not args.skip_ucu:
+                print("Scraping UCU programme catalog (names only)...")
+                ucu_entries = scrape_ucu_programmes(fetcher)
+        finally:
+            # Keep whatever was fetched, even if the run stops part-way
+            if cache is not None:
+                cache.save()
+    elapsed = time.perf_counter() - t0
 
     all_entries: List[Dict[str, Any]] = mak_entries + ucu_entries
 
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUTPUT_PATH.open("w", encoding="utf-8") as f:
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with args.output.open("w", encoding="utf-8") as f:
         json.dump(all_entries, f, ensure_ascii=False, indent=2)
 
-    print(f"\nWrote {len(all_entries)} programmes to {OUTPUT_PATH}")
+    print(f"\nWrote {len(all_entries)} programmes to {args.output}")
+    print(f"{fetcher.requests} requests ({fetcher.retried} retried) in {elapsed:.1f}s: "
+          f"{fetcher.not_modified} not modified, {fetcher.unchanged} unchanged, {fetcher.parsed} parsed")
 
 
 if __name__ == "__main__":
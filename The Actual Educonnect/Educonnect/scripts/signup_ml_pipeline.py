@@ -15,6 +15,31 @@ What it does
 
     public/signup_trends.json
 
+Engines
+-------
+- sql (default): counting happens inside SQLite. Single-value fields use GROUP BY on
+  the trimmed column. Comma-separated fields are split with json_each over the value
+  rewritten as a JSON array, after identical strings have been grouped. Only the top-N
+  rows and the unique count per field come back to Python, so memory stays flat no
+  matter how many users there are.
+- python: the original row-by-row Counter loop. It is kept as a reference and for
+  --check-parity, which runs both engines and fails if their output differs.
+- --incremental: a sidecar state DB (server/signup_trends_state.db) keeps every
+  counter plus a snapshot of each user's tracked columns. A run applies only the users
+  in the server's user_changes log past the saved watermark, subtracting their old
+  values and adding the new ones. The first run, or --rebuild, builds the state with
+  the SQL engine's queries. The signup_suggestions section is cached and recomputed
+  only when that table changes.
+  The state also keeps daily and weekly rollups by users.created_at, from which a
+  "windows" section (top values of the last 7 / 30 days with growth against the
+  preceding window) is added without touching user rows.
+- stream: one pass over the rows with a fixed-size sketch per field instead of exact
+  counters. Top values come from a Space-Saving summary of --sketch-counters entries,
+  unique counts from a HyperLogLog of 2**--hll-precision registers. Memory is fixed
+  however long the tail of distinct values gets. Fields whose distinct values fit in
+  the sketch are counted exactly; otherwise every field reports "max_error", the most
+  any of its listed counts can exceed the true count.
+
 You can then:
 - Use this JSON in the frontend (admin dashboard, recommendations tuning).
 - Extend this script into a full ML pipeline (e.g. train/update models periodically).
@@ -23,25 +48,67 @@ Run manually from the Educonnect root:
 
     cd The Actual Educonnect/Educonnect
     python scripts/signup_ml_pipeline.py
+    python scripts/signup_ml_pipeline.py --engine python --check-parity
+    python scripts/signup_ml_pipeline.py --incremental      # e.g. every few minutes from cron
+    python scripts/signup_ml_pipeline.py --engine stream --sketch-counters 4096 --check-parity
 """
 
+import argparse
+import hashlib
+import heapq
 import json
+import math
 import sqlite3
+import sys
 from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Any, Dict, List, Optional
 
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DB_PATH = BASE_DIR / "server" / "educonnect.db"
 OUTPUT_PATH = BASE_DIR / "public" / "signup_trends.json"
+STATE_PATH = BASE_DIR / "server" / "signup_trends_state.db"
+
+TOP_N = 30
+EXCLUDED_ITEMS = ("none", "n/a")
+
+# (summary key, users column)
+SINGLE_VALUE_FIELDS = [
+    ("university", "university"),
+    ("degreeProgram", "degree_program"),
+    ("nationality", "nationality"),
+    ("countryOfResidence", "country_of_residence"),
+    ("preferredLearningStyle", "preferred_learning_style"),
+    ("studyPartnersPreferences", "study_partners_preferences"),
+    ("preferredStudyHours", "preferred_study_hours"),
+]
+MULTI_VALUE_FIELDS = [
+    ("csInterests", "cs_interests"),
+    ("technicalSkills", "technical_skills"),
+    ("strongTopics", "strong_topics"),
+    ("weakTopics", "weak_topics"),
+    ("softSkills", "soft_skills"),
+    ("researchInterests", "research_interests"),
+    ("professionalInterests", "professional_interests"),
+    ("hobbies", "hobbies"),
+]
+
+# Everything str.strip() removes, so SQLite trim(x, _WHITESPACE) matches it exactly
+_WHITESPACE = (" \t\n\x0b\x0c\r\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004"
+               "\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000")
+# Tie-break key for multi-value items: rowid * stride + position in the list,
+# i.e. the order in which the Python engine first sees each value
+_POSITION_STRIDE = 1 << 20
 
 
 def split_multi_value(s: str) -> List[str]:
     if not s:
         return []
     parts = [p.strip() for p in s.split(",")]
-    return [p for p in parts if p and p.lower() not in {"none", "n/a"}]
+    return [p for p in parts if p and p.lower() not in EXCLUDED_ITEMS]
 
 
 def fetch_rows(conn: sqlite3.Connection, query: str, params: tuple = ()) -> List[sqlite3.Row]:
@@ -51,17 +118,39 @@ def fetch_rows(conn: sqlite3.Connection, query: str, params: tuple = ()) -> List
     return rows
 
 
-def build_trends() -> Dict[str, Any]:
-    if not DB_PATH.exists():
-        raise FileNotFoundError(f"{DB_PATH} not found. Make sure the server has been started at least once.")
+def top_list(pairs: List[tuple]) -> List[Dict[str, Any]]:
+    return [{"value": v, "count": int(c)} for v, c in pairs]
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
 
+def assemble_summary(
+    users_count: int,
+    suggestions_count: int,
+    single: Dict[str, tuple],
+    multi: Dict[str, tuple],
+    suggestions: Dict[str, tuple],
+) -> Dict[str, Any]:
+    """signup_trends.json layout from {field: (top (value, count) pairs, unique)} per section."""
+    summary: Dict[str, Any] = {
+        "meta": {
+            "source": "educonnect.db",
+            "users_count": users_count,
+            "suggestions_count": suggestions_count,
+        },
+        "single_value": {},
+        "multi_value": {},
+        "suggestions": {},
+    }
+    for section, fields in (("single_value", single), ("multi_value", multi), ("suggestions", suggestions)):
+        for field, (top, unique) in fields.items():
+            summary[section][field] = {"top": top_list(top), "unique": unique}
+    return summary
+
+
+def build_trends_python(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Reference engine: load every user row and count in Python."""
     try:
         users = fetch_rows(conn, "SELECT * FROM users")
     except sqlite3.Error as e:
-        conn.close()
         raise RuntimeError(f"Failed to read users from DB: {e}") from e
 
     # Try to read signup_suggestions table if present
@@ -72,57 +161,20 @@ def build_trends() -> Dict[str, Any]:
         # Table might not exist yet; that's fine.
         suggestions = []
 
-    conn.close()
-
     # Counters for key dimensions
-    counts_single = {
-        "university": Counter(),
-        "degreeProgram": Counter(),
-        "nationality": Counter(),
-        "countryOfResidence": Counter(),
-        "preferredLearningStyle": Counter(),
-        "studyPartnersPreferences": Counter(),
-        "preferredStudyHours": Counter(),
-    }
-
-    counts_multi = {
-        "csInterests": Counter(),
-        "technicalSkills": Counter(),
-        "strongTopics": Counter(),
-        "weakTopics": Counter(),
-        "softSkills": Counter(),
-        "researchInterests": Counter(),
-        "professionalInterests": Counter(),
-        "hobbies": Counter(),
-    }
+    counts_single = {field: Counter() for field, _ in SINGLE_VALUE_FIELDS}
+    counts_multi = {field: Counter() for field, _ in MULTI_VALUE_FIELDS}
 
     # Aggregate from registered users
     for row in users:
         # Single-value fields
-        for field, col in [
-            ("university", "university"),
-            ("degreeProgram", "degree_program"),
-            ("nationality", "nationality"),
-            ("countryOfResidence", "country_of_residence"),
-            ("preferredLearningStyle", "preferred_learning_style"),
-            ("studyPartnersPreferences", "study_partners_preferences"),
-            ("preferredStudyHours", "preferred_study_hours"),
-        ]:
+        for field, col in SINGLE_VALUE_FIELDS:
             val = (row[col] or "").strip() if col in row.keys() and row[col] is not None else ""
             if val:
                 counts_single[field][val] += 1
 
         # Multi-value (comma-separated) fields
-        for field, col in [
-            ("csInterests", "cs_interests"),
-            ("technicalSkills", "technical_skills"),
-            ("strongTopics", "strong_topics"),
-            ("weakTopics", "weak_topics"),
-            ("softSkills", "soft_skills"),
-            ("researchInterests", "research_interests"),
-            ("professionalInterests", "professional_interests"),
-            ("hobbies", "hobbies"),
-        ]:
+        for field, col in MULTI_VALUE_FIELDS:
             raw = row[col] if col in row.keys() else ""
             for item in split_multi_value(raw or ""):
                 counts_multi[field][item] += 1
@@ -137,48 +189,802 @@ def build_trends() -> Dict[str, Any]:
             continue
         suggestion_totals[field_name][value] += use_count
 
-    # Build summary JSON
-    def top_list(counter: Counter, n: int = 30) -> List[Dict[str, Any]]:
-        return [{"value": v, "count": int(c)} for v, c in counter.most_common(n)]
+    def summarize(counters: Dict[str, Counter]) -> Dict[str, tuple]:
+        return {field: (counter.most_common(TOP_N), len(counter)) for field, counter in counters.items()}
+
+    return assemble_summary(
+        len(users),
+        sum(int(r["use_count"] or 1) for r in suggestions),
+        summarize(counts_single),
+        summarize(counts_multi),
+        summarize(suggestion_totals),
+    )
+
+
+# Weight of one signup_suggestions row, as int(use_count or 1) in the Python engine
+SUGGESTION_WEIGHT = "CASE WHEN use_count IS NULL OR use_count = 0 THEN 1 ELSE CAST(use_count AS INTEGER) END"
+
+# Both item CTEs first collapse identical raw strings (one sort over the column), so the
+# per-item work (splitting, trim) runs once per distinct string instead of once per user.
+# `first` is the first occurrence (rowid, list position), which orders ties the way
+# Counter.most_common() does. {table} is users, or the incremental state's snapshot.
+SINGLE_ITEMS_CTE = """
+    WITH raw AS (
+        SELECT {col} AS v, COUNT(*) AS n, MIN(rowid) AS first
+        FROM {table}
+        WHERE {col} IS NOT NULL{where}
+        GROUP BY 1
+    ), items AS (
+        SELECT trim(v, :ws) AS item, SUM(n) AS n, MIN(first) AS first
+        FROM raw
+        GROUP BY 1
+        HAVING item != ''
+    )
+"""
 
-    summary: Dict[str, Any] = {
-        "meta": {
-            "source": "educonnect.db",
-            "users_count": len(users),
-            "suggestions_count": sum(int(r["use_count"] or 1) for r in suggestions),
-        },
-        "single_value": {},
-        "multi_value": {},
-        "suggestions": {},
+# json_quote() escapes the text and can't emit a bare comma except the original ones,
+# so replacing ',' with '","' inside it yields a JSON array of the comma-separated parts.
+MULTI_ITEMS_CTE = """
+    WITH raw AS (
+        SELECT {col} AS v, COUNT(*) AS n, MIN(rowid) AS first
+        FROM {table}
+        WHERE {col} IS NOT NULL AND {col} != ''{where}
+        GROUP BY 1
+    ), parts AS (
+        SELECT j.value AS part, SUM(raw.n) AS n, MIN(raw.first * :stride + j.key) AS first
+        FROM raw, json_each('[' || replace(json_quote(raw.v), ',', '","') || ']') AS j
+        GROUP BY 1
+    ), items AS (
+        SELECT trim(part, :ws) AS item, SUM(n) AS n, MIN(first) AS first
+        FROM parts
+        GROUP BY 1
+        HAVING item != '' AND lower(item) NOT IN ({excluded})
+    )
+"""
+
+TOP_ITEMS_SQL = """
+    SELECT item, n, COUNT(*) OVER () AS uniq FROM items
+    ORDER BY n DESC, first
+    LIMIT :top
+"""
+
+
+def items_cte(col: str, multi: bool, table: str = "users", where: str = "") -> str:
+    where = f" AND {where}" if where else ""
+    if multi:
+        excluded = ", ".join(f"'{item}'" for item in EXCLUDED_ITEMS)
+        return MULTI_ITEMS_CTE.format(col=col, table=table, excluded=excluded, where=where)
+    return SINGLE_ITEMS_CTE.format(col=col, table=table, where=where)
+
+
+SUGGESTIONS_SQL = f"""
+    WITH totals AS (
+        SELECT trim(field_name, :ws) AS field, trim(value, :ws) AS value,
+               SUM({SUGGESTION_WEIGHT}) AS n, MIN(rowid) AS first
+        FROM signup_suggestions
+        GROUP BY 1, 2
+    ), ranked AS (
+        SELECT field, value, n,
+               ROW_NUMBER() OVER (PARTITION BY field ORDER BY n DESC, first) AS rank,
+               COUNT(*) OVER (PARTITION BY field) AS uniq,
+               MIN(first) OVER (PARTITION BY field) AS field_first
+        FROM totals
+        WHERE field != '' AND value != ''
+    )
+    SELECT field, value, n, uniq FROM ranked WHERE rank <= :top ORDER BY field_first, rank
+"""
+
+
+def _top_and_unique(conn: sqlite3.Connection, sql: str, params: Dict[str, Any]) -> tuple:
+    rows = conn.execute(sql, params).fetchall()
+    return [(r[0], r[1]) for r in rows], (rows[0][2] if rows else 0)
+
+
+def suggestion_trends(conn: sqlite3.Connection) -> tuple:
+    """({field: (top pairs, unique)}, total use count) for signup_suggestions; empty if missing."""
+    params = {"ws": _WHITESPACE, "top": TOP_N}
+    suggestions: Dict[str, tuple] = {}
+    try:
+        suggestions_count = conn.execute(
+            f"SELECT COALESCE(SUM({SUGGESTION_WEIGHT}), 0) FROM signup_suggestions"
+        ).fetchone()[0]
+        for field, value, n, unique in conn.execute(SUGGESTIONS_SQL, params):
+            top, _ = suggestions.setdefault(field, ([], unique))
+            top.append((value, n))
+    except sqlite3.OperationalError:
+        # Table might not exist yet; that's fine.
+        return {}, 0
+    return suggestions, suggestions_count
+
+
+def build_trends_sql(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Push the counting into SQLite; only top-N rows and unique counts reach Python."""
+    try:
+        columns = {r[1] for r in conn.execute("PRAGMA table_info(users)")}
+        users_count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    except sqlite3.Error as e:
+        raise RuntimeError(f"Failed to read users from DB: {e}") from e
+    if not columns:
+        raise RuntimeError("Failed to read users from DB: no such table: users")
+
+    params = {"ws": _WHITESPACE, "top": TOP_N, "stride": _POSITION_STRIDE}
+    # Columns missing from older databases simply count nothing, as in the Python engine
+    single = {
+        field: _top_and_unique(conn, items_cte(col, False) + TOP_ITEMS_SQL, params) if col in columns else ([], 0)
+        for field, col in SINGLE_VALUE_FIELDS
+    }
+    multi = {
+        field: _top_and_unique(conn, items_cte(col, True) + TOP_ITEMS_SQL, params) if col in columns else ([], 0)
+        for field, col in MULTI_VALUE_FIELDS
     }
+    suggestions, suggestions_count = suggestion_trends(conn)
+    return assemble_summary(users_count, suggestions_count, single, multi, suggestions)
+
+
+# --- incremental state -------------------------------------------------------------
+#
+# The sidecar state DB keeps, per field and item, the running count n and the first
+# occurrence key (the same rowid / rowid * stride + position used by the SQL engine),
+# plus a snapshot of every user's tracked columns so a changed or deleted profile can
+# be subtracted exactly. The watermark is the last user_changes.seq applied; the server
+# logs inserts, deletes and updates of the tracked columns there (see server/db.js).
+#
+# rollups holds the same counts per day and per week (Monday) of the user's created_at,
+# so windowed top-N and growth queries read buckets instead of user rows.
+
+TRACKED_FIELDS = [(field, col, False) for field, col in SINGLE_VALUE_FIELDS] + \
+                 [(field, col, True) for field, col in MULTI_VALUE_FIELDS]
+TRACKED_COLUMNS = [col for _, col, _ in TRACKED_FIELDS]
+SNAPSHOT_COLUMNS = TRACKED_COLUMNS + ["created_at"]
+STATE_VERSION = 2
+CHANGES_CHUNK = 10_000
+
+# Same week definition as backend/weekly_rollover.py
+DAY_BUCKET = "date(created_at)"
+WEEK_BUCKET = "date(created_at, 'weekday 0', '-6 days')"
+DEFAULT_WINDOWS = [7, 30]
+
+# snapshot.rowid is the user's rowid in the server DB, so the item CTEs run on it unchanged
+STATE_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS snapshot (user_id TEXT NOT NULL UNIQUE, {", ".join(f"{c} TEXT" for c in SNAPSHOT_COLUMNS)});
+    CREATE TABLE IF NOT EXISTS counters (
+        field TEXT NOT NULL, item TEXT NOT NULL, n INTEGER NOT NULL, first INTEGER NOT NULL,
+        PRIMARY KEY (field, item)
+    );
+    CREATE INDEX IF NOT EXISTS idx_counters_top ON counters (field, n DESC, first);
+    CREATE TABLE IF NOT EXISTS rollups (
+        period TEXT NOT NULL, bucket TEXT NOT NULL, field TEXT NOT NULL, item TEXT NOT NULL, n INTEGER NOT NULL,
+        PRIMARY KEY (period, field, bucket, item)
+    );
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
 
-    for field, counter in counts_single.items():
-        summary["single_value"][field] = {
-            "top": top_list(counter),
-            "unique": len(counter),
-        }
+def open_state(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.executescript(STATE_SCHEMA)
+    return conn
+
+
+def _layout() -> str:
+    return json.dumps([STATE_VERSION, TRACKED_FIELDS])
+
+
+def state_watermark(state: sqlite3.Connection) -> Optional[int]:
+    """user_changes.seq applied so far, or None if the state must be (re)built."""
+    meta = dict(state.execute("SELECT key, value FROM meta").fetchall())
+    if "watermark" not in meta or meta.get("layout") != _layout():
+        return None
+    return int(meta["watermark"])
+
+
+def _source_columns(state: sqlite3.Connection) -> str:
+    """users columns to copy into the snapshot, NULL for any the server DB doesn't have yet."""
+    present = {r[1] for r in state.execute("PRAGMA src.table_info(users)")}
+    if not present:
+        raise RuntimeError("Failed to read users from DB: no such table: users")
+    return ", ".join(col if col in present else f"NULL AS {col}" for col in SNAPSHOT_COLUMNS)
+
+
+def _save_watermark(state: sqlite3.Connection, watermark: int) -> None:
+    state.executemany(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+        [("watermark", str(watermark)), ("layout", _layout())],
+    )
+
+
+@lru_cache(maxsize=None)
+def _week_start(day: str) -> str:
+    """WEEK_BUCKET for a DAY_BUCKET value."""
+    d = date.fromisoformat(day)
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+def rebuild_state(state: sqlite3.Connection) -> int:
+    """Snapshot every user, recount all items in SQL and rebuild the rollups; returns the new watermark."""
+    params = {"ws": _WHITESPACE, "stride": _POSITION_STRIDE}
+    # Tables are recreated (in the same transaction) so older state layouts are upgraded
+    state.executescript(
+        "BEGIN; DROP TABLE IF EXISTS snapshot; DROP TABLE IF EXISTS counters; "
+        "DROP TABLE IF EXISTS rollups; DROP TABLE IF EXISTS meta;" + STATE_SCHEMA
+    )
+    # Read the watermark first: changes logged during the rebuild are re-applied next run
+    watermark = state.execute("SELECT COALESCE(MAX(seq), 0) FROM src.user_changes").fetchone()[0]
+    state.execute(
+        f"INSERT INTO snapshot (rowid, user_id, {', '.join(SNAPSHOT_COLUMNS)}) "
+        f"SELECT rowid, id, {_source_columns(state)} FROM src.users"
+    )
+    for field, col, multi in TRACKED_FIELDS:
+        state.execute(
+            items_cte(col, multi, "snapshot") +
+            "INSERT INTO counters (field, item, n, first) SELECT :field, item, n, first FROM items",
+            {**params, "field": field},
+        )
+        # (day, item) keys barely repeat in the long tail, so after one GROUP BY on the raw
+        # text a hash Counter beats further sorts; each distinct string is split once
+        split = lru_cache(maxsize=None)(
+            (lambda v: tuple(split_multi_value(v))) if multi else (lambda v: (v.strip(),) if v.strip() else ())
+        )
+        days: Counter = Counter()
+        for day, value, n in state.execute(
+            f"SELECT {DAY_BUCKET} AS day, {col} AS v, COUNT(*) FROM snapshot "
+            f"WHERE v IS NOT NULL AND day IS NOT NULL GROUP BY day, v"
+        ):
+            for item in split(value):
+                days[day, item] += n
+        weeks: Counter = Counter()
+        for (day, item), n in days.items():
+            weeks[_week_start(day), item] += n
+        state.executemany(
+            "INSERT INTO rollups (period, field, bucket, item, n) VALUES (?, ?, ?, ?, ?)",
+            ((period, field, bucket, item, n)
+             for period, counts in (("day", days), ("week", weeks))
+             for (bucket, item), n in sorted(counts.items())),
+        )
+    _save_watermark(state, watermark)
+    state.execute("COMMIT")
+    return watermark
+
+
+def column_items(value: Any, rowid: int, multi: bool) -> set:
+    """(item, first-occurrence key) pairs one column value contributes, as the SQL engine counts it."""
+    if value is None:
+        return set()
+    if not multi:
+        item = str(value).strip()
+        return {(item, rowid)} if item else set()
+    out = set()
+    for pos, part in enumerate(str(value).split(",")):
+        item = part.strip()
+        if item and item.lower() not in EXCLUDED_ITEMS:
+            out.add((item, rowid * _POSITION_STRIDE + pos))
+    return out
+
+
+def apply_changes(state: sqlite3.Connection, watermark: int) -> tuple:
+    """Apply users changed since the watermark as per-item deltas; returns (changed users, new watermark)."""
+    changes = state.execute(
+        "SELECT user_id, seq FROM src.user_changes WHERE seq > ? ORDER BY seq", (watermark,)
+    ).fetchall()
+    if not changes:
+        return 0, watermark
+    columns = ", ".join(SNAPSHOT_COLUMNS)
+    source_columns = _source_columns(state)
+    width = len(SNAPSHOT_COLUMNS) + 2           # rowid, user id, snapshot columns
+    day, week = width, width + 1                # bucket columns appended by the queries below
+
+    delta: Dict[tuple, int] = defaultdict(int)       # (field, item) -> change in n
+    min_added: Dict[tuple, int] = {}                  # (field, item) -> smallest new key
+    min_removed: Dict[tuple, int] = {}                # (field, item) -> smallest removed key
+    rollup_delta: Dict[tuple, int] = defaultdict(int)  # (period, field, bucket, item) -> change in n
+    state.execute("BEGIN")
+    for start in range(0, len(changes), CHANGES_CHUNK):
+        ids = [user_id for user_id, _ in changes[start:start + CHANGES_CHUNK]]
+        marks = ", ".join("?" * len(ids))
+        old = {r[1]: r for r in state.execute(
+            f"SELECT *, {DAY_BUCKET}, {WEEK_BUCKET} FROM "
+            f"(SELECT rowid, user_id, {columns} FROM snapshot WHERE user_id IN ({marks}))", ids)}
+        new = {r[1]: r for r in state.execute(
+            f"SELECT *, {DAY_BUCKET}, {WEEK_BUCKET} FROM "
+            f"(SELECT rowid, id, {source_columns} FROM src.users WHERE id IN ({marks}))", ids)}
+        for user_id in ids:
+            before, after = old.get(user_id), new.get(user_id)
+            if before == after:
+                continue
+            for i, (field, _, multi) in enumerate(TRACKED_FIELDS, start=2):
+                was = column_items(before[i], before[0], multi) if before else set()
+                now = column_items(after[i], after[0], multi) if after else set()
+                for item, key in was - now:
+                    delta[field, item] -= 1
+                    min_removed[field, item] = min(key, min_removed.get((field, item), key))
+                for item, key in now - was:
+                    delta[field, item] += 1
+                    min_added[field, item] = min(key, min_added.get((field, item), key))
+                # Rollups move whole contributions, so a changed created_at re-buckets them too
+                for row, items, sign in ((before, was, -1), (after, now, 1)):
+                    if row and row[day]:
+                        for item, _ in items:
+                            rollup_delta["day", field, row[day], item] += sign
+                            rollup_delta["week", field, row[week], item] += sign
+        state.executemany("DELETE FROM snapshot WHERE user_id = ?", ((user_id,) for user_id in ids))
+        state.executemany(
+            f"INSERT OR REPLACE INTO snapshot (rowid, user_id, {columns}) VALUES ({', '.join('?' * width)})",
+            (r[:width] for r in new.values()),
+        )
+
+    # If an item lost its first occurrence and gained nothing earlier, its next-earliest
+    # occurrence isn't known here; those few items get `first` recomputed from the snapshot
+    stale_first: Dict[str, set] = defaultdict(set)
+    for (field, item), removed in min_removed.items():
+        row = state.execute("SELECT first FROM counters WHERE field = ? AND item = ?", (field, item)).fetchone()
+        if row and row[0] == removed and min_added.get((field, item), removed) >= removed:
+            stale_first[field].add(item)
+    state.executemany(
+        "INSERT INTO counters (field, item, n, first) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (field, item) DO UPDATE SET n = n + excluded.n, "
+        "first = CASE WHEN excluded.first < first THEN excluded.first ELSE first END",
+        # Net-zero items still go through: they may have gained an earlier occurrence
+        ((field, item, n, min_added.get((field, item), 1 << 62)) for (field, item), n in delta.items()),
+    )
+    state.executemany(
+        "DELETE FROM counters WHERE field = ? AND item = ? AND n <= 0",
+        (key for key, n in delta.items() if n <= 0),
+    )
+    rollup_delta = {key: n for key, n in rollup_delta.items() if n}
+    state.executemany(
+        "INSERT INTO rollups (period, field, bucket, item, n) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (period, field, bucket, item) DO UPDATE SET n = n + excluded.n",
+        (key + (n,) for key, n in rollup_delta.items()),
+    )
+    state.executemany(
+        "DELETE FROM rollups WHERE period = ? AND field = ? AND bucket = ? AND item = ? AND n <= 0",
+        (key for key, n in rollup_delta.items() if n < 0),
+    )
+    params = {"ws": _WHITESPACE, "stride": _POSITION_STRIDE}
+    for field, col, multi in TRACKED_FIELDS:
+        if stale_first.get(field):
+            # Only rows whose raw text contains one of the items need splitting
+            contains = f"EXISTS (SELECT 1 FROM json_each(:items) WHERE instr({col}, value) > 0)"
+            state.execute(
+                items_cte(col, multi, "snapshot", contains) +
+                "UPDATE counters SET first = (SELECT first FROM items WHERE items.item = counters.item) "
+                "WHERE field = :field AND item IN (SELECT value FROM json_each(:items))",
+                {**params, "field": field, "items": json.dumps(sorted(stale_first[field]))},
+            )
+    new_watermark = changes[-1][1]
+    _save_watermark(state, new_watermark)
+    state.execute("COMMIT")
+    return len(changes), new_watermark
+
+
+def cached_suggestion_trends(state: sqlite3.Connection) -> tuple:
+    """suggestion_trends() for the attached server DB, reused while signup_suggestions is unchanged.
+
+    The server only inserts suggestions or bumps use_count, so every write it makes changes
+    the row count, the use_count total or the max rowid.
+    """
+    try:
+        fingerprint = list(state.execute(
+            "SELECT COUNT(*), TOTAL(use_count), MAX(rowid) FROM src.signup_suggestions"
+        ).fetchone())
+    except sqlite3.OperationalError:
+        return {}, 0
+    cached = state.execute("SELECT value FROM meta WHERE key = 'suggestions'").fetchone()
+    if cached:
+        saved = json.loads(cached[0])
+        if saved["fingerprint"] == fingerprint:
+            return saved["trends"], saved["count"]
+    suggestions, suggestions_count = suggestion_trends(state)
+    state.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES ('suggestions', ?)",
+        (json.dumps({"fingerprint": fingerprint, "trends": suggestions, "count": suggestions_count}),),
+    )
+    return suggestions, suggestions_count
+
+
+WINDOW_SQL = """
+    WITH cur AS (SELECT item, SUM(n) AS n FROM ({current}) GROUP BY item),
+         prev AS (SELECT item, SUM(n) AS n FROM ({previous}) GROUP BY item)
+    SELECT cur.item, cur.n, COALESCE(prev.n, 0) AS previous, COUNT(*) OVER () AS uniq
+    FROM cur LEFT JOIN prev USING (item)
+    ORDER BY cur.n DESC, cur.item
+    LIMIT :top
+"""
 
-    for field, counter in counts_multi.items():
-        summary["multi_value"][field] = {
-            "top": top_list(counter),
-            "unique": len(counter),
-        }
 
-    for field, counter in suggestion_totals.items():
-        summary["suggestions"][field] = {
-            "top": top_list(counter),
-            "unique": len(counter),
-        }
+def window_ranges(start: date, end: date) -> Dict[str, tuple]:
+    """Bucket ranges covering the days start..end: whole weeks from the weekly rollup, the rest daily."""
+    first_monday = start + timedelta(days=-start.weekday() % 7)
+    last_monday = end - timedelta(days=(end.weekday() + 1) % 7 + 6)
+    if first_monday > last_monday:
+        return {"day1": (start, end), "day2": (None, None), "week": (None, None)}
+    return {
+        "day1": (start, first_monday - timedelta(days=1)),
+        "day2": (last_monday + timedelta(days=7), end),
+        "week": (first_monday, last_monday),
+    }
+
 
+def _window_rows(prefix: str) -> str:
+    # One primary-key range scan per part; an empty range (start > end or NULL) reads nothing
+    return " UNION ALL ".join(
+        f"SELECT item, n FROM rollups WHERE period = '{period}' AND field = :field "
+        f"AND bucket BETWEEN :{prefix}_{part}_start AND :{prefix}_{part}_end"
+        for part, period in (("day1", "day"), ("day2", "day"), ("week", "week"))
+    )
+
+
+def window_top(state: sqlite3.Connection, field: str, start: date, end: date, limit: int = TOP_N) -> tuple:
+    """Top items of a field among users created start..end (inclusive), read from the rollups.
+
+    Returns ([(item, count, count in the preceding window of the same length)], unique items).
+    """
+    length = end - start + timedelta(days=1)
+    params: Dict[str, Any] = {"field": field, "top": limit}
+    for prefix, (lo, hi) in (("cur", (start, end)), ("prev", (start - length, start - timedelta(days=1)))):
+        for part, bounds in window_ranges(lo, hi).items():
+            params[f"{prefix}_{part}_start"], params[f"{prefix}_{part}_end"] = (
+                b.isoformat() if b else None for b in bounds
+            )
+    sql = WINDOW_SQL.format(current=_window_rows("cur"), previous=_window_rows("prev"))
+    rows = state.execute(sql, params).fetchall()
+    return [(r[0], r[1], r[2]) for r in rows], (rows[0][3] if rows else 0)
+
+
+def growth_rate(count: int, previous: int) -> Optional[float]:
+    """Relative change against the previous window; None for items that are new in this one."""
+    return round((count - previous) / previous, 4) if previous else None
+
+
+def window_trends(state: sqlite3.Connection, days: int, as_of: date) -> Dict[str, Any]:
+    """signup_trends.json section for signups in the `days` days ending on as_of."""
+    start = as_of - timedelta(days=days - 1)
+    section: Dict[str, Any] = {"start": start.isoformat(), "end": as_of.isoformat(), "single_value": {}, "multi_value": {}}
+    for key, fields in (("single_value", SINGLE_VALUE_FIELDS), ("multi_value", MULTI_VALUE_FIELDS)):
+        for field, _ in fields:
+            top, unique = window_top(state, field, start, as_of)
+            section[key][field] = {
+                "top": [
+                    {"value": v, "count": int(n), "previous": int(prev), "growth": growth_rate(n, prev)}
+                    for v, n, prev in top
+                ],
+                "unique": unique,
+            }
+    return section
+
+
+def trends_from_state(
+    state: sqlite3.Connection, windows: List[int] = DEFAULT_WINDOWS, as_of: Optional[date] = None
+) -> Dict[str, Any]:
+    """signup_trends.json from the maintained counters and rollups plus signup_suggestions."""
+    def top(field: str) -> tuple:
+        rows = state.execute(
+            "SELECT item, n FROM counters WHERE field = ? ORDER BY n DESC, first LIMIT ?", (field, TOP_N)
+        ).fetchall()
+        unique = state.execute("SELECT COUNT(*) FROM counters WHERE field = ?", (field,)).fetchone()[0]
+        return [(r[0], r[1]) for r in rows], unique
+
+    users_count = state.execute("SELECT COUNT(*) FROM snapshot").fetchone()[0]
+    suggestions, suggestions_count = cached_suggestion_trends(state)
+    summary = assemble_summary(
+        users_count,
+        suggestions_count,
+        {field: top(field) for field, _ in SINGLE_VALUE_FIELDS},
+        {field: top(field) for field, _ in MULTI_VALUE_FIELDS},
+        suggestions,
+    )
+    as_of = as_of or datetime.now(timezone.utc).date()
+    summary["windows"] = {f"last_{days}_days": window_trends(state, days, as_of) for days in windows}
     return summary
 
 
+def build_trends_incremental(
+    db_path: Path = None,
+    state_path: Path = None,
+    rebuild: bool = False,
+    windows: List[int] = DEFAULT_WINDOWS,
+    as_of: Optional[date] = None,
+) -> Dict[str, Any]:
+    """Bring the sidecar state up to date with the server's change log, then summarize it."""
+    db_path = Path(db_path or DB_PATH)
+    if not db_path.exists():
+        raise FileNotFoundError(f"{db_path} not found. Make sure the server has been started at least once.")
+
+    state = open_state(Path(state_path or STATE_PATH))
+    try:
+        state.execute("ATTACH DATABASE ? AS src", (str(db_path),))
+        watermark = None if rebuild else state_watermark(state)
+        try:
+            if watermark is None:
+                watermark = rebuild_state(state)
+                print(f"Rebuilt trend state from all users (watermark {watermark})")
+            else:
+                changed, watermark = apply_changes(state, watermark)
+                print(f"Applied {changed} changed users (watermark {watermark})")
+        except sqlite3.OperationalError as e:
+            if "user_changes" in str(e):
+                raise RuntimeError(f"{db_path} has no user_changes log; start the server once to create it") from e
+            raise
+        return trends_from_state(state, windows, as_of)
+    finally:
+        state.close()
+
+
+# --- streaming sketches ------------------------------------------------------------
+#
+# Fixed-memory alternative to exact counting: per field a Space-Saving summary for the
+# top values and a HyperLogLog for the number of distinct values. Both take a weight-free
+# stream of items, so memory depends on the settings only, not on the data.
+
+SKETCH_COUNTERS = 1024
+HLL_PRECISION = 12
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters (Metwally et al.) in at most `capacity` counters.
+
+    A monitored item's count exceeds its true count by at most its recorded error, and
+    every item seen more than total / capacity times is monitored. While nothing has
+    been evicted the counts are exact.
+    """
+
+    def __init__(self, capacity: int = SKETCH_COUNTERS):
+        if capacity < 1:
+            raise ValueError("Space-Saving needs at least one counter")
+        self.capacity = capacity
+        self.counts: Dict[str, List[int]] = {}   # item -> [count, error], in first-seen order
+        self._heap: List[tuple] = []              # one (count, item) per monitored item; count may lag
+        self.evicted = False
+        self.total = 0
+
+    def add(self, item: str, weight: int = 1) -> None:
+        self.total += weight
+        entry = self.counts.get(item)
+        if entry is not None:
+            entry[0] += weight
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[item] = [weight, 0]
+            heapq.heappush(self._heap, (weight, item))
+            return
+        # Replace the smallest counter; heap entries are refreshed lazily, only when they reach the top
+        while True:
+            count, victim = self._heap[0]
+            current = self.counts[victim][0]
+            if current == count:
+                break
+            heapq.heapreplace(self._heap, (current, victim))
+        del self.counts[victim]
+        self.counts[item] = [count + weight, count]
+        heapq.heapreplace(self._heap, (count + weight, item))
+        self.evicted = True
+
+    def top(self, n: int) -> List[tuple]:
+        """[(item, count, error)] for the n largest counts; ties keep first-seen order like Counter.most_common()."""
+        ranked = sorted(self.counts.items(), key=lambda kv: kv[1][0], reverse=True)[:n]
+        return [(item, count, error) for item, (count, error) in ranked]
+
+
+@lru_cache(maxsize=1 << 16)
+def _hash64(item: str) -> int:
+    # Stable across runs (unlike hash()); cached because the same values repeat constantly
+    return int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Distinct-count estimate in 2**precision one-byte registers; standard error 1.04 / sqrt(2**precision)."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self._shift = 64 - precision
+        self._mask = (1 << self._shift) - 1
+
+    def add(self, item: str) -> None:
+        h = _hash64(item)
+        index = h >> self._shift
+        rank = self._shift - (h & self._mask).bit_length() + 1   # position of the first 1-bit
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)   # linear counting for small cardinalities
+        return round(estimate)
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+class FieldSketch:
+    """Top values and unique count of one field in fixed memory."""
+
+    def __init__(self, counters: int, precision: int):
+        self.top_k = SpaceSaving(counters)
+        self.distinct = HyperLogLog(precision)
+
+    def add(self, item: str, weight: int = 1) -> None:
+        self.top_k.add(item, weight)
+        self.distinct.add(item)
+
+    def summary(self) -> tuple:
+        """((top (value, count) pairs, unique), max error of the listed counts)."""
+        top = self.top_k.top(TOP_N)
+        # Until the first eviction every distinct value still has its own counter
+        unique = self.distinct.count() if self.top_k.evicted else len(self.top_k.counts)
+        return ([(v, n) for v, n, _ in top], unique), max((e for _, _, e in top), default=0)
+
+
+def build_trends_stream(
+    conn: sqlite3.Connection, counters: int = SKETCH_COUNTERS, precision: int = HLL_PRECISION
+) -> Dict[str, Any]:
+    """One cursor pass over users and signup_suggestions, counting into fixed-size sketches."""
+    try:
+        columns = {r[1] for r in conn.execute("PRAGMA table_info(users)")}
+    except sqlite3.Error as e:
+        raise RuntimeError(f"Failed to read users from DB: {e}") from e
+    if not columns:
+        raise RuntimeError("Failed to read users from DB: no such table: users")
+
+    single = {field: FieldSketch(counters, precision) for field, _ in SINGLE_VALUE_FIELDS}
+    multi = {field: FieldSketch(counters, precision) for field, _ in MULTI_VALUE_FIELDS}
+    # Columns missing from older databases read as NULL and count nothing
+    select = ", ".join(col if col in columns else "NULL" for _, col in SINGLE_VALUE_FIELDS + MULTI_VALUE_FIELDS)
+    single_sketches = list(single.values())
+    multi_sketches = list(enumerate(multi.values(), start=len(single_sketches)))
+    cur = conn.cursor()
+    cur.row_factory = None
+    users_count = 0
+    for row in cur.execute(f"SELECT {select} FROM users"):
+        users_count += 1
+        for val, sketch in zip(row, single_sketches):
+            if val is not None:
+                val = val.strip()
+                if val:
+                    sketch.add(val)
+        for i, sketch in multi_sketches:
+            for item in split_multi_value(row[i]):
+                sketch.add(item)
+
+    suggestions: Dict[str, FieldSketch] = {}
+    suggestions_count = 0
+    try:
+        for field_name, value, use_count in cur.execute("SELECT field_name, value, use_count FROM signup_suggestions"):
+            weight = int(use_count or 1)
+            suggestions_count += weight
+            field_name, value = (field_name or "").strip(), (value or "").strip()
+            if field_name and value:
+                if field_name not in suggestions:
+                    suggestions[field_name] = FieldSketch(counters, precision)
+                suggestions[field_name].add(value, weight)
+    except sqlite3.OperationalError:
+        # Table might not exist yet; that's fine.
+        suggestions, suggestions_count = {}, 0
+
+    sections = {"single_value": single, "multi_value": multi, "suggestions": suggestions}
+    summaries = {name: {f: sk.summary() for f, sk in sketches.items()} for name, sketches in sections.items()}
+    summary = assemble_summary(
+        users_count,
+        suggestions_count,
+        *({f: result for f, (result, _) in summaries[name].items()} for name in sections),
+    )
+    for name, fields in summaries.items():
+        for field, (_, max_error) in fields.items():
+            summary[name][field]["max_error"] = max_error
+    summary["meta"]["sketch"] = {
+        "counters": counters,
+        "hll_precision": precision,
+        "unique_standard_error": round(HyperLogLog(precision).standard_error, 4),
+    }
+    return summary
+
+
+def sketch_check(exact: Dict[str, Any], approx: Dict[str, Any]) -> tuple:
+    """Compare a stream summary with an exact one.
+
+    Returns (violations of the Space-Saving bound, share of exact top values also listed,
+    worst relative unique-count error).
+    """
+    violations: List[str] = []
+    listed = found = 0
+    worst = 0.0
+    for section in ("single_value", "multi_value", "suggestions"):
+        for field, entry in exact[section].items():
+            got = approx[section].get(field, {"top": [], "unique": 0, "max_error": 0})
+            true_counts = {t["value"]: t["count"] for t in entry["top"]}
+            for t in got["top"]:
+                n = true_counts.get(t["value"])
+                if n is not None and not n <= t["count"] <= n + got["max_error"]:
+                    violations.append(f"{section}.{field}: {t['value']!r} counted {t['count']}, true {n}")
+            listed += len(true_counts)
+            found += len(true_counts.keys() & {t["value"] for t in got["top"]})
+            if entry["unique"]:
+                worst = max(worst, abs(got["unique"] - entry["unique"]) / entry["unique"])
+    return violations, (found / listed if listed else 1.0), worst
+
+
+ENGINES = {"sql": build_trends_sql, "python": build_trends_python, "stream": build_trends_stream}
+
+
+def build_trends(engine: str = "sql", db_path: Path = None, **options: Any) -> Dict[str, Any]:
+    """Run one engine over db_path; options go to the engine (counters / precision for stream)."""
+    db_path = Path(db_path or DB_PATH)
+    if not db_path.exists():
+        raise FileNotFoundError(f"{db_path} not found. Make sure the server has been started at least once.")
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return ENGINES[engine](conn, **options)
+    finally:
+        conn.close()
+
+
 def main() -> None:
-    trends = build_trends()
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUTPUT_PATH.open("w", encoding="utf-8") as f:
+    parser = argparse.ArgumentParser(description="Aggregate signup trends into signup_trends.json")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite DB (default: server/educonnect.db)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH, help="Output JSON (default: public/signup_trends.json)")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="sql",
+                        help="Count in SQLite (sql, default), row by row in Python (python) or in fixed-size sketches (stream)")
+    parser.add_argument("--sketch-counters", type=int, default=SKETCH_COUNTERS,
+                        help="With --engine stream: top-k counters per field; a listed count exceeds the true one "
+                             f"by at most (values seen) / counters (default: {SKETCH_COUNTERS})")
+    parser.add_argument("--hll-precision", type=int, default=HLL_PRECISION,
+                        help="With --engine stream: 2**P unique-count registers per field, standard error "
+                             f"1.04 / sqrt(2**P) (default: {HLL_PRECISION}, about 1.6%%)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Apply only users changed since the last run to the saved trend state")
+    parser.add_argument("--state", type=Path, default=STATE_PATH,
+                        help="Trend state for --incremental (default: server/signup_trends_state.db)")
+    parser.add_argument("--rebuild", action="store_true", help="With --incremental: rebuild the state from scratch")
+    parser.add_argument("--windows", type=int, nargs="*", default=DEFAULT_WINDOWS,
+                        help="With --incremental: day windows to emit under \"windows\" (default: 7 30)")
+    parser.add_argument("--as-of", type=date.fromisoformat,
+                        help="With --incremental: last day of the windows, YYYY-MM-DD (default: today, UTC)")
+    parser.add_argument("--check-parity", action="store_true",
+                        help="Also run the other engine (sql for --incremental) and exit non-zero if the summaries differ")
+    args = parser.parse_args()
+    if args.sketch_counters < 1:
+        parser.error("--sketch-counters must be at least 1")
+    if not 4 <= args.hll_precision <= 16:
+        parser.error("--hll-precision must be between 4 and 16")
+
+    if args.incremental:
+        engine, other = "incremental", "sql"
+        trends = build_trends_incremental(args.db, args.state, args.rebuild, args.windows, args.as_of)
+    elif args.engine == "stream":
+        engine, other = "stream", "sql"
+        trends = build_trends("stream", args.db, counters=args.sketch_counters, precision=args.hll_precision)
+    else:
+        engine, other = args.engine, "python" if args.engine == "sql" else "sql"
+        trends = build_trends(args.engine, args.db)
+    if args.check_parity and engine == "stream":
+        # Sketches are approximate: check the error bound and report the accuracy instead
+        violations, recall, unique_error = sketch_check(build_trends(other, args.db), trends)
+        for line in violations:
+            print(f"Bound violated: {line}", file=sys.stderr)
+        if violations:
+            sys.exit(1)
+        print(f"Sketch check passed (stream vs {other}): {recall:.1%} of exact top values listed, "
+              f"worst unique-count error {unique_error:.2%}")
+    elif args.check_parity:
+        # Windowed sections only exist in the incremental state
+        if build_trends(other, args.db) != {k: v for k, v in trends.items() if k != "windows"}:
+            print(f"Parity check failed: {engine} and {other} engines disagree", file=sys.stderr)
+            sys.exit(1)
+        print(f"Parity check passed ({engine} == {other})")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with args.output.open("w", encoding="utf-8") as f:
         json.dump(trends, f, indent=2, ensure_ascii=False)
-    print(f"Wrote signup trends to {OUTPUT_PATH}")
+    print(f"Wrote signup trends to {args.output}")
 
 
 if __name__ == "__main__":
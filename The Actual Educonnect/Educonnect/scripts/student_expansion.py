@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Streaming expansion engine behind expand_us_students_with_programmes.py and
+expand_ugandan_students_with_programmes.py.
+
+For each programme in public/university_curriculum.json it clones base students
+(sampled with replacement), sets University to the programme's university and fills
+the extra 'Degree Program' column. The output keeps the base schema plus that column
+and starts with the base rows unchanged.
+
+Only the base pool is held in memory. Synthetic rows are produced and written in blocks
+of BLOCK_ROWS, so memory does not grow with the number of programmes or rows per
+programme. Sampling uses random.Random(--seed), so the same inputs and options give the
+same file.
+
+Rows per programme:
+- --per-programme N (default 40) for every programme, times its weight,
+- or --total N spread over all programmes in proportion to their weights.
+--weights points to a JSON object mapping a course name, a "Course (College)" label or a
+university name to a weight (course match first, then university; default 1.0).
+
+Run from Educonnect root:
+  python scripts/student_expansion.py --dataset ug
+  python scripts/student_expansion.py --dataset us --total 2000000 --weights weights.json --format parquet
+"""
+
+import argparse
+import csv
+import json
+import random
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import student_parquet
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+PUBLIC_DIR = BASE_DIR / "public"
+PROGRAMMES_PATH = PUBLIC_DIR / "university_curriculum.json"
+
+DATASETS = {
+    "us": {
+        "label": "US",
+        "base": PUBLIC_DIR / "us_students_dataset_1500.csv",
+        "output": PUBLIC_DIR / "us_students_dataset_1500_extended.csv",
+        "default_university": "Unknown University",
+    },
+    "ug": {
+        "label": "Ugandan",
+        "base": PUBLIC_DIR / "ugandan_students_dataset_1050.csv",
+        "output": PUBLIC_DIR / "ugandan_students_dataset_1050_extended.csv",
+        "default_university": "Makerere University",
+    },
+}
+
+# How many synthetic students to generate per programme (before weighting)
+SYNTHETIC_PER_PROGRAMME = 40
+DEFAULT_SEED = 42
+# Synthetic rows built and written at a time
+BLOCK_ROWS = 10_000
+
+
+def load_base_pool(path: Path) -> Tuple[List[str], List[List[str]]]:
+    """(header, rows as lists padded / cut to the header length)."""
+    with path.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        width = len(header)
+        rows = [(r + [""] * width)[:width] for r in reader if r]
+    return header, rows
+
+
+def load_programmes(path: Path = PROGRAMMES_PATH) -> List[dict]:
+    if not path.exists():
+        raise FileNotFoundError(f"{path} not found. Run the scraper first.")
+    with path.open("r", encoding="utf-8") as f:
+        programmes = json.load(f)
+    # Filter out any entries without a course name
+    return [p for p in programmes if p.get("course")]
+
+
+def programme_plan(
+    programmes: List[dict],
+    default_university: str,
+    per_programme: int = SYNTHETIC_PER_PROGRAMME,
+    total: Optional[int] = None,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Tuple[str, str, int]]:
+    """[(university, degree program, rows)] for every programme."""
+    weights = weights or {}
+    entries = []
+    for programme in programmes:
+        university = (programme.get("university") or "").strip() or default_university
+        course = (programme.get("course") or "").strip()
+        college = (programme.get("college") or "").strip()
+        # Add degree program (and optionally include college in text)
+        degree = f"{course} ({college})" if college else course
+        weight = weights.get(degree, weights.get(course, weights.get(university, 1.0)))
+        entries.append((university, degree, max(0.0, float(weight))))
+
+    if total is None:
+        return [(u, d, round(per_programme * w)) for u, d, w in entries]
+    # Largest remainder, so the counts add up to exactly `total`
+    weight_sum = sum(w for _, _, w in entries)
+    if not weight_sum:
+        return [(u, d, 0) for u, d, _ in entries]
+    shares = [total * w / weight_sum for _, _, w in entries]
+    counts = [int(s) for s in shares]
+    by_remainder = sorted(range(len(entries)), key=lambda i: counts[i] - shares[i])
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return [(u, d, n) for (u, d, _), n in zip(entries, counts)]
+
+
+class StreamingWriter:
+    """Append blocks of list rows to a CSV or Parquet file."""
+
+    def __init__(self, path: Path, fieldnames: List[str], fmt: str = "csv"):
+        self.rows = 0
+        self._parquet = None
+        self._file = None
+        if fmt == "parquet":
+            self._parquet = student_parquet.ParquetStudentWriter(path, fieldnames)
+        else:
+            self._file = path.open("w", encoding="utf-8", newline="")
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(fieldnames)
+
+    def write(self, rows: List[List[str]]) -> None:
+        if not rows:
+            return
+        self.rows += len(rows)
+        if self._parquet is not None:
+            self._parquet.write_columns([list(column) for column in zip(*rows)])
+        else:
+            self._csv.writerows(rows)
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        else:
+            self._file.close()
+
+    def __enter__(self) -> "StreamingWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def expand(
+    base_path: Path,
+    output_path: Path,
+    plan: List[Tuple[str, str, int]],
+    fmt: str = "csv",
+    seed: int = DEFAULT_SEED,
+    verbose: bool = True,
+) -> int:
+    """Write base rows, then each programme's synthetic rows; returns the rows written."""
+    header, pool = load_base_pool(base_path)
+    if not pool:
+        raise RuntimeError("Base dataset is empty; cannot generate synthetic students.")
+    if verbose:
+        print(f"Loaded {len(pool)} base students from {base_path.name}.")
+
+    # Ensure 'Degree Program' column exists
+    fieldnames = list(header)
+    if "Degree Program" not in fieldnames:
+        fieldnames.append("Degree Program")
+        pool = [row + [""] for row in pool]
+    if "University" not in fieldnames:
+        fieldnames.append("University")
+        pool = [row + [""] for row in pool]
+    university_col, degree_col = fieldnames.index("University"), fieldnames.index("Degree Program")
+
+    rng = random.Random(seed)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with StreamingWriter(output_path, fieldnames, fmt) as writer:
+        for start in range(0, len(pool), BLOCK_ROWS):
+            writer.write(pool[start:start + BLOCK_ROWS])
+        for university, degree, count in plan:
+            if verbose:
+                print(f"- Generating {count} students for: {university} – {degree}")
+            # Sample with replacement so we can support many programmes; other fields
+            # (skills, interests, etc.) stay as-is so recommendations keep working cross-field
+            for done in range(0, count, BLOCK_ROWS):
+                block = []
+                for i in rng.choices(range(len(pool)), k=min(BLOCK_ROWS, count - done)):
+                    row = pool[i].copy()
+                    row[university_col] = university
+                    row[degree_col] = degree
+                    block.append(row)
+                writer.write(block)
+    return writer.rows
+
+
+def main(dataset: Optional[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Expand a students dataset with synthetic students per programme")
+    if dataset is None:
+        parser.add_argument("--dataset", choices=sorted(DATASETS), required=True, help="us or ug")
+    parser.add_argument("--base", type=Path, help="Base CSV (default: the dataset's public/*.csv)")
+    parser.add_argument("--programmes", type=Path, default=PROGRAMMES_PATH,
+                        help="Programmes JSON (default: public/university_curriculum.json)")
+    parser.add_argument("--per-programme", type=int, default=SYNTHETIC_PER_PROGRAMME,
+                        help=f"Synthetic students per programme, times its weight (default: {SYNTHETIC_PER_PROGRAMME})")
+    parser.add_argument("--total", type=int, help="Instead: this many synthetic students in total, split by weight")
+    parser.add_argument("--weights", type=Path,
+                        help="JSON object of course / university name -> weight (default weight 1)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"Sampling seed (default: {DEFAULT_SEED})")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="csv (default) or parquet (typed, list and dictionary columns, zstd; needs pyarrow)")
+    parser.add_argument("--output", type=Path, help="Output file (default: public/<dataset>_extended.<format>)")
+    parser.add_argument("--quiet", action="store_true", help="Don't list every programme")
+    args = parser.parse_args()
+
+    config = DATASETS[dataset or args.dataset]
+    if args.format == "parquet":
+        student_parquet.require_pyarrow()
+    output_path = args.output or config["output"].with_suffix(f".{args.format}")
+    weights = {}
+    if args.weights:
+        with args.weights.open("r", encoding="utf-8") as f:
+            weights = json.load(f)
+
+    programmes = load_programmes(args.programmes)
+    print(f"Loaded {len(programmes)} programmes from {args.programmes.name}.")
+    plan = programme_plan(programmes, config["default_university"], args.per_programme, args.total, weights)
+
+    t0 = time.perf_counter()
+    rows = expand(args.base or config["base"], output_path, plan, args.format, args.seed, verbose=not args.quiet)
+    elapsed = time.perf_counter() - t0
+    print(f"\nWrote {rows} rows to {output_path} ({elapsed:.1f}s, {rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
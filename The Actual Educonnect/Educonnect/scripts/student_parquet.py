@@ -0,0 +1,190 @@
+"""
+Columnar (Parquet) output for the student datasets, shared by generate_ugandan_students.py
+and the expand_*_students_with_programmes.py scripts.
+
+Columns keep their CSV header names, but with real types instead of text:
+
+- comma-separated fields (course codes, skills, interests, ...) are list<string>, split
+  and trimmed once here so consumers never re-split them,
+- repeated labels (university, city, learning style, ...) are dictionary-encoded and
+  come back as pandas categoricals,
+- GPAs are float64 and credit / course counts int32; "None" or blank cells become null,
+- everything else stays a string.
+
+Files are zstd-compressed and written in row groups of ROW_GROUP_ROWS, so writers can
+stream blocks in and readers can pick just the columns they need:
+
+    read_students("public/ugandan_students_dataset_1050.parquet", columns=["University", "Hobbies"])
+
+Needs pyarrow (pip install pyarrow); CSV output works without it. pyarrow is imported
+by require_pyarrow() on first use, not when this module is imported, so CSV-only runs
+don't pay its import time and memory.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# Optional dependency, loaded by require_pyarrow()
+np = pa = pc = pq = None
+
+ROW_GROUP_ROWS = 100_000
+COMPRESSION = "zstd"
+
+LIST_COLUMNS = {
+    "Course Codes", "Technical Skills", "Soft Skills", "Research Interests", "Professional Interests",
+    "Hobbies", "CS and Data Science Interests", "Strong Computing Fields", "Weak Computing Fields",
+}
+CATEGORY_COLUMNS = {
+    "First Name", "Middle Name", "Last Name", "Gender", "Nationality", "Country of Residence",
+    "City", "State", "University", "Degree Program",
+    "Preferred Learning Style", "Study Partners Preferences", "Preferred Study Hours",
+}
+FLOAT_COLUMNS = {"Current GPA / CGPA", "Previous GPA (historic tracking)"}
+INT_COLUMNS = {"Credits Completed", "Credits Remaining", "Courses Enrolled Per Semester", "Course Units"}
+
+_FLOAT_TEXT = r"^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$"
+_INT_TEXT = r"^\s*[-+]?\d+\s*$"
+
+
+def require_pyarrow() -> None:
+    global np, pa, pc, pq
+    if pa is not None:
+        return
+    try:
+        import numpy
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow") from None
+    np, pa, pc, pq = numpy, pyarrow, pyarrow.compute, pyarrow.parquet
+
+
+def column_type(name: str) -> "pa.DataType":
+    if name in LIST_COLUMNS:
+        return pa.list_(pa.string())
+    if name in CATEGORY_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    if name in FLOAT_COLUMNS:
+        return pa.float64()
+    if name in INT_COLUMNS:
+        return pa.int32()
+    return pa.string()
+
+
+def student_schema(columns: List[str]) -> "pa.Schema":
+    require_pyarrow()
+    return pa.schema([(name, column_type(name)) for name in columns])
+
+
+def _text(values: List[Any]) -> "pa.Array":
+    try:
+        return pa.array(values, pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([v if v is None or isinstance(v, str) else str(v) for v in values], pa.string())
+
+
+def _numbers(values: List[Any], target: "pa.DataType", pattern: str) -> "pa.Array":
+    try:
+        arr = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Numbers mixed with placeholders such as "None"
+        arr = pa.array([None if isinstance(v, str) else v for v in values])
+    if pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type):
+        # Text from a CSV: anything that isn't a number is missing
+        arr = pc.utf8_trim_whitespace(pc.if_else(pc.match_substring_regex(arr, pattern), arr, None))
+    elif pa.types.is_null(arr.type):
+        return pa.nulls(len(values), target)
+    return pc.cast(arr, target)
+
+
+def _lists(values: List[Any]) -> "pa.Array":
+    """Comma-separated cells -> list<string> of trimmed, non-empty items."""
+    parts = pc.split_pattern(pc.fill_null(_text(values), ""), ",")
+    items = pc.utf8_trim_whitespace(pc.list_flatten(parts))
+    keep = pc.not_equal(items, "")
+    parents = pc.filter(pc.list_parent_indices(parts), keep).to_numpy()
+    offsets = np.zeros(len(values) + 1, dtype=np.int32)
+    np.cumsum(np.bincount(parents, minlength=len(values)), out=offsets[1:])
+    return pa.ListArray.from_arrays(pa.array(offsets), pc.filter(items, keep))
+
+
+def column_array(name: str, values: List[Any]) -> "pa.Array":
+    """Arrow array for one column, from CSV text or already-typed Python values."""
+    require_pyarrow()
+    if name in LIST_COLUMNS:
+        return _lists(values)
+    if name in CATEGORY_COLUMNS:
+        return _text(values).dictionary_encode().cast(column_type(name))
+    if name in FLOAT_COLUMNS:
+        return _numbers(values, pa.float64(), _FLOAT_TEXT)
+    if name in INT_COLUMNS:
+        return _numbers(values, pa.int32(), _INT_TEXT)
+    return _text(values)
+
+
+class ParquetStudentWriter:
+    """Stream blocks of students into one Parquet file with large row groups."""
+
+    def __init__(self, path, columns: List[str], compression: str = COMPRESSION, row_group_rows: int = ROW_GROUP_ROWS):
+        require_pyarrow()
+        self.columns = list(columns)
+        self.schema = student_schema(self.columns)
+        self.row_group_rows = row_group_rows
+        self.rows = 0
+        self._pending: List["pa.RecordBatch"] = []
+        self._pending_rows = 0
+        self._writer = pq.ParquetWriter(str(path), self.schema, compression=compression)
+
+    def write_columns(self, columns: List[List[Any]]) -> None:
+        """One block given as a list of columns, in self.columns order."""
+        batch = pa.record_batch([column_array(n, v) for n, v in zip(self.columns, columns)], schema=self.schema)
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        self.rows += batch.num_rows
+        if self._pending_rows >= self.row_group_rows:
+            self._flush()
+
+    def write_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """One block of CSV-style dict rows; missing keys are blank."""
+        rows = list(rows)
+        self.write_columns([[row.get(name, "") for row in rows] for name in self.columns])
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._writer.write_table(pa.Table.from_batches(self._pending), row_group_size=self.row_group_rows)
+            self._pending, self._pending_rows = [], 0
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+    def __enter__(self) -> "ParquetStudentWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def concat_parquet(paths: List, out_path) -> None:
+    """Copy the row groups of several same-schema files into one, a row group at a time."""
+    require_pyarrow()
+    writer = None
+    try:
+        for path in paths:
+            part = pq.ParquetFile(str(path))
+            if writer is None:
+                writer = pq.ParquetWriter(str(out_path), part.schema_arrow, compression=COMPRESSION)
+            for i in range(part.num_row_groups):
+                writer.write_table(part.read_row_group(i))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def read_students(path, columns: Optional[List[str]] = None):
+    """pandas DataFrame of a student Parquet file (or directory of shards), only the requested columns."""
+    require_pyarrow()
+    path = Path(path)
+    source = sorted(str(p) for p in path.glob("*.parquet")) if path.is_dir() else str(path)
+    return pq.read_table(source, columns=columns).to_pandas()
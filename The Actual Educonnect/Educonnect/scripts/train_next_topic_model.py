@@ -2,25 +2,45 @@
 """
 Train an ML model for "next topic to study" recommendation.
 
-- Reads users + study_stats from EduConnect SQLite DB.
+- Reads users + study_stats from EduConnect SQLite DB in chunks; study_stats fields are
+  pulled out with json_extract in SQLite, the rest is featurized column-wise (pandas/NumPy).
 - Builds features: course_area (one-hot), interest/weak/strong counts, total_hours,
   and per-field final scores (0–100 or 0 if not taken).
 - Target: field that needs work (lowest score or first not taken).
 - Trains a Logistic Regression (multinomial) so we can export weights for Node inference.
 - Exports:
-  - server/ml_predictions.json  — user_id -> recommended field_id (for known users)
+  - server/ml_predictions.jsonl — one line per known user: recommended field_id, its probability
+                                  and optionally the top-k fields (--predictions-format json for
+                                  the old user_id -> field_id dict)
   - server/model_export.json    — feature_names, classes, coefficients, intercept (for Node)
+  - server/model_export.bin     — the same as a versioned binary artifact: 24-byte header,
+                                  JSON metadata, contiguous little-endian float32 arrays, CRC32
   - server/next_topic_model.joblib — full model (for Python retraining/eval)
 
+Incremental mode (--incremental) keeps raw feature vectors in server/next_topic_features.db
+with a watermark into the server's user_changes log (filled by triggers on users). Each run
+re-featurizes only users changed since the watermark, refits the saved model warm-started
+from its previous coefficients on the stored vectors, and appends only the changed users'
+lines to ml_predictions.jsonl (last line per id wins; "field": null marks a removed user).
+
 Run from Educonnect root:
   python scripts/train_next_topic_model.py
+  python scripts/train_next_topic_model.py --check-parity   # vectorized vs per-row features
+  python scripts/train_next_topic_model.py --incremental    # e.g. from cron
+  python scripts/train_next_topic_model.py --select-model   # CV over models and C, train the best
 """
 
+import argparse
 import json
 import sqlite3
+import struct
+import sys
+import time
+import zlib
 from pathlib import Path
 
 import numpy as np
+import pandas as pd
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DB_PATH = BASE_DIR / "server" / "educonnect.db"
@@ -30,6 +50,55 @@ FIELD_IDS = [
     "ai", "ml", "ds", "nlp", "cv", "cyber", "web", "law", "business"
 ]
 COURSE_AREAS = ["Computing & IT", "Law", "Business & Management", "Other"]
+FEATURE_NAMES = (
+    [f"course_area_{a}" for a in COURSE_AREAS]
+    + ["n_interests", "n_weak", "n_strong", "total_hours"]
+    + [f"final_score_{f}" for f in FIELD_IDS]
+)
+# (column, cap) for the list-count features, in feature order
+LIST_FEATURES = [("ordered_interests", 20), ("weak_topics", 10), ("strong_topics", 10)]
+SCORE_COLUMNS = [f"score_{f}" for f in FIELD_IDS]
+CHUNK_SIZE = 50_000
+# Characters str.strip() removes, spelled out so the pattern means the same in re and RE2 (pyarrow strings)
+_WHITESPACE = "".join(map(chr, [
+    0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x1C, 0x1D, 0x1E, 0x1F, 0x20, 0x85, 0xA0, 0x1680,
+    *range(0x2000, 0x200B), 0x2028, 0x2029, 0x202F, 0x205F, 0x3000,
+]))
+# One match per item that split_list() keeps: first non-blank char up to the next comma
+_LIST_ITEM_PATTERN = f"[^,{_WHITESPACE}][^,]*"
+
+
+def _stats_field(path):
+    # json_extract raises on malformed JSON; the per-row code treats that as {}.
+    # Numeric strings ("42") become numbers like float() does; NULL stays NULL.
+    return f"CASE WHEN json_valid(study_stats) THEN CAST(json_extract(study_stats, '{path}') AS REAL) END"
+
+
+FEATURE_COLUMNS = (
+    "id, course_area, ordered_interests, weak_topics, strong_topics, "
+    + f"{_stats_field('$.totalHours')} AS total_hours, "
+    + ", ".join(f"{_stats_field(f'$.fieldProgress.{fid}.finalScore')} AS score_{fid}" for fid in FIELD_IDS)
+)
+FEATURE_SQL = f"SELECT {FEATURE_COLUMNS} FROM users WHERE role = ? ORDER BY rowid"
+# Incremental mode: only the users listed in temp.changed_users
+CHANGED_FEATURE_SQL = (
+    f"SELECT {FEATURE_COLUMNS} FROM users WHERE role = ? AND id IN (SELECT id FROM temp.changed_users) ORDER BY rowid"
+)
+
+# Incremental mode: raw (unscaled) feature vectors per user, plus the user_changes watermark
+FEATURE_STORE_PATH = SERVER_DIR / "next_topic_features.db"
+MODEL_PATH = SERVER_DIR / "next_topic_model.joblib"
+
+# Binary artifact (model_export.bin). Header: magic, version, reserved, n_features, n_classes,
+# metadata length, CRC32 of everything after the header. Then the metadata JSON (featureNames,
+# classes, modelType) padded to 4 bytes, then float32 mean[F], scale[F], coefficients[C*F], intercept[C].
+BINARY_MAGIC = b"ECNT"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sHHIIII")
+
+# Model selection (--select-model): regularization grid and cross-validation folds
+SELECTION_C_GRID = [0.01, 0.1, 0.5, 1.0, 10.0]
+SELECTION_FOLDS = 5
 
 
 def split_list(s):
@@ -105,7 +174,424 @@ def get_target_field_id(row):
     return best or FIELD_IDS[0]
 
 
+def count_list_items(values):
+    """Vectorized len(split_list(v)) for a Series of comma-separated strings."""
+    return values.str.count(_LIST_ITEM_PATTERN).fillna(0).to_numpy(dtype=np.float64)
+
+
+def target_indices(raw_scores):
+    """Vectorized get_target_field_id over raw (unclipped) scores, NaN = not taken."""
+    missing = np.isnan(raw_scores)
+    filled = np.where(missing, np.inf, raw_scores)
+    best = filled.argmin(axis=1)
+    best = np.where(filled[np.arange(len(best)), best] < 101.0, best, 0)
+    return np.where(missing.any(axis=1), missing.argmax(axis=1), best)
+
+
+def featurize_frame(df):
+    """Feature matrix and target indices for a chunk of FEATURE_SQL rows (same values as the per-row code)."""
+    n = len(df)
+    X = np.zeros((n, len(FEATURE_NAMES)), dtype=np.float64)
+
+    area = df["course_area"].fillna("").astype(str).str.strip().replace("", "Other")
+    area_idx = area.map({a: i for i, a in enumerate(COURSE_AREAS)}).fillna(COURSE_AREAS.index("Other"))
+    area_idx = area_idx.to_numpy(dtype=np.int64)
+    X[np.arange(n), area_idx] = 1.0
+
+    offset = len(COURSE_AREAS)
+    for j, (column, cap) in enumerate(LIST_FEATURES):
+        X[:, offset + j] = np.minimum(count_list_items(df[column]), cap) / cap
+
+    hours = df["total_hours"].fillna(0).to_numpy(dtype=np.float64)
+    X[:, offset + len(LIST_FEATURES)] = np.minimum(hours, 200) / 100.0
+
+    raw_scores = df[SCORE_COLUMNS].to_numpy(dtype=np.float64)
+    X[:, offset + len(LIST_FEATURES) + 1:] = np.clip(np.nan_to_num(raw_scores, nan=0.0), 0, 100) / 100.0
+    return X, target_indices(raw_scores)
+
+
+def load_features(db_path, chunk_size=CHUNK_SIZE, user_ids=None):
+    """Read role='user' rows (only user_ids, if given) in chunks and return (ids, X, y)."""
+    conn = sqlite3.connect(db_path)
+    ids, X_parts, y_parts = [], [], []
+    sql = FEATURE_SQL
+    try:
+        if user_ids is not None:
+            conn.execute("CREATE TEMP TABLE changed_users (id TEXT PRIMARY KEY)")
+            conn.executemany("INSERT OR IGNORE INTO temp.changed_users VALUES (?)", ((i,) for i in user_ids))
+            sql = CHANGED_FEATURE_SQL
+        for chunk in pd.read_sql_query(sql, conn, params=("user",), chunksize=chunk_size):
+            X_chunk, y_chunk = featurize_frame(chunk.reset_index(drop=True))
+            ids.extend(chunk["id"].tolist())
+            X_parts.append(X_chunk)
+            y_parts.append(y_chunk)
+    finally:
+        conn.close()
+    if not X_parts:
+        return [], np.zeros((0, len(FEATURE_NAMES))), np.zeros(0, dtype=np.int64)
+    return ids, np.vstack(X_parts), np.concatenate(y_parts)
+
+
+def check_parity(db_path, chunk_size=CHUNK_SIZE):
+    """Compare load_features() with build_feature_vector()/get_target_field_id() row by row."""
+    ids, X, y = load_features(db_path, chunk_size)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(
+        "SELECT id, course_area, ordered_interests, weak_topics, strong_topics, study_stats "
+        "FROM users WHERE role = ? ORDER BY rowid",
+        ("user",),
+    )
+    mismatches = 0
+    for i, row in enumerate(rows):
+        row = dict(row)
+        expected_x = build_feature_vector(row, None)
+        expected_y = FIELD_IDS.index(get_target_field_id(row))
+        if row["id"] != ids[i] or list(X[i]) != expected_x or y[i] != expected_y:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  mismatch for user {row['id']}: {list(X[i])} / {FIELD_IDS[y[i]]} "
+                      f"!= {expected_x} / {FIELD_IDS[expected_y]}")
+    conn.close()
+    print(f"Parity check: {len(ids)} users, {mismatches} mismatches")
+    return mismatches == 0
+
+
+def predict_top_k(model, X_scaled, top_k, chunk_size=CHUNK_SIZE):
+    """Yield (field ids, probabilities), each shaped (rows, top_k) and best first, per chunk of rows."""
+    classes = np.array(FIELD_IDS)[model.classes_]
+    top_k = min(top_k, len(classes))
+    for start in range(0, X_scaled.shape[0], chunk_size):
+        proba = model.predict_proba(X_scaled[start:start + chunk_size])
+        # stable sort keeps predict()'s first-max tie-breaking for the top entry
+        order = np.argsort(-proba, axis=1, kind="stable")[:, :top_k]
+        yield classes[order], np.take_along_axis(proba, order, axis=1)
+
+
+def export_predictions(path, ids, model, X_scaled, fmt="jsonl", top_k=1, chunk_size=CHUNK_SIZE, append=False):
+    """Write batched predictions for ids (row i of X_scaled). Returns the number of users written.
+
+    With append=True (jsonl only) lines are added to the existing file; readers keep the last line per id.
+    """
+    n = min(len(ids), X_scaled.shape[0])
+    start = 0
+    with open(path, "a" if append else "w", encoding="utf-8") as f:
+        if fmt == "json":
+            predictions = {}
+            for fields, _ in predict_top_k(model, X_scaled[:n], 1, chunk_size):
+                predictions.update(zip(ids[start:start + len(fields)], fields[:, 0].tolist()))
+                start += len(fields)
+            json.dump(predictions, f, separators=(",", ":"))
+            return n
+        for fields, probs in predict_top_k(model, X_scaled[:n], top_k, chunk_size):
+            lines = []
+            for user_id, user_fields, user_probs in zip(ids[start:start + len(fields)], fields.tolist(), probs.tolist()):
+                line = f'{{"id":{json.dumps(user_id)},"field":"{user_fields[0]}","p":{user_probs[0]:.4f}'
+                if top_k > 1:
+                    line += ',"top":[' + ",".join(f'["{fid}",{p:.4f}]' for fid, p in zip(user_fields, user_probs)) + "]"
+                lines.append(line + "}\n")
+            f.writelines(lines)
+            start += len(fields)
+    return n
+
+
+def update_predictions(path, ids, model, X_scaled, removed, fmt="jsonl", top_k=1, chunk_size=CHUNK_SIZE):
+    """Incremental mode: rewrite only the entries of changed users; removed users get "field": null (jsonl)."""
+    if fmt == "jsonl":
+        if ids:
+            export_predictions(path, ids, model, X_scaled, fmt, top_k, chunk_size, append=path.exists())
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(f'{{"id":{json.dumps(user_id)},"field":null}}\n' for user_id in removed)
+        return
+    predictions = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    start = 0
+    for fields, _ in predict_top_k(model, X_scaled, 1, chunk_size) if ids else ():
+        predictions.update(zip(ids[start:start + len(fields)], fields[:, 0].tolist()))
+        start += len(fields)
+    for user_id in removed:
+        predictions.pop(user_id, None)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(predictions, f, separators=(",", ":"))
+
+
+def export_model(model, scaler, joblib):
+    """Write next_topic_model.joblib and model_export.json (for Node) for a fitted model and scaler."""
+    SERVER_DIR.mkdir(parents=True, exist_ok=True)
+    joblib.dump(
+        {"model": model, "scaler": scaler, "feature_names": FEATURE_NAMES, "classes": FIELD_IDS},
+        MODEL_PATH,
+    )
+
+    # Export for Node: coefficients and intercept (after scaling)
+    # Node will need to scale features the same way: (x - mean) / std
+    mean_ = scaler.mean_.tolist()
+    scale_ = scaler.scale_.tolist()
+    scale_ = [s if s > 1e-8 else 1.0 for s in scale_]
+    coef = model.coef_
+    intercept = model.intercept_
+    if coef.shape[0] == 1:
+        # Binary models keep one row; softmax over (-z/2, z/2) gives the same sigmoid(z) in Node
+        coef = np.vstack([-coef / 2, coef / 2])
+        intercept = np.concatenate([-intercept / 2, intercept / 2])
+    coef = coef.tolist()
+    intercept = intercept.tolist()
+    export = {
+        "modelType": "logistic_multinomial",
+        "featureNames": FEATURE_NAMES,
+        # one entry per coefficient row (fields never seen as a target have no row)
+        "classes": [FIELD_IDS[c] for c in model.classes_],
+        "scaler": {"mean": mean_, "scale": scale_},
+        "coefficients": coef,
+        "intercept": intercept,
+    }
+    with open(SERVER_DIR / "model_export.json", "w", encoding="utf-8") as f:
+        json.dump(export, f, indent=2)
+    write_binary_export(SERVER_DIR / "model_export.bin", export)
+
+
+def write_binary_export(path, export):
+    """Write an export dict (model_export.json layout) as the binary artifact."""
+    meta = json.dumps(
+        {k: export[k] for k in ("modelType", "featureNames", "classes")}, separators=(",", ":")
+    ).encode("utf-8")
+    meta += b" " * (-len(meta) % 4)
+    arrays = [export["scaler"]["mean"], export["scaler"]["scale"], export["coefficients"], export["intercept"]]
+    body = meta + b"".join(np.asarray(a, dtype="<f4").tobytes() for a in arrays)
+    n_classes, n_features = np.asarray(export["coefficients"]).shape
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, n_features, n_classes, len(meta), zlib.crc32(body))
+    tmp = path.with_suffix(".bin.tmp")
+    tmp.write_bytes(header + body)
+    tmp.replace(path)
+
+
+def read_binary_export(path):
+    """Read model_export.bin back into the model_export.json layout (NumPy float32 arrays)."""
+    data = Path(path).read_bytes()
+    magic, version, _, n_features, n_classes, meta_len, crc = BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError(f"{path}: not a version {BINARY_VERSION} next-topic model")
+    body = memoryview(data)[BINARY_HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise ValueError(f"{path}: checksum mismatch")
+    export = json.loads(bytes(body[:meta_len]))
+    floats = np.frombuffer(body[meta_len:], dtype="<f4")
+    sizes = [n_features, n_features, n_classes * n_features, n_classes]
+    if floats.size != sum(sizes):
+        raise ValueError(f"{path}: truncated arrays")
+    mean, scale, coef, intercept = np.split(floats, np.cumsum(sizes)[:-1])
+    export["scaler"] = {"mean": mean, "scale": scale}
+    export["coefficients"] = coef.reshape(n_classes, n_features)
+    export["intercept"] = intercept
+    return export
+
+
+def export_predict(export, X):
+    """mlInference.js arithmetic on a feature matrix: scale, logits, argmax -> class ids."""
+    scale = np.asarray(export["scaler"]["scale"], dtype=np.float64)
+    scale = np.where(scale > 1e-8, scale, 1.0)
+    scaled = (X - np.asarray(export["scaler"]["mean"], dtype=np.float64)) / scale
+    logits = scaled @ np.asarray(export["coefficients"], dtype=np.float64).T + np.asarray(export["intercept"], dtype=np.float64)
+    return np.asarray(export["classes"])[logits.argmax(axis=1)]
+
+
+def check_binary_export(X):
+    """Compare JSON and binary artifact predictions on X; print and return the number of mismatches."""
+    with open(SERVER_DIR / "model_export.json", encoding="utf-8") as f:
+        from_json = export_predict(json.load(f), X)
+    from_binary = export_predict(read_binary_export(SERVER_DIR / "model_export.bin"), X)
+    mismatches = int((from_json != from_binary).sum())
+    print(f"Binary export parity: {len(X) - mismatches}/{len(X)} identical predictions")
+    return mismatches
+
+
+def open_feature_store(path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS features (user_id TEXT PRIMARY KEY, x BLOB NOT NULL, y INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    """)
+    return conn
+
+
+def store_watermark(store):
+    """user_changes.seq processed so far, or None if the store must be (re)built."""
+    meta = dict(store.execute("SELECT key, value FROM meta").fetchall())
+    if "watermark" not in meta or meta.get("feature_names") != json.dumps(FEATURE_NAMES):
+        return None
+    return int(meta["watermark"])
+
+
+def save_features(store, ids, X, y, removed=(), watermark=None, replace=False):
+    """Upsert feature rows, drop removed users and advance the watermark (caller commits)."""
+    if replace:
+        store.execute("DELETE FROM features")
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    store.executemany(
+        "INSERT OR REPLACE INTO features (user_id, x, y) VALUES (?, ?, ?)",
+        ((user_id, X[i].tobytes(), int(y[i])) for i, user_id in enumerate(ids)),
+    )
+    store.executemany("DELETE FROM features WHERE user_id = ?", ((user_id,) for user_id in removed))
+    store.executemany(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+        [("watermark", str(watermark)), ("feature_names", json.dumps(FEATURE_NAMES))],
+    )
+
+
+def load_store(store):
+    """All stored (ids, X, y), read as contiguous buffers."""
+    rows = store.execute("SELECT user_id, x, y FROM features ORDER BY user_id").fetchall()
+    if not rows:
+        return [], np.zeros((0, len(FEATURE_NAMES))), np.zeros(0, dtype=np.int64)
+    ids, xs, ys = zip(*rows)
+    X = np.frombuffer(b"".join(xs), dtype=np.float64).reshape(len(ids), len(FEATURE_NAMES))
+    return list(ids), X, np.array(ys, dtype=np.int64)
+
+
+def read_changes(db_path, watermark):
+    """(changed user ids, new watermark) from the user_changes log the server's triggers maintain."""
+    conn = sqlite3.connect(db_path)
+    try:
+        if watermark is None:
+            return None, conn.execute("SELECT COALESCE(MAX(seq), 0) FROM user_changes").fetchone()[0]
+        rows = conn.execute("SELECT user_id, seq FROM user_changes WHERE seq > ?", (watermark,)).fetchall()
+    finally:
+        conn.close()
+    return [r[0] for r in rows], max((r[1] for r in rows), default=watermark)
+
+
+def run_incremental(args, store, watermark, joblib):
+    """Re-featurize users changed since the watermark and warm-start the saved model on the store."""
+    changed, new_watermark = read_changes(args.db, watermark)
+    if not changed:
+        print("No profile changes since the last run; nothing to do.")
+        return
+
+    ids, X, y = load_features(args.db, args.chunk_size, user_ids=changed)
+    removed = sorted(set(changed) - set(ids))
+    save_features(store, ids, X, y, removed, new_watermark)
+
+    bundle = joblib.load(MODEL_PATH)
+    model, scaler = bundle["model"], bundle["scaler"]
+    _, X_all, y_all = load_store(store)
+    if len(y_all):
+        X_all_scaled = np.nan_to_num(scaler.transform(X_all), nan=0.0, posinf=0.0, neginf=0.0)
+        # Start from the previous coefficients unless the set of target classes changed
+        same_classes = np.array_equal(np.unique(y_all), model.classes_)
+        model.set_params(warm_start=same_classes, max_iter=args.warm_start_iter if same_classes else 500)
+        model.fit(X_all_scaled, y_all)
+        export_model(model, scaler, joblib)
+        check_binary_export(X_all)
+        refit = f"model refit on {len(y_all)} stored users ({'warm' if same_classes else 'cold'} start)"
+    else:
+        # No users left to fit on: keep the previous model, still record the removals
+        refit = "no stored users left, previous model kept"
+
+    predictions_path = SERVER_DIR / f"ml_predictions.{args.predictions_format}"
+    # Only deletions / role changes away from 'user': nothing to score
+    X_scaled = np.nan_to_num(scaler.transform(X), nan=0.0, posinf=0.0, neginf=0.0) if ids else X
+    update_predictions(predictions_path, ids, model, X_scaled, removed,
+                       args.predictions_format, args.top_k, args.chunk_size)
+    store.commit()
+
+    print(f"Incremental run: {len(ids)} users re-featurized, {len(removed)} removed, {refit}. Exported:")
+    print(f"  - {predictions_path} (changed entries only)")
+    if len(y_all):
+        print(f"  - {SERVER_DIR / 'model_export.json'}")
+        print(f"  - {SERVER_DIR / 'model_export.bin'}")
+        print(f"  - {MODEL_PATH}")
+
+
+def candidate_models(C):
+    """Linear models compared by --select-model.
+
+    Only multinomial models: model_export.json is read as softmax over the coefficient rows,
+    so a one-vs-rest model (e.g. SGDClassifier) would serve different probabilities.
+    """
+    from sklearn.linear_model import LogisticRegression
+
+    return {
+        "logreg": LogisticRegression(C=C, max_iter=500, random_state=42),
+        "logreg_balanced": LogisticRegression(C=C, max_iter=500, random_state=42, class_weight="balanced"),
+    }
+
+
+def scaled_folds(X, y, folds):
+    """Stratified folds, each scaled once with a scaler fit on its training part (shared by all candidates)."""
+    from sklearn.model_selection import StratifiedKFold
+    from sklearn.preprocessing import StandardScaler
+
+    out = []
+    for train, val in StratifiedKFold(n_splits=folds, shuffle=True, random_state=42).split(X, y):
+        scaler = StandardScaler().fit(X[train])
+        out.append((
+            np.nan_to_num(scaler.transform(X[train]), nan=0.0, posinf=0.0, neginf=0.0), y[train],
+            np.nan_to_num(scaler.transform(X[val]), nan=0.0, posinf=0.0, neginf=0.0), y[val],
+        ))
+    return out
+
+
+def _fit_fold(name, C, estimator, X_train, y_train, X_val, y_val):
+    t0 = time.perf_counter()
+    estimator.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - t0
+    return name, C, estimator.score(X_val, y_val), fit_seconds
+
+
+def select_model(X, y, folds=SELECTION_FOLDS, c_grid=SELECTION_C_GRID, n_jobs=-1):
+    """Cross-validate every candidate x C in parallel; print accuracy vs fit time, return the best (name, C)."""
+    from joblib import Parallel, delayed
+
+    fold_data = scaled_folds(X, y, folds)
+    t0 = time.perf_counter()
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(name, C, estimator, *fold)
+        for C in c_grid
+        for name, estimator in candidate_models(C).items()
+        for fold in fold_data
+    )
+    elapsed = time.perf_counter() - t0
+
+    scores = {}
+    for name, C, accuracy, fit_seconds in results:
+        scores.setdefault((name, C), []).append((accuracy, fit_seconds))
+    table = sorted(
+        ((name, C, np.mean([a for a, _ in r]), np.std([a for a, _ in r]), np.mean([f for _, f in r]))
+         for (name, C), r in scores.items()),
+        key=lambda row: (-row[2], row[4]),
+    )
+    print(f"Model selection: {len(results)} fits ({folds}-fold CV) in {elapsed:.1f}s")
+    print(f"{'model':<18}{'C':>8}{'accuracy':>10}{'std':>8}{'fit s':>8}")
+    for name, C, mean_acc, std_acc, fit_seconds in table:
+        print(f"{name:<18}{C:>8g}{mean_acc:>10.4f}{std_acc:>8.4f}{fit_seconds:>8.2f}")
+    best_name, best_c = table[0][:2]
+    print(f"Selected {best_name} (C={best_c:g})")
+    return best_name, best_c
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Train the next-topic recommendation model")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Users read from SQLite per chunk")
+    parser.add_argument("--check-parity", action="store_true",
+                        help="Only compare vectorized features/targets with the per-row implementation")
+    parser.add_argument("--predictions-format", choices=["jsonl", "json"], default="jsonl",
+                        help="jsonl: one line per user with probability (default); json: compact user_id -> field_id dict")
+    parser.add_argument("--top-k", type=int, default=1, help="Also list the k most likely fields per user (jsonl only)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-featurize users changed since the last run (full run the first time)")
+    parser.add_argument("--feature-store", type=Path, default=FEATURE_STORE_PATH)
+    parser.add_argument("--warm-start-iter", type=int, default=100,
+                        help="Max solver iterations when refitting from the previous coefficients")
+    parser.add_argument("--select-model", action="store_true",
+                        help="Cross-validate candidate models over a C grid and train the best one")
+    parser.add_argument("--folds", type=int, default=SELECTION_FOLDS)
+    parser.add_argument("--grid-c", type=float, nargs="+", default=SELECTION_C_GRID)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel fits for --select-model (-1: all cores)")
+    args = parser.parse_args()
+
+    if args.check_parity:
+        sys.exit(0 if check_parity(args.db, args.chunk_size) else 1)
+
     try:
         from sklearn.linear_model import LogisticRegression
         from sklearn.preprocessing import StandardScaler
@@ -114,97 +600,72 @@ def main():
         print("Install scikit-learn and joblib: pip install scikit-learn joblib")
         raise
 
-    if not DB_PATH.exists():
-        print(f"DB not found: {DB_PATH}. Start the server once to create it.")
+    if not args.db.exists():
+        print(f"DB not found: {args.db}. Start the server once to create it.")
         return
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.execute(
-        "SELECT id, course_area, ordered_interests, weak_topics, strong_topics, study_stats FROM users WHERE role = ?",
-        ("user",),
-    )
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
-
-    if len(rows) < 5:
+    store = None
+    if args.incremental:
+        store = open_feature_store(args.feature_store)
+        try:
+            watermark = store_watermark(store)
+            if watermark is not None and MODEL_PATH.exists():
+                return run_incremental(args, store, watermark, joblib)
+            print("No feature store yet; running a full training pass to build it.")
+            _, watermark = read_changes(args.db, None)
+        except sqlite3.OperationalError as e:
+            print(f"Incremental mode needs the user_changes table ({e}). Start the server once to create it.")
+            sys.exit(1)
+
+    ids, X, y = load_features(args.db, args.chunk_size)
+    if store is not None:
+        save_features(store, ids, X, y, watermark=watermark, replace=True)
+
+    if len(ids) < 5:
         print("Few users in DB; creating a minimal model from seed-like data.")
         # Synthetic fallback: still export a valid model_export so Node doesn't break
         n_features = 4 + 4 + len(FIELD_IDS)  # course_area(4) + n_* + total_hours(4) + field_scores(9)
         X = np.zeros((5, n_features))
         X[:, 0] = 1  # Computing & IT
         y = np.array([FIELD_IDS.index("ai"), FIELD_IDS.index("ml"), FIELD_IDS.index("ds"), FIELD_IDS.index("law"), FIELD_IDS.index("business")])
-    else:
-        feature_names = []
-        X_list = []
-        y_list = []
-        for row in rows:
-            vec = build_feature_vector(row, None, feature_names)
-            X_list.append(vec)
-            target_fid = get_target_field_id(row)
-            y_list.append(FIELD_IDS.index(target_fid))
-        X = np.array(X_list, dtype=np.float64)
-        y = np.array(y_list)
 
     n_features = X.shape[1]
-    feature_names_final = (
-        [f"course_area_{a}" for a in COURSE_AREAS]
-        + ["n_interests", "n_weak", "n_strong", "total_hours"]
-        + [f"final_score_{f}" for f in FIELD_IDS]
-    )
-    assert n_features == len(feature_names_final), (n_features, len(feature_names_final))
+    assert n_features == len(FEATURE_NAMES), (n_features, len(FEATURE_NAMES))
 
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
     # Handle possible constant columns
     X_scaled = np.nan_to_num(X_scaled, nan=0.0, posinf=0.0, neginf=0.0)
 
-    model = LogisticRegression(
-        multi_class="multinomial",
-        max_iter=500,
-        random_state=42,
-        C=0.5,
-    )
+    # StratifiedKFold needs at least n_splits members in the largest class
+    folds = min(args.folds, int(np.bincount(y).max())) if len(ids) >= 5 else 0
+    if args.select_model and folds < 2:
+        print("Too few users per field for cross-validation; training the default model.")
+    if args.select_model and folds >= 2:
+        best_name, best_c = select_model(X, y, folds, args.grid_c, args.n_jobs)
+        model = candidate_models(best_c)[best_name]
+    else:
+        # lbfgs fits a multinomial model by default (the multi_class argument was removed in scikit-learn 1.7+)
+        model = LogisticRegression(
+            max_iter=500,
+            random_state=42,
+            C=0.5,
+        )
     model.fit(X_scaled, y)
+    export_model(model, scaler, joblib)
+    check_binary_export(X)
 
-    SERVER_DIR.mkdir(parents=True, exist_ok=True)
-    joblib.dump(
-        {"model": model, "scaler": scaler, "feature_names": feature_names_final, "classes": FIELD_IDS},
-        SERVER_DIR / "next_topic_model.joblib",
-    )
-
-    # Predictions per user for known users
-    predictions = {}
-    for i, row in enumerate(rows):
-        if i < X.shape[0]:
-            pred_idx = model.predict(X_scaled[i : i + 1])[0]
-            predictions[row["id"]] = FIELD_IDS[pred_idx]
-
-    with open(SERVER_DIR / "ml_predictions.json", "w", encoding="utf-8") as f:
-        json.dump(predictions, f, indent=2)
-
-    # Export for Node: coefficients and intercept (after scaling)
-    # Node will need to scale features the same way: (x - mean) / std
-    mean_ = scaler.mean_.tolist()
-    scale_ = scaler.scale_.tolist()
-    scale_ = [s if s > 1e-8 else 1.0 for s in scale_]
-    coef = model.coef_.tolist()
-    intercept = model.intercept_.tolist()
-    export = {
-        "modelType": "logistic_multinomial",
-        "featureNames": feature_names_final,
-        "classes": FIELD_IDS,
-        "scaler": {"mean": mean_, "scale": scale_},
-        "coefficients": coef,
-        "intercept": intercept,
-    }
-    with open(SERVER_DIR / "model_export.json", "w", encoding="utf-8") as f:
-        json.dump(export, f, indent=2)
+    # Predictions for known users, scored in batches
+    predictions_path = SERVER_DIR / f"ml_predictions.{args.predictions_format}"
+    export_predictions(predictions_path, ids, model, X_scaled, args.predictions_format, args.top_k, args.chunk_size)
+    if store is not None:
+        store.commit()
 
     print(f"Trained on {X.shape[0]} users. Exported:")
-    print(f"  - {SERVER_DIR / 'ml_predictions.json'}")
+    print(f"  - {predictions_path}")
     print(f"  - {SERVER_DIR / 'model_export.json'}")
-    print(f"  - {SERVER_DIR / 'next_topic_model.joblib'}")
+    print(f"  - {SERVER_DIR / 'model_export.bin'}")
+    print(f"  - {MODEL_PATH}")
 
 
 if __name__ == "__main__":
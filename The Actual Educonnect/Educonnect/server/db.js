@@ -233,6 +233,37 @@ export async function initSchema() {
       persist()
     }
   } catch (_) {}
+  // Change log for incremental ML jobs (scripts/train_next_topic_model.py --incremental,
+  // scripts/signup_ml_pipeline.py --incremental): one row per user, seq bumped whenever a
+  // profile field either job reads changes. Each job keeps its own watermark.
+  exec(`
+    CREATE TABLE IF NOT EXISTS user_changes (
+      seq INTEGER PRIMARY KEY AUTOINCREMENT,
+      user_id TEXT NOT NULL UNIQUE,
+      changed_at TEXT NOT NULL DEFAULT (datetime('now'))
+    )
+  `)
+  exec(`
+    CREATE TRIGGER IF NOT EXISTS trg_users_changes_insert AFTER INSERT ON users BEGIN
+      INSERT OR REPLACE INTO user_changes (user_id) VALUES (NEW.id);
+    END
+  `)
+  // Recreated on every start so existing databases pick up newly tracked columns
+  exec(`DROP TRIGGER IF EXISTS trg_users_changes_update`)
+  exec(`
+    CREATE TRIGGER trg_users_changes_update
+    AFTER UPDATE OF course_area, ordered_interests, weak_topics, strong_topics, study_stats, role,
+      university, degree_program, nationality, country_of_residence, preferred_learning_style,
+      study_partners_preferences, preferred_study_hours, cs_interests, technical_skills, soft_skills,
+      research_interests, professional_interests, hobbies, created_at ON users BEGIN
+      INSERT OR REPLACE INTO user_changes (user_id) VALUES (NEW.id);
+    END
+  `)
+  exec(`
+    CREATE TRIGGER IF NOT EXISTS trg_users_changes_delete AFTER DELETE ON users BEGIN
+      INSERT OR REPLACE INTO user_changes (user_id) VALUES (OLD.id);
+    END
+  `)
 }
 
 export async function init() {
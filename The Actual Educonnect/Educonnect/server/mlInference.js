@@ -1,6 +1,6 @@
 /**
  * ML inference for "next topic to study" in Node.
- * Uses model_export.json produced by scripts/train_next_topic_model.py.
+ * Uses model_export.bin (or model_export.json) produced by scripts/train_next_topic_model.py.
  * Feature vector must match the Python training script exactly.
  */
 
@@ -10,6 +10,11 @@ import { fileURLToPath } from 'url'
 
 const __dirname = path.dirname(fileURLToPath(import.meta.url))
 const MODEL_PATH = path.join(__dirname, 'model_export.json')
+const BINARY_MODEL_PATH = path.join(__dirname, 'model_export.bin')
+// Binary artifact header: magic, version, reserved, nFeatures, nClasses, metadata length, CRC32 (little-endian)
+const BINARY_MAGIC = 'ECNT'
+const BINARY_VERSION = 1
+const BINARY_HEADER_SIZE = 24
 
 const FIELD_IDS = ['ai', 'ml', 'ds', 'nlp', 'cv', 'cyber', 'web', 'law', 'business']
 const COURSE_AREAS = ['Computing & IT', 'Law', 'Business & Management', 'Other']
@@ -76,11 +81,63 @@ function softmaxArgmax(logits) {
   return best
 }
 
+let crcTable = null
+
+function crc32(bytes) {
+  if (!crcTable) {
+    crcTable = new Uint32Array(256)
+    for (let n = 0; n < 256; n++) {
+      let c = n
+      for (let k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1
+      crcTable[n] = c >>> 0
+    }
+  }
+  let crc = 0xffffffff
+  for (let i = 0; i < bytes.length; i++) crc = crcTable[(crc ^ bytes[i]) & 0xff] ^ (crc >>> 8)
+  return (crc ^ 0xffffffff) >>> 0
+}
+
+/**
+ * Parse model_export.bin into the same shape as model_export.json.
+ */
+export function parseBinaryExport(buf) {
+  if (buf.length < BINARY_HEADER_SIZE || buf.toString('latin1', 0, 4) !== BINARY_MAGIC) {
+    throw new Error('not a next-topic model artifact')
+  }
+  if (buf.readUInt16LE(4) !== BINARY_VERSION) throw new Error(`unsupported version ${buf.readUInt16LE(4)}`)
+  const nFeatures = buf.readUInt32LE(8)
+  const nClasses = buf.readUInt32LE(12)
+  const metaLen = buf.readUInt32LE(16)
+  const body = buf.subarray(BINARY_HEADER_SIZE)
+  if (crc32(body) !== buf.readUInt32LE(20)) throw new Error('checksum mismatch')
+
+  const meta = JSON.parse(body.toString('utf8', 0, metaLen))
+  const nFloats = 2 * nFeatures + nClasses * nFeatures + nClasses
+  if (body.length !== metaLen + nFloats * 4) throw new Error('truncated arrays')
+  // Copy so the Float32Array is 4-byte aligned regardless of the Buffer's offset
+  const floats = new Float32Array(new Uint8Array(body.subarray(metaLen)).buffer)
+  let offset = 0
+  const take = (n) => floats.subarray(offset, (offset += n))
+  const mean = take(nFeatures)
+  const scale = take(nFeatures)
+  const coefficients = Array.from({ length: nClasses }, () => take(nFeatures))
+  const intercept = Array.from(take(nClasses))
+  return { ...meta, scaler: { mean, scale }, coefficients, intercept }
+}
+
 /**
- * Load model export from disk (cached).
+ * Load model export from disk (cached). Prefers the binary artifact, falls back to JSON.
  */
 function loadModelExport() {
   if (cachedExport) return cachedExport
+  if (existsSync(BINARY_MODEL_PATH)) {
+    try {
+      cachedExport = parseBinaryExport(readFileSync(BINARY_MODEL_PATH))
+      return cachedExport
+    } catch (e) {
+      console.warn('ML binary model load failed, trying JSON:', e.message)
+    }
+  }
   if (!existsSync(MODEL_PATH)) return null
   try {
     cachedExport = JSON.parse(readFileSync(MODEL_PATH, 'utf8'))